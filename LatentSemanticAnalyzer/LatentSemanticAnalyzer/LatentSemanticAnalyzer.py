@@ -49,14 +49,6 @@ def _right_normalize_matrix_product(W, H):
     return {"W": W.dot(S).set_column_names(W.column_names()), "H": SI.dot(H)}
 
 
-def _sort_dict(x):
-    return dict([(k, v) for k, v in sorted(x.items(), key=lambda item: item[1])])
-
-
-def _reverse_sort_dict(x):
-    return dict([(k, v) for k, v in sorted(x.items(), key=lambda item: -item[1])])
-
-
 # ======================================================================
 # Class definition
 # ======================================================================
@@ -375,8 +367,8 @@ class LatentSemanticAnalyzer:
 
         # Take terms present in large enough number of documents
         smat01 = self.take_document_term_matrix().unitize()
-        cs = smat01.column_sums_dict()
-        ccols = [key for (key, value) in cs.items() if value >= min_number_of_documents_per_term]
+        cs = smat01.column_sums()
+        ccols = smat01.column_names_index().array()[cs >= min_number_of_documents_per_term].tolist()
 
         smat = self.take_weighted_doc_term_mat()[:, ccols]
 
@@ -461,7 +453,7 @@ class LatentSemanticAnalyzer:
         # Automatic topic names re-do
         topic_names = dict(
             [(k, k + "." + '-'.join(list(wterms.keys())[0:3]))
-             for (k, wterms) in self._H.row_dictionaries(sort=True).items()])
+             for (k, wterms) in self._H.iter_row_dictionaries(sort=True, top_k=3)])
         topic_names = [topic_names[t] for t in self._H.row_names()]
 
         self._H.set_row_names(topic_names)
@@ -491,16 +483,16 @@ class LatentSemanticAnalyzer:
 
         if order_by_significance:
             if normalize_left:
-                topicSFactors = nres["H"].multiply(nres["H"]).row_sums_dict()
+                topicSFactors = nres["H"].multiply(nres["H"]).row_sums()
             else:
-                topicSFactors = nres["W"].multiply(nres["W"]).column_sums_dict()
+                topicSFactors = nres["W"].multiply(nres["W"]).column_sums()
 
             # Not really needed
-            # topicSFactors = {k: math.sqrt(v) for (k, v) in topicSFactors.items()}
+            # topicSFactors = numpy.sqrt(topicSFactors)
 
-            topicSFactors = _reverse_sort_dict(topicSFactors)
-            nres["W"] = nres["W"][:, list(topicSFactors.keys())]
-            nres["H"] = nres["H"][list(topicSFactors.keys()), :]
+            topicOrder = numpy.argsort(-topicSFactors, kind="stable")
+            nres["W"] = nres["W"][:, topicOrder]
+            nres["H"] = nres["H"][topicOrder, :]
 
         self._W = nres["W"]
         self._H = nres["H"]
@@ -531,8 +523,7 @@ class LatentSemanticAnalyzer:
         if not (is_s_sparse_matrix(self.take_W()) and is_s_sparse_matrix(self.take_H())):
             raise AttributeError("Cannot find matrix factors.")
 
-        topics = self.take_H().row_dictionaries(sort=True)
-        topics = {k: dict(list(v.items())[0:number_of_terms]) for (k, v) in topics.items()}
+        topics = self.take_H().row_dictionaries(sort=True, top_k=number_of_terms)
 
         if as_data_frame:
             if wide_form:
@@ -627,17 +618,18 @@ class LatentSemanticAnalyzer:
 
         else:
             H = factRes["H"]
+            # The chain of operations is evaluated lazily: the subtraction, the squaring, and the square root
+            # are fused into one allocation
+            minusH = H.lazy().multiply(-1)
             res = {}
             for w in my_words:
                 M = H[:, [w, ]].dot(numpy.ones([1, H.columns_count()]))
-                M.set_column_names(H.column_names())
-                M = M.add(H.multiply(-1))
-                M = M.multiply(M)
-                M = M.sparse_matrix().sqrt()
-                M2 = SSparseMatrix(M, row_names=H.row_names(), column_names=H.column_names())
-                dists = _sort_dict(M2.column_sums_dict())
-                if len(dists) > n + 1:
-                    dists = dict(list(dists.items())[0:n + 1])
+                M.set_column_names(H.column_names_index())
+                M = M.lazy().add(minusH)
+                M2 = M.multiply(M).sqrt().evaluate()
+                dists = M2.column_sums()
+                positions = numpy.argsort(dists, kind="stable")[0:n + 1]
+                dists = dict(zip(M2.column_names_index().array()[positions].tolist(), dists[positions].tolist()))
                 res = res | {w: dists}
 
         self.set_value(res)
@@ -867,7 +859,7 @@ class LatentSemanticAnalyzer:
 
         cor = ""
         if isinstance(log_base, (int, float)) and log_base > 0:
-            x = [math.log(y, log_base) for y in x]
+            x = numpy.log(x) / numpy.log(log_base)
             cor = " (log " + str(log_base) + ")"
 
         print("Number of terms per document" + cor + ":")
@@ -880,7 +872,7 @@ class LatentSemanticAnalyzer:
         x = self.take_doc_term_mat().unitize().column_sums()
 
         if isinstance(log_base, (int, float)) and log_base > 0:
-            x = [math.log(y, log_base) for y in x]
+            x = numpy.log(x) / numpy.log(log_base)
 
         print("Number of documents per term" + cor + ":")
         print("\tmin:    ", numpy.min(x))
@@ -0,0 +1,212 @@
+import importlib
+import json
+
+import numpy
+import scipy
+from scipy import sparse
+
+
+# ======================================================================
+# Optional dependency
+# ======================================================================
+def _import_pyarrow():
+    try:
+        return importlib.import_module("pyarrow")
+    except ImportError:
+        return None
+
+
+def _require_pyarrow():
+    pa = _import_pyarrow()
+    if pa is None:
+        raise ImportError("The package pyarrow is required for the Arrow and Parquet interchange of SSparseMatrix objects.")
+    return pa
+
+
+# ======================================================================
+# Utilities
+# ======================================================================
+def _coo_indices(smat):
+    """Row and column indices of the stored elements of a CSR or CSC matrix, without making a COO matrix."""
+    idx_dtype = numpy.int32 if max(smat.shape) < numpy.iinfo(numpy.int32).max else numpy.int64
+    major = numpy.repeat(numpy.arange(len(smat.indptr) - 1, dtype=idx_dtype), numpy.diff(smat.indptr))
+    minor = smat.indices.astype(idx_dtype, copy=False)
+    if smat.format == "csr":
+        return major, minor
+    return minor, major
+
+
+def _names_array(pa, names_index):
+    return pa.array(names_index.array(), type=pa.string())
+
+
+def _dictionary_codes(pa, column):
+    """Codes and dictionary of a (chunked) Arrow column. Plain columns are dictionary encoded."""
+    if isinstance(column, pa.ChunkedArray):
+        column = column.combine_chunks() if column.num_chunks != 1 else column.chunk(0)
+
+    if not pa.types.is_dictionary(column.type):
+        column = column.dictionary_encode()
+
+    if column.null_count > 0:
+        raise ValueError("The row and column name columns are expected to have no nulls.")
+
+    return column.indices.to_numpy(zero_copy_only=False), column.dictionary
+
+
+# ======================================================================
+# Arrow
+# ======================================================================
+def to_arrow_table(smat, row_names_index, column_names_index,
+                   row_column="row", column_column="column", value_column="value"):
+    """Make an Arrow table with dictionary encoded row and column name columns and a value column.
+
+    The dictionaries are the full names tables, hence, the matrix shape is preserved.
+    The column indices and the values are passed to Arrow without copying.
+    """
+    pa = _require_pyarrow()
+
+    if smat.format not in {"csr", "csc"}:
+        smat = smat.tocsr()
+
+    rows, cols = _coo_indices(smat)
+
+    row_array = pa.DictionaryArray.from_arrays(pa.array(rows), _names_array(pa, row_names_index))
+    col_array = pa.DictionaryArray.from_arrays(pa.array(cols), _names_array(pa, column_names_index))
+
+    return pa.table({row_column: row_array, column_column: col_array, value_column: pa.array(smat.data)})
+
+
+def from_arrow_table(table, row_column="row", column_column="column", value_column="value"):
+    """Make a CSR matrix and row and column names from an Arrow table.
+
+    The row and column name columns can be dictionary encoded or plain string columns.
+    Values of duplicated (row, column) pairs are summed.
+
+    :return: A tuple of a sparse matrix, a list of row names, and a list of column names.
+    """
+    pa = _require_pyarrow()
+
+    if not isinstance(table, pa.Table):
+        raise TypeError("The first argument is expected to be a pyarrow.Table object.")
+
+    for cn in [row_column, column_column, value_column]:
+        if cn not in table.column_names:
+            raise KeyError("Unknown column name: " + repr(cn) + ".")
+
+    rows, row_names = _dictionary_codes(pa, table.column(row_column))
+    cols, col_names = _dictionary_codes(pa, table.column(column_column))
+    values = table.column(value_column).to_numpy()
+
+    smat = scipy.sparse.csr_matrix((values, (rows, cols)), shape=(len(row_names), len(col_names)))
+    smat.sum_duplicates()
+
+    return smat, row_names.to_pylist(), col_names.to_pylist()
+
+
+# ======================================================================
+# Parquet
+# ======================================================================
+# The schema metadata keys of the full lists of row and column names
+_ROW_NAMES_KEY = b"SSparseMatrix.rowNames"
+_COLUMN_NAMES_KEY = b"SSparseMatrix.columnNames"
+
+
+def _names_ids(metadata, key):
+    """Names to indices dictionary of the names list in the Parquet schema metadata (empty if there is none)."""
+    if key not in metadata:
+        return {}
+    names = json.loads(metadata[key])
+    return dict(zip(names, range(len(names))))
+
+
+def write_parquet(file_name, smat, row_names_index, column_names_index,
+                  row_column="row", column_column="column", value_column="value",
+                  row_group_size=1_000_000):
+    """Write the triplets of a sparse matrix into a Parquet file in chunks.
+
+    Each chunk has (approximately) row_group_size stored elements and is written as a separate row group.
+    The full lists of row and column names are written into the schema metadata,
+    hence, the shape and the order of the names are kept.
+    """
+    pa = _require_pyarrow()
+    pq = importlib.import_module("pyarrow.parquet")
+
+    if smat.format not in {"csr", "csc"}:
+        smat = smat.tocsr()
+
+    row_dictionary = _names_array(pa, row_names_index)
+    col_dictionary = _names_array(pa, column_names_index)
+    major_dictionary, minor_dictionary = \
+        (row_dictionary, col_dictionary) if smat.format == "csr" else (col_dictionary, row_dictionary)
+
+    schema = pa.schema([(row_column, pa.string()), (column_column, pa.string()),
+                        (value_column, pa.from_numpy_dtype(smat.data.dtype))],
+                       metadata={_ROW_NAMES_KEY: json.dumps(row_names_index.array().tolist()),
+                                 _COLUMN_NAMES_KEY: json.dumps(column_names_index.array().tolist())})
+
+    # Chunk boundaries along the major axis with approximately row_group_size elements each
+    indptr = smat.indptr
+    breaks = numpy.searchsorted(indptr, numpy.arange(0, smat.nnz, max(int(row_group_size), 1)), side="right") - 1
+    breaks = numpy.unique(numpy.append(breaks, len(indptr) - 1))
+
+    with pq.ParquetWriter(file_name, schema) as writer:
+        for a, b in zip(breaks[:-1], breaks[1:]):
+            start, end = indptr[a], indptr[b]
+            if start == end:
+                continue
+
+            major = numpy.repeat(numpy.arange(a, b, dtype=numpy.int64), numpy.diff(indptr[a:b + 1]))
+            minor = smat.indices[start:end]
+
+            # The names are taken in Arrow (not Python) -- Parquet does its own dictionary encoding
+            major = major_dictionary.take(pa.array(major))
+            minor = minor_dictionary.take(pa.array(minor))
+            rows, cols = (major, minor) if smat.format == "csr" else (minor, major)
+
+            writer.write_table(pa.table({row_column: rows, column_column: cols,
+                                         value_column: pa.array(smat.data[start:end])}, schema=schema))
+
+
+def read_parquet(file_name, row_column="row", column_column="column", value_column="value",
+                 batch_size=1_000_000):
+    """Read a sparse matrix from the triplets in a Parquet file, batch by batch.
+
+    The names of each batch are mapped to global row and column indices,
+    so, only the distinct names (not the elements) are handled with Python objects.
+    If the file was written with write_parquet, the row and column names (with their order)
+    are the ones in the schema metadata; otherwise they are in the order of their first appearance.
+
+    :return: A tuple of a sparse matrix, a list of row names, and a list of column names.
+    """
+    pa = _require_pyarrow()
+    pq = importlib.import_module("pyarrow.parquet")
+
+    pfile = pq.ParquetFile(file_name, read_dictionary=[row_column, column_column])
+
+    metadata = pfile.schema_arrow.metadata or {}
+    row_ids = _names_ids(metadata, _ROW_NAMES_KEY)
+    col_ids = _names_ids(metadata, _COLUMN_NAMES_KEY)
+    rows_chunks = []
+    cols_chunks = []
+    values_chunks = []
+
+    def global_codes(column, ids):
+        codes, dictionary = _dictionary_codes(pa, column)
+        mapping = numpy.array([ids.setdefault(x, len(ids)) for x in dictionary.to_pylist()], dtype=numpy.int64)
+        return mapping[codes] if len(mapping) > 0 else codes.astype(numpy.int64)
+
+    for batch in pfile.iter_batches(batch_size=batch_size, columns=[row_column, column_column, value_column]):
+        rows_chunks.append(global_codes(batch.column(row_column), row_ids))
+        cols_chunks.append(global_codes(batch.column(column_column), col_ids))
+        values_chunks.append(batch.column(value_column).to_numpy())
+
+    if len(values_chunks) == 0:
+        return scipy.sparse.csr_matrix((len(row_ids), len(col_ids))), list(row_ids.keys()), list(col_ids.keys())
+
+    smat = scipy.sparse.csr_matrix((numpy.concatenate(values_chunks),
+                                    (numpy.concatenate(rows_chunks), numpy.concatenate(cols_chunks))),
+                                   shape=(len(row_ids), len(col_ids)))
+    smat.sum_duplicates()
+
+    return smat, list(row_ids.keys()), list(col_ids.keys())
@@ -0,0 +1,155 @@
+import json
+
+import numpy
+
+# ======================================================================
+# Binary container format
+# ======================================================================
+# A binary container file has the layout:
+#
+#   magic        8 bytes, b"SSPMATRX"
+#   header size  8 bytes, little endian unsigned integer
+#   header       UTF-8 encoded JSON object with the keys "version", "meta", and "arrays"
+#   arrays       the raw array buffers, each one starting at a 64 bytes aligned offset
+#
+# The value of "arrays" is a dictionary of array names to dictionaries with the keys
+# "dtype", "shape", and "offset". The offsets are relative to the (aligned) end of the header.
+# Since the arrays are stored raw and aligned, they can be memory mapped with numpy.memmap.
+
+_MAGIC = b"SSPMATRX"
+_VERSION = 1
+_ALIGNMENT = 64
+
+
+def _aligned(n):
+    return (n + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+def write_binary_container(file_name, arrays, meta=None):
+    """Write arrays and metadata into a binary container file. (The file is written in one pass.)
+
+    :type file_name: str
+    :param file_name: File name.
+
+    :type arrays: dict
+    :param arrays: A dictionary of names to NumPy arrays.
+
+    :type meta: dict|None
+    :param meta: A JSON serializable dictionary of metadata.
+    """
+    if not (isinstance(arrays, dict) and all([isinstance(x, numpy.ndarray) for x in arrays.values()])):
+        raise TypeError("The second argument is expected to be a dictionary of NumPy arrays.")
+
+    # Arrays specifications
+    specs = {}
+    offset = 0
+    for k, v in arrays.items():
+        specs[k] = {"dtype": v.dtype.str, "shape": list(v.shape), "offset": offset}
+        offset = _aligned(offset + v.nbytes)
+
+    header = json.dumps({"version": _VERSION, "meta": {} if meta is None else meta, "arrays": specs}).encode("utf-8")
+    data_start = _aligned(len(_MAGIC) + 8 + len(header))
+
+    with open(file_name, "wb") as f:
+        f.write(_MAGIC)
+        f.write(len(header).to_bytes(8, "little"))
+        f.write(header)
+        f.write(b"\0" * (data_start - f.tell()))
+
+        for k, v in arrays.items():
+            f.write(b"\0" * (data_start + specs[k]["offset"] - f.tell()))
+            f.write(memoryview(numpy.ascontiguousarray(v)).cast("B"))
+
+
+def read_binary_container_header(file_name):
+    """Read the header of a binary container file.
+
+    :type file_name: str
+    :param file_name: File name.
+    :return: A tuple of the header dictionary and the offset of the arrays data.
+    """
+    with open(file_name, "rb") as f:
+        magic = f.read(len(_MAGIC))
+        if magic != _MAGIC:
+            raise ValueError("The file " + repr(file_name) + " is not a binary container file.")
+        header_size = int.from_bytes(f.read(8), "little")
+        header = json.loads(f.read(header_size).decode("utf-8"))
+
+    if header.get("version", None) != _VERSION:
+        raise ValueError("Unsupported binary container version: " + repr(header.get("version", None)) + ".")
+
+    return header, _aligned(len(_MAGIC) + 8 + header_size)
+
+
+def read_binary_container(file_name, mmap_mode="r", names=None):
+    """Read the arrays and metadata of a binary container file.
+
+    :type file_name: str
+    :param file_name: File name.
+
+    :type mmap_mode: str|None
+    :param mmap_mode: Memory mapping mode, one of "r", "r+", "c", or None.
+    If None the arrays are read into memory.
+
+    :type names: list|None
+    :param names: Names of the arrays to read. If None all arrays are read.
+
+    :return: A tuple of the metadata dictionary and a dictionary of names to NumPy arrays.
+    """
+    if mmap_mode not in {"r", "r+", "c", None}:
+        raise ValueError("The argument mmap_mode is expected to be one of \"r\", \"r+\", \"c\", or None.")
+
+    header, data_start = read_binary_container_header(file_name)
+    specs = header["arrays"]
+
+    if names is None:
+        names = list(specs.keys())
+
+    unknown = [k for k in names if k not in specs]
+    if len(unknown) > 0:
+        raise KeyError("Unknown arrays in the binary container: " + str(unknown) + ".")
+
+    res = {}
+    if mmap_mode is None:
+        with open(file_name, "rb") as f:
+            for k in names:
+                dtype = numpy.dtype(specs[k]["dtype"])
+                shape = tuple(specs[k]["shape"])
+                f.seek(data_start + specs[k]["offset"])
+                res[k] = numpy.fromfile(f, dtype=dtype, count=int(numpy.prod(shape))).reshape(shape)
+    else:
+        # One memory map for the whole file; the arrays are views of it
+        buffer = numpy.memmap(file_name, dtype=numpy.uint8, mode=mmap_mode)
+        for k in names:
+            dtype = numpy.dtype(specs[k]["dtype"])
+            shape = tuple(specs[k]["shape"])
+            start = data_start + specs[k]["offset"]
+            nbytes = int(numpy.prod(shape)) * dtype.itemsize
+            res[k] = buffer[start:start + nbytes].view(dtype).reshape(shape)
+
+    return header["meta"], res
+
+
+# ======================================================================
+# Names encoding
+# ======================================================================
+_NAMES_SEPARATOR = "\x00"
+
+
+def encode_names(names):
+    """Encode a list of names into a UTF-8 bytes array. (The names are separated with the null character.)
+    The names are expected to be strings -- other names would not be read back as they are.
+    """
+    if not all([isinstance(x, str) for x in names]):
+        raise TypeError("The names are expected to be strings.")
+    joined = _NAMES_SEPARATOR.join(names)
+    if joined.count(_NAMES_SEPARATOR) != max(len(names) - 1, 0):
+        raise ValueError("The names are expected not to have null characters.")
+    return numpy.frombuffer(joined.encode("utf-8"), dtype=numpy.uint8)
+
+
+def decode_names(arr, n):
+    """Decode a UTF-8 bytes array made by encode_names into a list of n names."""
+    if n == 0:
+        return []
+    return numpy.asarray(arr).tobytes().decode("utf-8").split(_NAMES_SEPARATOR)
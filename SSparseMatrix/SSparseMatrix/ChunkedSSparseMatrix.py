@@ -0,0 +1,586 @@
+import os
+
+import numpy
+import scipy
+from scipy import sparse
+
+from SSparseMatrix.BinaryContainer import decode_names
+from SSparseMatrix.BinaryContainer import encode_names
+from SSparseMatrix.BinaryContainer import read_binary_container
+from SSparseMatrix.BinaryContainer import read_binary_container_header
+from SSparseMatrix.BinaryContainer import write_binary_container
+from SSparseMatrix.SSparseMatrix import SSparseMatrix
+from SSparseMatrix.SSparseMatrix import _as_counts
+from SSparseMatrix.SSparseMatrix import _is_num_like
+from SSparseMatrix.SSparseMatrix import _sums
+from SSparseMatrix.SSparseMatrix import is_int_like
+from SSparseMatrix.SSparseMatrix import is_s_sparse_matrix
+
+# ======================================================================
+# Directory layout
+# ======================================================================
+# A chunked matrix directory has:
+#
+#   index.bin           binary container with the arrays "rowNames", "columnNames", and "blockOffsets"
+#                       (the first row of each block and the number of rows), and the metadata
+#                       "shape", "blocks" (the block file names), and "dimensionNames"
+#   block-NNNNNN.bin    binary container with the CSR arrays "indptr", "indices", and "data" of a row block
+#
+# The block files are never changed after they are written, hence, they are memory mapped read only
+# and shared by all ChunkedSSparseMatrix objects made from the same directory.
+_INDEX_FILE_NAME = "index.bin"
+
+_ROWS_PER_BLOCK = 100_000
+
+
+def is_chunked_s_sparse_matrix(obj):
+    return isinstance(obj, ChunkedSSparseMatrix)
+
+
+def _block_file_name(i):
+    return "block-%06d.bin" % i
+
+
+def _write_block(file_name, smat):
+    smat = smat.tocsr()
+    if not smat.has_canonical_format:
+        smat = smat.copy()
+        smat.sum_duplicates()
+
+    idx_dtype = numpy.int32 if max(smat.nnz, max(smat.shape)) < numpy.iinfo(numpy.int32).max else numpy.int64
+    write_binary_container(file_name,
+                           {"indptr": smat.indptr.astype(idx_dtype, copy=False),
+                            "indices": smat.indices.astype(idx_dtype, copy=False),
+                            "data": smat.data},
+                           {"shape": list(smat.shape), "nnz": int(smat.nnz)})
+
+
+def _diagonal(smat):
+    """The diagonal of a square sparse matrix that has non-zero elements only on the diagonal, otherwise None."""
+    if smat.shape[0] != smat.shape[1]:
+        return None
+    A = smat.tocoo()
+    if not numpy.all(A.row == A.col):
+        return None
+    return smat.diagonal()
+
+
+# ======================================================================
+# Class definition
+# ======================================================================
+class ChunkedSSparseMatrix(SSparseMatrix):
+    """Out-of-core SSparseMatrix: the rows are sharded into CSR blocks that are stored in files.
+
+    The operations dot, row_sums, column_sums, multiply, unitize, and row slicing are done block by block --
+    only one block is in memory at a time.
+    Multiplication by a scalar or a diagonal and unitizing are deferred: they are applied to the
+    blocks when the blocks are read, hence, the block files are never rewritten.
+    The other SSparseMatrix operations need the whole sparse matrix and raise TypeError;
+    the matrix is loaded into memory only explicitly, with to_s_sparse_matrix.
+    """
+    _directory = None
+    _mmapMode = "r"
+    _shape = None
+    _blockFiles = None
+    _blockOffsets = None
+    _blockNNZ = None
+    # Deferred element-wise transformation: (1 if unitized else value) * scale * columnWeights[column]
+    _unitized = False
+    _scale = 1
+    _columnWeights = None
+
+    def __init__(self, directory=None, mmap_mode="r"):
+        """Creation of a ChunkedSSparseMatrix object.
+           If the directory argument is given, the chunked matrix in that directory is opened.
+        """
+        super().__init__()
+        self._directory = None
+        self._mmapMode = mmap_mode
+        self._shape = None
+        self._blockFiles = None
+        self._blockOffsets = None
+        self._blockNNZ = None
+        self._unitized = False
+        self._scale = 1
+        self._columnWeights = None
+
+        if directory is not None:
+            self.from_directory(directory, mmap_mode=mmap_mode)
+
+    # ------------------------------------------------------------------
+    # Getters
+    # ------------------------------------------------------------------
+    def directory(self):
+        """The directory of the block files."""
+        return self._directory
+
+    def blocks_count(self):
+        """Number of row blocks."""
+        return len(self._blockFiles)
+
+    def block_offsets(self):
+        """The first row of each block followed by the number of rows."""
+        return self._blockOffsets
+
+    def _out_of_core_error(self):
+        return TypeError("The operation needs the whole ChunkedSSparseMatrix object in memory; " +
+                         "load it explicitly with to_s_sparse_matrix, or use the block by block operations.")
+
+    def sparse_matrix(self, format=None):
+        """Sparse matrix. Not available -- the matrix is out-of-core. (See to_s_sparse_matrix.)"""
+        raise self._out_of_core_error()
+
+    def _as_format(self, format, convert=True):
+        raise self._out_of_core_error()
+
+    def _has_sparse_matrix(self):
+        return self._blockFiles is not None
+
+    def to_s_sparse_matrix(self):
+        """Load the whole matrix into memory. Gives a SSparseMatrix object."""
+        if len(self._blockFiles) == 0:
+            smat = scipy.sparse.csr_matrix(self._shape)
+        else:
+            smat = scipy.sparse.vstack([self._block_matrix(i) for i in range(len(self._blockFiles))], format="csr")
+
+        obj = SSparseMatrix(dtype=self._dtype)
+        obj._sparseMatrix = smat
+        obj._rowNames, obj._colNames = self._rowNames, self._colNames
+        obj._dimNames = self._dimNames
+        return obj
+
+    def rows_count(self):
+        """Number of rows."""
+        return self._shape[0]
+
+    def nrow(self):
+        """Number of rows."""
+        return self._shape[0]
+
+    def columns_count(self):
+        """Number of columns."""
+        return self._shape[1]
+
+    def ncol(self):
+        """Number of columns."""
+        return self._shape[1]
+
+    def shape(self):
+        """Shape."""
+        return self._shape
+
+    def dim(self):
+        """Dimensions. (Synonym of shape.)"""
+        return self._shape
+
+    @property
+    def nnz(self):
+        """Number of stored elements."""
+        return int(sum(self._blockNNZ))
+
+    # ------------------------------------------------------------------
+    # Blocks
+    # ------------------------------------------------------------------
+    def _block_matrix(self, i):
+        """The i-th row block as a CSR matrix with the deferred transformation applied."""
+        meta, arrays = read_binary_container(os.path.join(self._directory, self._blockFiles[i]),
+                                             mmap_mode=self._mmapMode)
+        data = arrays["data"]
+        if self._unitized:
+            data = numpy.ones(len(data), dtype=float if self._dtype is None else self._dtype)
+        if self._scale != 1:
+            data = data * self._scale
+        if self._columnWeights is not None:
+            data = data * self._columnWeights[arrays["indices"]]
+
+        smat = scipy.sparse.csr_matrix((data, arrays["indices"], arrays["indptr"]), shape=tuple(meta["shape"]),
+                                       copy=False)
+        # Canonical format was ensured when writing
+        smat.has_canonical_format = True
+        return smat
+
+    def block(self, i):
+        """The i-th row block as a SSparseMatrix object."""
+        start, end = self._blockOffsets[i], self._blockOffsets[i + 1]
+        obj = SSparseMatrix(dtype=self._dtype)
+        obj._sparseMatrix = self._block_matrix(i)
+        obj._rowNames = self._rowNames.take(slice(int(start), int(end)))
+        obj._colNames = self._colNames
+        obj._dimNames = self._dimNames
+        return obj
+
+    def iter_blocks(self):
+        """Iterate over the row blocks. (Gives SSparseMatrix objects.)"""
+        for i in range(len(self._blockFiles)):
+            yield self.block(i)
+
+    # ------------------------------------------------------------------
+    # Copying
+    # ------------------------------------------------------------------
+    def _derive_chunked(self):
+        """Make a ChunkedSSparseMatrix object that shares the block files and the names of self."""
+        obj = ChunkedSSparseMatrix(mmap_mode=self._mmapMode)
+        obj._directory = self._directory
+        obj._shape = self._shape
+        obj._blockFiles = self._blockFiles
+        obj._blockOffsets = self._blockOffsets
+        obj._blockNNZ = self._blockNNZ
+        obj._unitized = self._unitized
+        obj._scale = self._scale
+        obj._columnWeights = self._columnWeights
+        obj._dtype = self._dtype
+        obj._rowNames, obj._colNames = self._rowNames, self._colNames
+        obj._dimNames = self._dimNames
+        return obj
+
+    def copy(self):
+        """Copy. The block files are never changed, hence, they are shared and not copied."""
+        return self._derive_chunked()
+
+    def set_sparse_matrix(self, arg, as_is=False):
+        raise TypeError("The sparse matrix of a ChunkedSSparseMatrix object cannot be set.")
+
+    # ------------------------------------------------------------------
+    # From SSparseMatrix
+    # ------------------------------------------------------------------
+    def from_s_sparse_matrix(self, smat, directory, rows_per_block=_ROWS_PER_BLOCK):
+        """Write a SSparseMatrix object into row blocks in a directory.
+
+        :type smat: SSparseMatrix
+        :param smat: A SSparseMatrix object.
+
+        :type directory: str
+        :param directory: Directory of the block files.
+
+        :type rows_per_block: int
+        :param rows_per_block: Number of rows of each block.
+        """
+        if not is_s_sparse_matrix(smat):
+            raise TypeError("The first argument is expected to be a SSparseMatrix object.")
+        if not (is_int_like(rows_per_block) and rows_per_block > 0):
+            raise TypeError("The argument rows_per_block is expected to be a positive integer.")
+
+        csr = smat.sparse_matrix(format="csr")
+        nrows = csr.shape[0]
+
+        def blocks():
+            for start in range(0, nrows, rows_per_block):
+                end = min(start + rows_per_block, nrows)
+                obj = SSparseMatrix()
+                obj._sparseMatrix = csr[start:end, :]
+                obj._rowNames = smat.row_names_index().take(slice(start, end))
+                obj._colNames = smat.column_names_index()
+                obj._dimNames = smat._dimNames
+                yield obj
+
+        return self.from_blocks(blocks(), directory)
+
+    # ------------------------------------------------------------------
+    # From blocks
+    # ------------------------------------------------------------------
+    def from_blocks(self, blocks, directory):
+        """Write row blocks into a directory. Only one block is in memory at a time.
+
+        :type blocks: iterable
+        :param blocks: An iterable of SSparseMatrix objects with the same column names.
+        The row names of the chunked matrix are the concatenation of the row names of the blocks.
+
+        :type directory: str
+        :param directory: Directory of the block files.
+        """
+        if os.path.exists(os.path.join(directory, _INDEX_FILE_NAME)):
+            raise ValueError("The directory " + repr(directory) + " already has a chunked matrix.")
+        os.makedirs(directory, exist_ok=True)
+
+        colNames = None
+        dimNames = None
+        rowNames = []
+        offsets = [0]
+        files = []
+        for smat in blocks:
+            if not is_s_sparse_matrix(smat):
+                raise TypeError("The blocks are expected to be SSparseMatrix objects.")
+            if colNames is None:
+                colNames = smat.column_names_index()
+                dimNames = smat._dimNames
+            elif smat.column_names_index() != colNames:
+                raise TypeError("The column names of the blocks are expected to be the same.")
+
+            files.append(_block_file_name(len(files)))
+            _write_block(os.path.join(directory, files[-1]), smat.sparse_matrix())
+            rowNames.append(smat.row_names_index().array())
+            offsets.append(offsets[-1] + smat.rows_count())
+
+        if colNames is None:
+            raise ValueError("At least one block is expected.")
+
+        rowNames = numpy.concatenate(rowNames)
+        meta = {"shape": [offsets[-1], len(colNames)],
+                "blocks": files,
+                "dimensionNames": None if dimNames is None else list(dimNames.keys())}
+        write_binary_container(os.path.join(directory, _INDEX_FILE_NAME),
+                               {"rowNames": encode_names(rowNames),
+                                "columnNames": encode_names(colNames.array()),
+                                "blockOffsets": numpy.asarray(offsets, dtype=numpy.int64)},
+                               meta)
+
+        return self.from_directory(directory, mmap_mode=self._mmapMode)
+
+    # ------------------------------------------------------------------
+    # From directory
+    # ------------------------------------------------------------------
+    def from_directory(self, directory, mmap_mode="r"):
+        """Open a chunked matrix directory.
+
+        :type directory: str
+        :param directory: Directory made with from_blocks, from_s_sparse_matrix, or to_directory.
+
+        :type mmap_mode: str|None
+        :param mmap_mode: Memory mapping mode of the blocks, "r" or None.
+        If None the blocks are read into memory when used.
+        """
+        if mmap_mode not in {"r", None}:
+            raise ValueError("The argument mmap_mode is expected to be \"r\" or None.")
+
+        meta, arrays = read_binary_container(os.path.join(directory, _INDEX_FILE_NAME), mmap_mode=None)
+
+        self._directory = directory
+        self._mmapMode = mmap_mode
+        self._shape = tuple(meta["shape"])
+        self._blockFiles = list(meta["blocks"])
+        self._blockOffsets = arrays["blockOffsets"]
+        self._blockNNZ = [read_binary_container_header(os.path.join(directory, x))[0]["meta"]["nnz"]
+                          for x in self._blockFiles]
+        self._unitized = False
+        self._scale = 1
+        self._columnWeights = None
+
+        self._rowNames = None
+        self._colNames = None
+        self._dimNames = None
+        self.set_row_names(decode_names(arrays["rowNames"], self._shape[0]))
+        self.set_column_names(decode_names(arrays["columnNames"], self._shape[1]))
+        if meta.get("dimensionNames", None) is not None:
+            self.set_dimension_names(meta["dimensionNames"])
+        return self
+
+    # ------------------------------------------------------------------
+    # To directory
+    # ------------------------------------------------------------------
+    def to_directory(self, directory):
+        """Write into another directory with the deferred transformations applied. (Block by block.)"""
+        ChunkedSSparseMatrix().from_blocks(self.iter_blocks(), directory)
+        return self
+
+    # ------------------------------------------------------------------
+    # Access
+    # ------------------------------------------------------------------
+    def _get_single_element(self, row, col):
+        if not is_int_like(row):
+            row = self._rowNames.positions([row], what="row names")[0]
+        if not is_int_like(col):
+            col = self._colNames.positions([col], what="column names")[0]
+        if row < 0:
+            row += self._shape[0]
+
+        i = int(numpy.searchsorted(self._blockOffsets, row, side="right")) - 1
+        return self._block_matrix(i)[row - int(self._blockOffsets[i]), col]
+
+    def _get_submatrix(self, row_slice_arg, col_slice_arg):
+        row_slice = self._key_to_positions(row_slice_arg, self._rowNames, "row")
+        col_slice = self._key_to_positions(col_slice_arg, self._colNames, "column")
+
+        positions = numpy.arange(self._shape[0])[row_slice] if isinstance(row_slice, slice) else row_slice
+        positions = numpy.where(positions < 0, positions + self._shape[0], positions)
+
+        # Only the blocks with selected rows are read; the selected rows are put back into the given order
+        blockIds = numpy.searchsorted(self._blockOffsets, positions, side="right") - 1
+        order = numpy.argsort(blockIds, kind="stable")
+        sortedPositions = positions[order]
+        ids, starts = numpy.unique(blockIds[order], return_index=True)
+        ends = numpy.append(starts[1:], len(order))
+        parts = []
+        for i, a, b in zip(ids, starts, ends):
+            parts.append(self._block_matrix(int(i))[sortedPositions[a:b] - int(self._blockOffsets[i]), :])
+
+        if len(parts) == 0:
+            smat = scipy.sparse.csr_matrix((0, self._shape[1]))
+        else:
+            smat = scipy.sparse.vstack(parts, format="csr")
+            smat = smat[numpy.argsort(order, kind="stable"), :]
+
+        if not (isinstance(col_slice, slice) and col_slice == slice(None)):
+            smat = smat.tocsc()[:, col_slice]
+
+        res = SSparseMatrix(smat)
+        res.set_row_names(self._rowNames.take(positions))
+        res.set_column_names(self._colNames.take(col_slice))
+        res._dimNames = self._dimNames
+        return res
+
+    # ------------------------------------------------------------------
+    # Multiply
+    # ------------------------------------------------------------------
+    def multiply(self, other, copy=True):
+        """Element-wise multiplication with a scalar, or with a vector of column weights
+        (a list or a NumPy array of length columns_count(), or a dictionary of column names to weights),
+        or with a SSparseMatrix object (or a scipy sparse matrix) with the same shape.
+
+        The multiplication with a scalar or column weights is deferred -- it is done when the blocks are read.
+        The multiplication with a matrix is done block by block; the result is a SSparseMatrix object.
+        """
+        if isinstance(other, SSparseMatrix) or scipy.sparse.issparse(other):
+            return self._multiply_matrix(other)
+
+        obj = self._derive_chunked() if copy else self
+
+        if _is_num_like(other):
+            obj._scale = self._scale * other
+        else:
+            if isinstance(other, dict):
+                weights = numpy.zeros(self.columns_count())
+                weights[self._colNames.positions(list(other.keys()), what="column names")] = list(other.values())
+            elif isinstance(other, (list, numpy.ndarray)) and numpy.ndim(other) == 1 and \
+                    len(other) == self.columns_count():
+                weights = numpy.asarray(other)
+            else:
+                raise TypeError("The first argument is expected to be a scalar, or a list, a NumPy array, " +
+                                "or a dictionary of column weights.")
+            obj._columnWeights = weights if self._columnWeights is None else self._columnWeights * weights
+
+        return obj
+
+    def _multiply_matrix(self, other):
+        if isinstance(other, SSparseMatrix):
+            if other.row_names_index() != self._rowNames or other.column_names_index() != self._colNames:
+                raise ValueError("The row and column names of the first argument are expected to be " +
+                                 "the same as the ones of the chunked matrix.")
+        elif other.shape != self._shape:
+            raise ValueError("Dimension mismatch: %s and %s." % (self._shape, other.shape))
+
+        parts = []
+        for i in range(len(self._blockFiles)):
+            start, end = int(self._blockOffsets[i]), int(self._blockOffsets[i + 1])
+            if is_chunked_s_sparse_matrix(other):
+                part = other[start:end, :].sparse_matrix()
+            elif isinstance(other, SSparseMatrix):
+                part = other.sparse_matrix(format="csr")[start:end, :]
+            else:
+                part = other.tocsr()[start:end, :]
+            block = _as_counts(self._block_matrix(i), part.dtype)
+            parts.append(scipy.sparse.csr_matrix(block.multiply(_as_counts(part, block.dtype))))
+
+        obj = SSparseMatrix(dtype=self._dtype)
+        obj._sparseMatrix = scipy.sparse.vstack(parts, format="csr") if len(parts) > 0 \
+            else scipy.sparse.csr_matrix(self._shape)
+        obj._rowNames, obj._colNames = self._rowNames, self._colNames
+        obj._dimNames = self._dimNames
+        return obj
+
+    # ------------------------------------------------------------------
+    # Unitize
+    # ------------------------------------------------------------------
+    def unitize(self):
+        """Make all non-zero elements 1. (In place operation; deferred until the blocks are read.)"""
+        self._unitized = True
+        self._scale = 1
+        self._columnWeights = None
+        return self
+
+    # ------------------------------------------------------------------
+    # Dot
+    # ------------------------------------------------------------------
+    def dot(self, other, copy=True, backend=None, n_threads=None, directory=None):
+        """Dot product with another object that is a SSparseMatrix object, or scipy sparse matrix,
+        or a list, or a numpy array. The product is done block by block.
+
+        The product with a diagonal matrix is a deferred multiplication with column weights,
+        hence, the result is a ChunkedSSparseMatrix object that shares the block files of self.
+
+        :type directory: str|None
+        :param directory: A directory for the result blocks. If None the result is a SSparseMatrix object.
+        """
+        mat = other.sparse_matrix() if is_s_sparse_matrix(other) else other
+        if scipy.sparse.issparse(mat) and mat.shape[0] == self.columns_count():
+            weights = _diagonal(mat)
+            if weights is not None:
+                obj = self.multiply(weights)
+                if is_s_sparse_matrix(other):
+                    obj._colNames = other.column_names_index()
+                else:
+                    obj.set_column_names()
+                return obj
+
+        products = (b.dot(other, backend=backend, n_threads=n_threads) for b in self.iter_blocks())
+
+        if directory is not None:
+            return ChunkedSSparseMatrix(mmap_mode=self._mmapMode).from_blocks(products, directory)
+
+        products = list(products)
+        if len(products) == 0:
+            raise ValueError("The chunked matrix has no blocks.")
+
+        obj = SSparseMatrix()
+        obj._sparseMatrix = scipy.sparse.vstack([x.sparse_matrix() for x in products], format="csr")
+        obj._rowNames = self._rowNames
+        obj._colNames = products[0].column_names_index()
+        obj._dimNames = self._dimNames
+        return obj
+
+    def left_dot(self, other):
+        """Dot product of another SSparseMatrix object (or scipy sparse matrix) with self, i.e. other.dot(self).
+        The product is done block by block; the result is a SSparseMatrix object."""
+        if is_s_sparse_matrix(other) and not is_chunked_s_sparse_matrix(other):
+            mat = other.sparse_matrix(format="csc")
+            rowNames = other.row_names_index()
+        elif scipy.sparse.issparse(other):
+            mat = other.tocsc()
+            rowNames = None
+        else:
+            raise TypeError("The first argument is expected to be SSparseMatrix object or a scipy sparse matrix.")
+
+        if mat.shape[1] != self.rows_count():
+            raise ValueError("Dimension mismatch: %s and %s." % (mat.shape, self._shape))
+
+        res = scipy.sparse.csr_matrix((mat.shape[0], self.columns_count()))
+        for i in range(len(self._blockFiles)):
+            start, end = int(self._blockOffsets[i]), int(self._blockOffsets[i + 1])
+            part = mat[:, start:end]
+            if part.nnz > 0:
+                block = _as_counts(self._block_matrix(i), part.dtype)
+                res = res + _as_counts(part, block.dtype).dot(block)
+        res.eliminate_zeros()
+
+        obj = SSparseMatrix(res)
+        if rowNames is None:
+            obj.set_row_names()
+        else:
+            obj._rowNames = rowNames
+        obj._colNames = self._colNames
+        return obj
+
+    # ------------------------------------------------------------------
+    # Summation
+    # ------------------------------------------------------------------
+    def row_sums(self):
+        """Give the row sums"""
+        res = [_sums(self._block_matrix(i), 1) for i in range(len(self._blockFiles))]
+        return numpy.concatenate(res) if len(res) > 0 else numpy.zeros(0)
+
+    def column_sums(self):
+        """Give the column sums."""
+        res = numpy.zeros(self.columns_count())
+        for i in range(len(self._blockFiles)):
+            res = res + _sums(self._block_matrix(i), 0)
+        return res
+
+    # ------------------------------------------------------------------
+    # Representation
+    # ------------------------------------------------------------------
+    def __str__(self):
+        return self.__repr__()
+
+    def __repr__(self):
+        """Representation of ChunkedSSparseMatrix object."""
+        return "<%d x %d ChunkedSSparseMatrix with %d stored elements in %d row blocks in %s>" % \
+            (self._shape[0], self._shape[1], self.nnz, len(self._blockFiles), repr(self._directory))
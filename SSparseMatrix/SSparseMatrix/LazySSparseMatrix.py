@@ -0,0 +1,339 @@
+import numbers
+
+import numpy
+import scipy
+from scipy import sparse
+
+from SSparseMatrix.SSparseMatrix import SSparseMatrix
+from SSparseMatrix.SSparseMatrix import _as_counts
+from SSparseMatrix.SSparseMatrix import _cast
+from SSparseMatrix.SSparseMatrix import is_s_sparse_matrix
+
+
+# ======================================================================
+# Expression nodes
+# ======================================================================
+# The expression nodes are tuples:
+#   ("leaf", smat)                        -- a SSparseMatrix object
+#   ("lincomb", [(coef, node), ...])      -- a linear combination of nodes (scalar multiplication is a special case)
+#   ("hadamard", node1, node2)            -- element-wise product
+#   ("square", node)                      -- element-wise square
+#   ("map", func_name, node)              -- element-wise function ("sqrt" or "power" with an exponent)
+#   ("transpose", node)
+#   ("dot", node1, node2)
+#
+# The fusion rules applied when the nodes are made:
+#   - scalar factors are folded into the coefficients of linear combinations,
+#   - sums of linear combinations are flattened into one linear combination,
+#   - the element-wise product of a node with itself is a square,
+#   - scalar factors of element-wise products and squares are pulled out.
+
+def _is_scalar(x):
+    return isinstance(x, numbers.Number) and not isinstance(x, bool)
+
+
+def _terms(node):
+    return node[1] if node[0] == "lincomb" else [(1, node)]
+
+
+def _scaled(node, coef):
+    return "lincomb", [(c * coef, x) for (c, x) in _terms(node)]
+
+
+def _single_factor(node):
+    """Split a single term linear combination into its coefficient and node."""
+    if node[0] == "lincomb" and len(node[1]) == 1:
+        return node[1][0]
+    return 1, node
+
+
+def _use_counts(node, counts):
+    counts[id(node)] = counts.get(id(node), 0) + 1
+    if counts[id(node)] > 1:
+        return counts
+
+    if node[0] == "lincomb":
+        for (_, x) in node[1]:
+            _use_counts(x, counts)
+    elif node[0] in {"hadamard", "dot"}:
+        _use_counts(node[1], counts)
+        _use_counts(node[2], counts)
+    elif node[0] in {"square", "transpose"}:
+        _use_counts(node[1], counts)
+    elif node[0] == "map":
+        _use_counts(node[2], counts)
+    return counts
+
+
+# ======================================================================
+# Evaluation
+# ======================================================================
+class _Evaluator:
+    """Evaluation of an expression tree. Each node is evaluated once.
+
+    The sparse matrices made during the evaluation are "owned" -- they can be changed in place
+    by the node that uses them if no other node uses them. The leaf matrices are never changed.
+    """
+
+    def __init__(self, root):
+        self._counts = _use_counts(root, {})
+        self._memo = {}
+
+    def evaluate(self, node):
+        """Evaluate a node. Gives a pair of a sparse matrix and is it owned by the caller or not."""
+        key = id(node)
+        if key in self._memo:
+            return self._memo[key], False
+
+        smat, owned = self._evaluate(node)
+        if self._counts.get(key, 0) > 1:
+            # Shared by several nodes, hence, not changed in place
+            self._memo[key] = smat
+            owned = False
+        return smat, owned
+
+    def _evaluate(self, node):
+        kind = node[0]
+
+        if kind == "leaf":
+            smat = node[1].sparse_matrix()
+            if smat.dtype == bool:
+                # The results of arithmetic with Boolean matrices are counts
+                return _as_counts(smat), True
+            return smat, False
+
+        elif kind == "lincomb":
+            return self._lincomb(node[1])
+
+        elif kind == "hadamard":
+            a, _ = self.evaluate(node[1])
+            b, _ = self.evaluate(node[2])
+            return a.multiply(b.asformat(a.format)), True
+
+        elif kind == "square":
+            a, owned = self.evaluate(node[1])
+            if not owned:
+                a = a.copy()
+            a.sum_duplicates()
+            a.data **= 2
+            return a, True
+
+        elif kind == "map":
+            a, owned = self.evaluate(node[2])
+            func, arg = node[1]
+            if owned and numpy.issubdtype(a.data.dtype, numpy.floating):
+                a.sum_duplicates()
+                if func == "sqrt":
+                    numpy.sqrt(a.data, out=a.data)
+                else:
+                    numpy.power(a.data, arg, out=a.data)
+                return a, True
+            return (a.sqrt() if func == "sqrt" else a.power(arg)), True
+
+        elif kind == "transpose":
+            a, owned = self.evaluate(node[1])
+            return a.transpose(), owned
+
+        elif kind == "dot":
+            a, _ = self.evaluate(node[1])
+            b, _ = self.evaluate(node[2])
+            res = a.dot(b)
+            res.eliminate_zeros()
+            return res, True
+
+        raise ValueError("Unknown expression node: " + repr(kind) + ".")
+
+    def _lincomb(self, terms):
+        # c1 * x1 + c2 * x2 + ... is computed as c1 * (x1 + (c2/c1) * x2 + ...);
+        # the terms with the ratios 1 and -1 are added or subtracted without scaling temporaries.
+        # The first term has a non-zero coefficient (if any)
+        terms = sorted(terms, key=lambda t: t[0] == 0)
+        c1, x1 = terms[0]
+        res, owned = self.evaluate(x1)
+
+        if c1 == 0:
+            res = res * 0
+            res.eliminate_zeros()
+            return res, True
+
+        for (c, x) in terms[1:]:
+            if c == 0:
+                continue
+            b, _ = self.evaluate(x)
+            b = b.asformat(res.format)
+            r = c / c1
+            if r == 1:
+                res = res + b
+            elif r == -1:
+                res = res - b
+            else:
+                res = res + b * r
+            owned = True
+
+        if c1 != 1:
+            if owned and numpy.result_type(res.data, c1) == res.data.dtype:
+                res.data *= c1
+            else:
+                res = res * c1
+            owned = True
+
+        return res, owned
+
+
+# ======================================================================
+# Class definition
+# ======================================================================
+class LazySSparseMatrix:
+    """Deferred SSparseMatrix computations.
+
+    The operations make expression trees; the trees are fused and evaluated when evaluate() is called,
+    or when an attribute of SSparseMatrix (that is not an operation of LazySSparseMatrix) is accessed.
+    """
+    _expr = None
+    _rowNames = None
+    _colNames = None
+    _dimNames = None
+    _dtype = None
+    _value = None
+
+    def __init__(self, smat=None):
+        """Creation of a LazySSparseMatrix object from a SSparseMatrix object."""
+        self._expr = None
+        self._rowNames = None
+        self._colNames = None
+        self._dimNames = None
+        self._dtype = None
+        self._value = None
+
+        if smat is not None:
+            if not is_s_sparse_matrix(smat):
+                raise TypeError("The first argument is expected to be a SSparseMatrix object.")
+            self._expr = ("leaf", smat)
+            self._rowNames = smat.row_names_index()
+            self._colNames = smat.column_names_index()
+            self._dimNames = smat._dimNames
+            self._dtype = smat._dtype
+
+    def _make(self, expr, row_names=None, col_names=None):
+        obj = LazySSparseMatrix()
+        obj._expr = expr
+        obj._rowNames = self._rowNames if row_names is None else row_names
+        obj._colNames = self._colNames if col_names is None else col_names
+        obj._dimNames = self._dimNames
+        obj._dtype = self._dtype
+        return obj
+
+    def _operand(self, other):
+        """Expression of an operand of an element-wise operation. (The names are verified.)"""
+        if isinstance(other, LazySSparseMatrix):
+            if not (self._rowNames == other._rowNames and self._colNames == other._colNames):
+                raise TypeError("The row and column names of the two matrices are expected to be the same.")
+            return other._expr
+        elif is_s_sparse_matrix(other):
+            if not (self._rowNames == other.row_names_index() and self._colNames == other.column_names_index()):
+                raise TypeError("The row and column names of the two matrices are expected to be the same.")
+            return "leaf", other
+        elif scipy.sparse.issparse(other):
+            return "leaf", SSparseMatrix(other, row_names=self._rowNames, column_names=self._colNames)
+        raise TypeError("The first argument is expected to be a LazySSparseMatrix object, a SSparseMatrix object, "
+                        "or a scipy sparse matrix.")
+
+    # ------------------------------------------------------------------
+    # Getters
+    # ------------------------------------------------------------------
+    def expression(self):
+        """Expression tree."""
+        return self._expr
+
+    def row_names_index(self):
+        """Row names index. (A NameIndex object.)"""
+        return self._rowNames
+
+    def column_names_index(self):
+        """Column names index. (A NameIndex object.)"""
+        return self._colNames
+
+    def shape(self):
+        """Shape."""
+        return len(self._rowNames), len(self._colNames)
+
+    # ------------------------------------------------------------------
+    # Operations
+    # ------------------------------------------------------------------
+    def add(self, other):
+        """Element-wise addition with another LazySSparseMatrix, SSparseMatrix, or scipy sparse matrix."""
+        return self._make(("lincomb", _terms(self._expr) + _terms(self._operand(other))))
+
+    def subtract(self, other):
+        """Element-wise subtraction of another LazySSparseMatrix, SSparseMatrix, or scipy sparse matrix."""
+        return self._make(("lincomb", _terms(self._expr) + _terms(_scaled(self._operand(other), -1))))
+
+    def multiply(self, other):
+        """Element-wise multiplication with a scalar, or another LazySSparseMatrix, SSparseMatrix,
+        or scipy sparse matrix."""
+        if _is_scalar(other):
+            return self._make(_scaled(self._expr, other))
+
+        c1, x1 = _single_factor(self._expr)
+        c2, x2 = _single_factor(self._operand(other))
+        same = x1 is x2 or x1[0] == "leaf" and x2[0] == "leaf" and x1[1] is x2[1]
+        expr = ("square", x1) if same else ("hadamard", x1, x2)
+        if c1 * c2 != 1:
+            expr = ("lincomb", [(c1 * c2, expr)])
+        return self._make(expr)
+
+    def power(self, p):
+        """Element-wise power."""
+        if p == 2:
+            c, x = _single_factor(self._expr)
+            expr = ("square", x)
+            return self._make(expr if c == 1 else ("lincomb", [(c * c, expr)]))
+        return self._make(("map", ("power", p), self._expr))
+
+    def sqrt(self):
+        """Element-wise square root."""
+        return self._make(("map", ("sqrt", None), self._expr))
+
+    def transpose(self):
+        """Transpose."""
+        return self._make(("transpose", self._expr), row_names=self._colNames, col_names=self._rowNames)
+
+    def dot(self, other):
+        """Dot product with another LazySSparseMatrix or SSparseMatrix object."""
+        if isinstance(other, LazySSparseMatrix):
+            expr, colNames = other._expr, other._colNames
+        elif is_s_sparse_matrix(other):
+            expr, colNames = ("leaf", other), other.column_names_index()
+        else:
+            raise TypeError("The first argument is expected to be a LazySSparseMatrix or a SSparseMatrix object.")
+        return self._make(("dot", self._expr, expr), col_names=colNames)
+
+    # ------------------------------------------------------------------
+    # Evaluation
+    # ------------------------------------------------------------------
+    def evaluate(self):
+        """Evaluate the expression tree. Gives a SSparseMatrix object. (The result is cached.)"""
+        if self._value is None:
+            if self._expr[0] == "leaf":
+                self._value = self._expr[1]
+            else:
+                smat, _ = _Evaluator(self._expr).evaluate(self._expr)
+                if smat.format not in {"csr", "csc"}:
+                    smat = smat.tocsr()
+                # The data type policy is the one of the (left-most) leaf, as with the eager operations
+                res = SSparseMatrix(dtype=self._dtype)
+                res._sparseMatrix = _cast(smat, self._dtype)
+                res.set_row_names(self._rowNames)
+                res.set_column_names(self._colNames)
+                res._dimNames = self._dimNames
+                self._value = res
+        return self._value
+
+    def __getattr__(self, name):
+        # Any other attribute is an attribute of the evaluated SSparseMatrix object
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.evaluate(), name)
+
+    def __repr__(self):
+        return "<LazySSparseMatrix with shape %s and expression %s>" % (self.shape(), self._expr[0])
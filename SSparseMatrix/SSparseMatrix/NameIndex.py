@@ -0,0 +1,249 @@
+import collections.abc
+import itertools
+import types
+
+import numpy
+
+
+# ======================================================================
+# Utilities
+# ======================================================================
+def is_name_index(obj):
+    return isinstance(obj, NameIndex)
+
+
+def _to_object_array(names):
+    arr = numpy.empty(len(names), dtype=object)
+    arr[:] = names
+    return arr
+
+
+# ======================================================================
+# Class definition
+# ======================================================================
+class NameIndex:
+    """Immutable index of the row names or the column names of a SSparseMatrix object.
+
+    The names are kept in a NumPy object array. The name-to-position dictionary (the hash lookup)
+    and the list of names are made lazily, at most once. Since the index is never changed,
+    it is shared by all SSparseMatrix objects that have the same rows or columns.
+    (Hence, the getters give a new list of names and a read only view of the dictionary.)
+    """
+    _names = None
+    _namesDict = None
+    _namesList = None
+
+    def __init__(self, names=None):
+        """Creation of a NameIndex object.
+           The argument is expected to be a list, a tuple, or a NumPy array of names,
+           or a dictionary (mapping) of names to indices, or a NameIndex object.
+        """
+        self._names = None
+        self._namesDict = None
+        self._namesList = None
+
+        if names is None:
+            names = []
+
+        if isinstance(names, NameIndex):
+            self._names = names._names
+            self._namesDict = names._namesDict
+            self._namesList = names._namesList
+        elif isinstance(names, collections.abc.Mapping):
+            self._set_from_dict(names)
+        elif isinstance(names, numpy.ndarray):
+            if names.ndim != 1:
+                raise TypeError("The first argument is expected to be a one dimensional array of names.")
+            if names.dtype != object:
+                self._names = names.astype(object)
+            elif names.flags.writeable:
+                # Copy in order to make sure the names are not changed through the given array
+                self._names = names.copy()
+            else:
+                self._names = names
+        elif isinstance(names, (list, tuple)):
+            self._names = _to_object_array(names)
+        else:
+            raise TypeError("""The first argument is expected to be a list, a tuple, or a NumPy array of names,
+            a dictionary of names to indices, or a NameIndex object.""")
+
+        self._names.flags.writeable = False
+
+    @classmethod
+    def _from_array(cls, arr):
+        # The given array is owned by the new object -- no copying is done.
+        obj = cls()
+        arr.flags.writeable = False
+        obj._names = arr
+        return obj
+
+    def _set_from_dict(self, names):
+        n = len(names)
+        try:
+            inds = numpy.fromiter(names.values(), dtype=numpy.intp, count=n)
+        except (TypeError, ValueError):
+            inds = numpy.empty(0, dtype=numpy.intp)
+
+        if n > 0 and len(inds) == n and inds.min() >= 0 and inds.max() < n and len(numpy.unique(inds)) == n:
+            # The dictionary values are positions, hence, the dictionary is used as the hash lookup.
+            self._names = numpy.empty(n, dtype=object)
+            self._names[inds] = list(names.keys())
+            self._namesDict = dict(names)
+        else:
+            self._names = _to_object_array(list(names.keys()))
+
+    # ------------------------------------------------------------------
+    # Getters
+    # ------------------------------------------------------------------
+    def array(self):
+        """Names as a (read only) NumPy object array."""
+        return self._names
+
+    def names(self):
+        """Names as a (new) list."""
+        return list(self._names_list())
+
+    def names_dict(self):
+        """Names to positions dictionary. (A read only view.)"""
+        return types.MappingProxyType(self._names_dict())
+
+    def _names_list(self):
+        if self._namesList is None:
+            self._namesList = self._names.tolist()
+        return self._namesList
+
+    def _names_dict(self):
+        if self._namesDict is None:
+            self._namesDict = dict(zip(self._names.tolist(), range(len(self._names))))
+        return self._namesDict
+
+    def __len__(self):
+        return len(self._names)
+
+    def __iter__(self):
+        return iter(self._names_list())
+
+    def __contains__(self, name):
+        try:
+            return name in self._names_dict()
+        except TypeError:
+            return False
+
+    def __getitem__(self, key):
+        return self._names[key]
+
+    def is_unique(self):
+        """Are the names unique?"""
+        return len(self._names_dict()) == len(self._names)
+
+    def isdisjoint(self, other):
+        """Has no common names with another NameIndex object?"""
+        return self._names_dict().keys().isdisjoint(other._names_dict().keys())
+
+    def same_names(self, other):
+        """Has the same set of names as another NameIndex object?"""
+        return self is other or \
+            len(self) == len(other) and self._names_dict().keys() == other._names_dict().keys()
+
+    # ------------------------------------------------------------------
+    # Predicates
+    # ------------------------------------------------------------------
+    def __eq__(self, other):
+        """Equivalence with another NameIndex object or a list of names. (The order of the names matters.)"""
+        if self is other:
+            return True
+        elif isinstance(other, NameIndex):
+            if self._names is other._names:
+                return True
+            return len(self) == len(other) and bool(numpy.all(self._names == other._names))
+        elif isinstance(other, (list, tuple)):
+            return self._names_list() == list(other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        res = self.__eq__(other)
+        return res if res is NotImplemented else not res
+
+    __hash__ = None
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+    def position(self, name):
+        """Position of a name. Raises KeyError for unknown names."""
+        return self._names_dict()[name]
+
+    def positions(self, names, ignore_unknown=False, what="names"):
+        """Positions of a list (or NumPy array) of names.
+
+        :param names: Names to find the positions of.
+        :param ignore_unknown: Should the unknown names be ignored (dropped) or not?
+        :param what: What are the names -- used in the error message for unknown names.
+        :return: A NumPy integer array.
+        """
+        d = self._names_dict()
+        res = numpy.fromiter(map(d.get, names, itertools.repeat(-1)), dtype=numpy.intp, count=len(names))
+        missing = res < 0
+        if missing.any():
+            if ignore_unknown:
+                return res[~missing]
+            unknown = [names[i] for i in numpy.flatnonzero(missing)[:5]]
+            raise KeyError("Unknown %s: %s%s (%d in total)." %
+                           (what,
+                            ", ".join(repr(x) for x in unknown),
+                            ", ..." if missing.sum() > len(unknown) else "",
+                            missing.sum()))
+        return res
+
+    # ------------------------------------------------------------------
+    # Derived indexes
+    # ------------------------------------------------------------------
+    def take(self, key):
+        """Make a new NameIndex object with a subset of the names.
+
+        :param key: A slice, an integer array or list, or a Boolean mask.
+        :return: NameIndex
+        """
+        if isinstance(key, slice) and key == slice(None):
+            return self
+        if isinstance(key, list):
+            key = numpy.asarray(key) if len(key) > 0 else numpy.empty(0, dtype=numpy.intp)
+        return NameIndex._from_array(self._names[key])
+
+    def concatenate(self, *others):
+        """Make a new NameIndex object by concatenating with other NameIndex objects.
+        (If the names dictionary of this object is made, it is copied and extended.)"""
+        res = NameIndex._from_array(numpy.concatenate([self._names] + [x._names for x in others]))
+        if self._namesDict is not None:
+            d = self._namesDict.copy()
+            n = len(self._names)
+            for x in others:
+                d.update(zip(x._names.tolist(), range(n, n + len(x))))
+                n = n + len(x)
+            res._namesDict = d
+        return res
+
+    # ------------------------------------------------------------------
+    # Pickling
+    # ------------------------------------------------------------------
+    def __getstate__(self):
+        # The caches are not pickled
+        return {"_names": self._names}
+
+    def __setstate__(self, state):
+        self._names = state["_names"]
+        self._namesDict = None
+        self._namesList = None
+        self._names.flags.writeable = False
+
+    # ------------------------------------------------------------------
+    # Representation
+    # ------------------------------------------------------------------
+    def __repr__(self):
+        n = len(self._names)
+        if n > 6:
+            shown = ", ".join(repr(x) for x in self._names[:3]) + ", ..., " + \
+                    ", ".join(repr(x) for x in self._names[-3:])
+        else:
+            shown = ", ".join(repr(x) for x in self._names)
+        return "NameIndex([%s], length=%d)" % (shown, n)
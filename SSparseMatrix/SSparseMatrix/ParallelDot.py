@@ -0,0 +1,156 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy
+import scipy
+from scipy import sparse
+
+# ======================================================================
+# Backends
+# ======================================================================
+# "scipy"   -- the (single threaded) scipy.sparse product
+# "threads" -- the rows of the CSR matrix are partitioned into blocks (views of the CSR arrays) that are
+#              multiplied in a thread pool; scipy.sparse releases the GIL in its sparse products
+# "numpy"   -- CSR products with NumPy operations only (a gather of the other factor and numpy.add.reduceat)
+_DOT_BACKENDS = {"scipy", "threads", "numpy"}
+
+_dotBackend = "scipy"
+_dotThreads = None
+
+# The threads backend is not used for products with fewer elements per thread
+_MIN_NNZ_PER_THREAD = 100_000
+
+# The numpy backend densifies sparse factors with at most that many columns
+_NUMPY_MAX_DENSE_COLUMNS = 64
+
+# One thread pool for all products, made at the first use of the threads backend and never remade;
+# the number of threads of a product is the number of its row blocks
+_executor = None
+_executorLock = threading.Lock()
+
+
+def set_dot_backend(backend="scipy", n_threads=None):
+    """Set the default backend of SSparseMatrix.dot.
+
+    :type backend: str
+    :param backend: One of "scipy", "threads", or "numpy".
+
+    :type n_threads: int|None
+    :param n_threads: Number of threads (row blocks) of the "threads" backend. If None the number of CPUs is used.
+    (The thread pool has as many threads as CPUs.)
+    """
+    global _dotBackend, _dotThreads
+    _check_backend(backend)
+    if not (n_threads is None or isinstance(n_threads, int) and n_threads > 0):
+        raise TypeError("The argument n_threads is expected to be a positive integer or None.")
+    _dotBackend = backend
+    _dotThreads = n_threads
+
+
+def get_dot_backend():
+    """Get the default backend of SSparseMatrix.dot."""
+    return _dotBackend
+
+
+def _check_backend(backend):
+    if backend not in _DOT_BACKENDS:
+        raise ValueError("The backend is expected to be one of " + ", ".join(sorted(_DOT_BACKENDS)) + ".")
+
+
+def _get_executor():
+    global _executor
+    with _executorLock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="SSparseMatrix-dot")
+        return _executor
+
+
+# ======================================================================
+# Threads backend
+# ======================================================================
+def _row_blocks(smat, n_blocks):
+    """Partition a CSR matrix into row blocks with (approximately) the same number of elements.
+    The data and indices arrays of the blocks are views of the arrays of the matrix."""
+    indptr = smat.indptr
+    breaks = numpy.searchsorted(indptr, numpy.linspace(0, smat.nnz, n_blocks + 1), side="left")
+    breaks[0], breaks[-1] = 0, smat.shape[0]
+    breaks = numpy.unique(breaks)
+
+    blocks = []
+    for a, b in zip(breaks[:-1], breaks[1:]):
+        start, end = indptr[a], indptr[b]
+        blocks.append(scipy.sparse.csr_matrix((smat.data[start:end], smat.indices[start:end], indptr[a:b + 1] - start),
+                                              shape=(b - a, smat.shape[1]), copy=False))
+    return blocks
+
+
+def _threads_dot(smat, other, n_threads):
+    n_blocks = min(n_threads, max(smat.nnz // _MIN_NNZ_PER_THREAD, 1))
+    if n_blocks <= 1:
+        return smat.dot(other)
+
+    blocks = _row_blocks(smat, n_blocks)
+    results = list(_get_executor().map(lambda x: x.dot(other), blocks))
+
+    if scipy.sparse.issparse(results[0]):
+        return scipy.sparse.vstack(results, format="csr")
+    return numpy.concatenate(results, axis=0)
+
+
+# ======================================================================
+# NumPy backend
+# ======================================================================
+def _numpy_csr_dot_dense(smat, x):
+    prod = smat.data[:, None] * x[smat.indices] if x.ndim == 2 else smat.data * x[smat.indices]
+
+    res = numpy.zeros((smat.shape[0],) + x.shape[1:], dtype=numpy.result_type(smat.data, x))
+    nonEmpty = numpy.flatnonzero(numpy.diff(smat.indptr))
+    if len(nonEmpty) > 0:
+        # Empty rows have no elements, hence, the segment of each non-empty row ends at the next non-empty row
+        res[nonEmpty] = numpy.add.reduceat(prod, smat.indptr[nonEmpty], axis=0)
+    return res
+
+
+def _numpy_dot(smat, other):
+    if scipy.sparse.issparse(other):
+        if other.shape[1] > _NUMPY_MAX_DENSE_COLUMNS:
+            return smat.dot(other)
+        return scipy.sparse.csr_matrix(_numpy_csr_dot_dense(smat, other.toarray()))
+    return _numpy_csr_dot_dense(smat, numpy.asarray(other))
+
+
+# ======================================================================
+# Dot product
+# ======================================================================
+def sparse_dot(smat, other, backend=None, n_threads=None):
+    """Product of a sparse matrix with a sparse matrix or a NumPy array.
+
+    :param smat: A sparse matrix. The "threads" and "numpy" backends expect a CSR matrix.
+    :param other: A sparse matrix or a NumPy array.
+
+    :type backend: str|None
+    :param backend: One of "scipy", "threads", or "numpy". If None the default backend is used.
+
+    :type n_threads: int|None
+    :param n_threads: Number of threads of the "threads" backend. If None the default is used.
+    """
+    if backend is None:
+        backend = _dotBackend
+    _check_backend(backend)
+
+    if backend == "scipy":
+        return smat.dot(other)
+
+    if smat.format != "csr":
+        smat = smat.tocsr()
+
+    if other.shape[0] != smat.shape[1]:
+        raise ValueError("Dimension mismatch: %s and %s." % (smat.shape, other.shape))
+
+    if backend == "numpy":
+        return _numpy_dot(smat, other)
+
+    if n_threads is None:
+        n_threads = _dotThreads if _dotThreads is not None else (os.cpu_count() or 1)
+    return _threads_dot(smat, other, n_threads)
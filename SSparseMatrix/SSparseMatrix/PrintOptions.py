@@ -0,0 +1,47 @@
+import numpy
+
+# ======================================================================
+# Print options
+# ======================================================================
+# "max_rows"       -- print_matrix shows at most that many rows: the first and the last ones
+# "max_columns"    -- print_matrix shows at most that many columns: the first and the last ones
+# "max_dense_size" -- print_matrix does not render dense tables with more elements
+_printOptions = {"max_rows": 60, "max_columns": 20, "max_dense_size": 1_000_000}
+
+
+def set_print_options(max_rows=None, max_columns=None, max_dense_size=None):
+    """Set the print options of SSparseMatrix objects. (The options given as None are not changed.)
+
+    :type max_rows: int|None
+    :param max_rows: Maximum number of rows shown by print_matrix.
+
+    :type max_columns: int|None
+    :param max_columns: Maximum number of columns shown by print_matrix.
+
+    :type max_dense_size: int|None
+    :param max_dense_size: Maximum number of elements of the dense tables rendered by print_matrix.
+    """
+    options = {"max_rows": max_rows, "max_columns": max_columns, "max_dense_size": max_dense_size}
+    for k, v in options.items():
+        if not (v is None or isinstance(v, int) and v > 0):
+            raise TypeError("The argument %s is expected to be a positive integer or None." % k)
+
+    _printOptions.update({k: v for (k, v) in options.items() if v is not None})
+
+
+def get_print_options():
+    """Get the print options of SSparseMatrix objects."""
+    return dict(_printOptions)
+
+
+def preview_positions(n, max_n):
+    """Positions of the first and the last elements shown in a preview of n elements.
+
+    :return: A pair of an integer array of positions and the number of leading positions
+    (after which the skipped elements are), or None if no elements are skipped.
+    """
+    if n <= max_n:
+        return numpy.arange(n), None
+    head = (max_n + 1) // 2
+    tail = max_n - head
+    return numpy.concatenate([numpy.arange(head), numpy.arange(n - tail, n)]), head
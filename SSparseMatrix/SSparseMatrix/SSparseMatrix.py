@@ -1,16 +1,31 @@
-import itertools
-import pickle
+import collections.abc
+import importlib
 
 import numpy
 import scipy
 from scipy import sparse
 
+from SSparseMatrix.ArrowInterchange import from_arrow_table
+from SSparseMatrix.ArrowInterchange import read_parquet
+from SSparseMatrix.ArrowInterchange import to_arrow_table
+from SSparseMatrix.ArrowInterchange import write_parquet
+from SSparseMatrix.BinaryContainer import decode_names
+from SSparseMatrix.BinaryContainer import encode_names
+from SSparseMatrix.BinaryContainer import read_binary_container
+from SSparseMatrix.BinaryContainer import write_binary_container
+from SSparseMatrix.NameIndex import NameIndex
+from SSparseMatrix.ParallelDot import get_dot_backend
+from SSparseMatrix.ParallelDot import sparse_dot
+from SSparseMatrix.PrintOptions import get_print_options
+from SSparseMatrix.PrintOptions import preview_positions
+
 
 # ======================================================================
 # Utilities
 # ======================================================================
 def is_s_sparse_matrix(obj):
-    return isinstance(obj, SSparseMatrix) and scipy.sparse.issparse(obj.sparse_matrix())
+    # No sparse matrix is accessed, hence, out-of-core matrices are not loaded
+    return isinstance(obj, SSparseMatrix) and obj._has_sparse_matrix()
 
 
 def make_s_sparse_matrix(matrix, rows="", columns=""):
@@ -37,42 +52,229 @@ def is_str_like(x):
     """Is x appropriate as a key into a SSparseMatrix object? Returns True
     if it can be cast safely to a key.
     """
-    if scipy.sparse.issparse(x):
-        return False
-    else:
-        try:
-            if str(x) == x:
-                return True
-            else:
-                return False
-        except TypeError:
-            return False
+    # Same as str(x) == x, but without converting (potentially large) lists or arrays to strings
+    return isinstance(x, str)
+
+
+def _import_pandas():
+    try:
+        return importlib.import_module("pandas")
+    except ImportError:
+        return None
+
+
+def _require_pandas():
+    pd = _import_pandas()
+    if pd is None:
+        raise ImportError("The package pandas is required for the pandas series of SSparseMatrix objects.")
+    return pd
 
 
 def _is_num_like(x):
     return isinstance(x, int) or isinstance(x, float) or isinstance(x, complex)
 
 
-def _reverse_sort_dict(x):
-    return dict([(k, v) for k, v in sorted(x.items(), key=lambda item: -item[1])])
+# ------------------------------------------------------------------
+# Data type policy
+# ------------------------------------------------------------------
+# The data type of the new SSparseMatrix objects; None means the data type of the given matrix is kept
+_defaultDtype = None
+
+
+def set_default_dtype(dtype=None):
+    """Set the default data type of the SSparseMatrix objects made by the constructor.
+
+    :param dtype: A NumPy data type, e.g. numpy.float32 or bool, or None.
+    If None the data types of the given matrices are kept.
+    """
+    global _defaultDtype
+    _defaultDtype = _check_dtype(dtype)
+
+
+def get_default_dtype():
+    """Get the default data type of the SSparseMatrix objects made by the constructor."""
+    return _defaultDtype
+
+
+def _check_dtype(dtype):
+    if dtype is None:
+        return None
+    try:
+        return numpy.dtype(dtype)
+    except TypeError:
+        raise TypeError("The data type is expected to be a NumPy data type or None.")
+
+
+def _as_dtype(smat, dtype):
+    if dtype is None or smat is None or smat.dtype == dtype:
+        return smat
+    return smat.astype(dtype)
+
+
+def _cast(smat, dtype):
+    """Cast the result of an operation to the data type policy.
+    Boolean (incidence) matrices keep their data type in the structural operations, like slicing and binding,
+    but the results of arithmetic with them are not cast back to bool."""
+    return smat if dtype == bool else _as_dtype(smat, dtype)
+
+
+# The data type Boolean (incidence) matrices are promoted to in arithmetic -- the results are counts
+_COUNT_DTYPE = numpy.float32
+
+
+def _as_counts(smat, *others):
+    """Promote a Boolean matrix into the count data type, or into the common data type of it and the other operands
+    (data types or scalars). Other matrices are given as they are."""
+    if smat is None or smat.dtype != bool:
+        return smat
+    return smat.astype(numpy.result_type(_COUNT_DTYPE, *others))
+
+
+def _sums(smat, axis):
+    """Sums of a sparse matrix along an axis as a NumPy array. (The sums of Boolean matrices are counts.)"""
+    return numpy.asarray(smat.sum(axis=axis, dtype=_COUNT_DTYPE if smat.dtype == bool else None)).ravel()
+
+
+def _default_names_index(prefix, n):
+    # Same as [prefix + str(x) for x in range(n)], but without a Python loop
+    return NameIndex(numpy.char.add(prefix, numpy.arange(n).astype(str)))
+
+
+# Up to this k the top-k elements are selected with k passes over the data
+_TOP_K_PASSES_MAX = 16
+
+
+def _segments_top_k(indptr, data, k):
+    """Positions of the k largest elements of each segment of a CSR (or CSC) data array.
+
+    Only the segments with more than k elements are processed. For small k the largest elements
+    are selected in k vectorized passes, otherwise the elements are sorted by segment and value.
+    Ties are resolved by position. The result is in ascending order.
+    """
+    counts = numpy.diff(indptr)
+    heavy = counts > k
+    if not heavy.any():
+        return numpy.arange(indptr[-1])
+
+    isHeavyElem = numpy.repeat(heavy, counts)
+    light = numpy.flatnonzero(~isHeavyElem)
+    heavyElems = numpy.flatnonzero(isHeavyElem)
+
+    hcounts = counts[heavy]
+    hstarts = numpy.cumsum(hcounts) - hcounts
+
+    if k <= _TOP_K_PASSES_MAX:
+        # Take the (first) maximum of each segment, k times
+        work = data[heavyElems].astype(float)
+        work[numpy.isnan(work)] = -numpy.inf
+        taken = numpy.zeros(len(work), dtype=bool)
+        positions = numpy.arange(len(work))
+        selected = []
+        for _ in range(k):
+            maxs = numpy.maximum.reduceat(work, hstarts)
+            candidates = (work == numpy.repeat(maxs, hcounts)) & ~taken
+            first = numpy.minimum.reduceat(numpy.where(candidates, positions, len(work)), hstarts)
+            taken[first] = True
+            work[first] = -numpy.inf
+            selected.append(first)
+        heavyElems = heavyElems[numpy.concatenate(selected)]
+    else:
+        # Sort by segment, then by value in descending order
+        segments = numpy.repeat(numpy.flatnonzero(heavy), hcounts)
+        heavyElems = heavyElems[numpy.lexsort((-data[heavyElems], segments))]
+        ranks = numpy.arange(len(heavyElems)) - numpy.repeat(hstarts, hcounts)
+        heavyElems = heavyElems[ranks < k]
+
+    res = numpy.concatenate([light, heavyElems])
+    res.sort()
+    return res
 
 
 # ------------------------------------------------------------------
-# Column binding
+# Binding
 # ------------------------------------------------------------------
-def column_bind(matrices):
-    if isinstance(matrices, list):
-        return column_bind(dict(zip([str(x) for x in range(len(matrices))], matrices)))
-    elif isinstance(matrices, dict):
-        res = None
-        for k in matrices:
-            if is_s_sparse_matrix(res) and is_s_sparse_matrix(matrices[k]):
-                res = res.column_bind(matrices[k])
-            else:
-                res = matrices[k]
-        return res
+def _bind(matrices, axis):
+    """Bind a list of SSparseMatrix objects along the given axis (0 for rows, 1 for columns) in one step.
+
+    The matrices are aligned to the shared names of the first one, stacked with one scipy call,
+    and the bound names are made once. If the bound names are not unique, each matrix gets
+    the suffix ".i" (i = 1, 2, ...) for its bound names.
+    """
+    if not all([is_s_sparse_matrix(x) for x in matrices]):
+        raise TypeError("The first argument is expected to be a list or dictionary of SSparseMatrix objects.")
+
+    if len(matrices) == 0:
+        return None
+    elif len(matrices) == 1:
+        return matrices[0]
+
+    sharedWhat, boundWhat = ("row", "column") if axis == 1 else ("column", "row")
+
+    def shared_index(x):
+        return x._rowNames if axis == 1 else x._colNames
+
+    def bound_index(x):
+        return x._colNames if axis == 1 else x._rowNames
+
+    # Align to the shared names of the first matrix
+    shared = shared_index(matrices[0])
+    aligned = []
+    for x in matrices:
+        if shared_index(x) != shared:
+            if not shared.same_names(shared_index(x)):
+                raise TypeError("The %s names of the SSparseMatrix objects are expected to be the same." % sharedWhat)
+            x = x[:, shared.array()] if axis == 0 else x[shared.array(), :]
+        aligned.append(x)
+
+    # Stacking CSC matrices horizontally or CSR matrices vertically is a concatenation of their arrays;
+    # scipy stacks CSR matrices horizontally in one pass too.
+    # The data type policy of the first matrix is used; the parts are cast before stacking
+    dtype = matrices[0]._dtype
+    if axis == 1:
+        fmt = "csc" if all([x.sparse_matrix().format == "csc" for x in aligned]) else "csr"
+        mat = scipy.sparse.hstack([_cast(x._as_format(fmt), dtype) for x in aligned], format=fmt)
+    else:
+        fmt = "csr" if any([x.sparse_matrix().format != "csc" for x in aligned]) else "csc"
+        mat = scipy.sparse.vstack([_cast(x._as_format(fmt), dtype) for x in aligned], format=fmt)
+
+    res = SSparseMatrix(mat, dtype=dtype)
+
+    boundIndexes = [bound_index(x) for x in aligned]
+    allNames = set()
+    for ind in boundIndexes:
+        allNames.update(ind.names_dict().keys())
+
+    if len(allNames) == mat.shape[axis]:
+        boundNames = boundIndexes[0].concatenate(*boundIndexes[1:])
+    else:
+        # Special handling of duplication of names in the result.
+        boundNames = [y + "." + str(i + 1) for (i, ind) in enumerate(boundIndexes) for y in ind.names()]
+
+    if axis == 1:
+        res.set_row_names(shared)
+        res.set_column_names(boundNames)
     else:
+        res.set_column_names(shared)
+        res.set_row_names(boundNames)
+    return res
+
+
+def column_bind(matrices):
+    """Column binding of a list or a dictionary of SSparseMatrix objects. (The matrices are bound in one step.)"""
+    if isinstance(matrices, dict):
+        matrices = list(matrices.values())
+    elif not isinstance(matrices, list):
         raise TypeError("The first argument is expected to be a list or dictionary of SSparseMatrix objects.")
+    return _bind(matrices, axis=1)
+
+
+def row_bind(matrices):
+    """Row binding of a list or a dictionary of SSparseMatrix objects. (The matrices are bound in one step.)"""
+    if isinstance(matrices, dict):
+        matrices = list(matrices.values())
+    elif not isinstance(matrices, list):
+        raise TypeError("The first argument is expected to be a list or dictionary of SSparseMatrix objects.")
+    return _bind(matrices, axis=0)
 
 
 # ======================================================================
@@ -80,15 +282,14 @@ def column_bind(matrices):
 # ======================================================================
 class SSparseMatrix:
     _sparseMatrix = None
+    # A pair of the sparse matrix and its conversion into another format (CSR or CSC), made lazily
+    _otherFormat = None
+    # The row and column names are NameIndex objects
     _rowNames = None
     _colNames = None
     _dimNames = None
-
-    # The following two fields are conceptually redundant
-    # Introduced for optimization purposes -- for example .row_names was too slow
-    # just using the dictionary _row_names.
-    _rowNamesList = None
-    _colNamesList = None
+    # The data type policy: the matrix data and the results of the operations have that data type
+    _dtype = None
 
     def __init__(self, *args, **kwargs):
         """Creation of a SSparseMatrix object.
@@ -97,14 +298,15 @@ class SSparseMatrix:
            are expected to be row names and column names respectively.
            Alternatively, the corresponding named arguments
            "row_names" and "column_names" can be used.
+           The named argument "dtype" is the data type policy; if not given the default one is used.
+           (See set_default_dtype.)
         """
         self._sparseMatrix = None
+        self._otherFormat = None
         self._rowNames = None
         self._colNames = None
         self._dimNames = None
-
-        self._rowNamesList = None
-        self._colNamesList = None
+        self._dtype = _check_dtype(kwargs.get("dtype", _defaultDtype))
 
         if len(args) == 1:
             self.set_sparse_matrix(args[0])
@@ -128,39 +330,61 @@ class SSparseMatrix:
     # ------------------------------------------------------------------
     #  Getters
     # ------------------------------------------------------------------
-    def sparse_matrix(self) -> scipy.sparse.csc.csc_matrix:
-        """Sparse matrix."""
-        return self._sparseMatrix
+    def sparse_matrix(self, format=None):
+        """Sparse matrix.
 
-    def row_names_dict(self):
-        """Row names to indices dictionary."""
+        :type format: str|None
+        :param format: Sparse matrix format, e.g. "csr" or "csc". If None the matrix is given as it is stored.
+        The conversions into other formats are cached, hence, repeated calls do not repeat the conversions.
+        The buffers of the sparse matrix might be shared with derived objects (e.g. transposes); copy the
+        sparse matrix before changing it in place.
+        """
+        if format is None:
+            return self._sparseMatrix
+        return self._as_format(format)
+
+    def _has_sparse_matrix(self):
+        return scipy.sparse.issparse(self._sparseMatrix)
+
+    def _as_format(self, format, convert=True):
+        smat = self._sparseMatrix
+        if smat is None or smat.format == format:
+            return smat
+
+        # The cached conversion is valid only for the current sparse matrix object
+        if self._otherFormat is not None and self._otherFormat[0] is smat and self._otherFormat[1].format == format:
+            return self._otherFormat[1]
+
+        if not convert:
+            return smat
+
+        res = smat.asformat(format)
+        self._otherFormat = (smat, res)
+        return res
+
+    def row_names_index(self):
+        """Row names index. (A NameIndex object.)"""
         return self._rowNames
 
+    def row_names_dict(self):
+        """Row names to indices dictionary. (A read only view.)"""
+        return None if self._rowNames is None else self._rowNames.names_dict()
+
     def row_names(self):
         """Row names."""
-        if isinstance(self._rowNamesList, list):
-            return self._rowNamesList
-        elif isinstance(self._rowNames, dict):
-            self._rowNamesList = list(self._rowNames.keys())
-            return self._rowNamesList
-        else:
-            self._rowNamesList = self._rowNames
-            return self._rowNamesList
+        return None if self._rowNames is None else self._rowNames.names()
 
-    def column_names_dict(self):
-        """Column names to indices dictionary."""
+    def column_names_index(self):
+        """Column names index. (A NameIndex object.)"""
         return self._colNames
 
+    def column_names_dict(self):
+        """Column names to indices dictionary. (A read only view.)"""
+        return None if self._colNames is None else self._colNames.names_dict()
+
     def column_names(self):
         """Column names."""
-        if isinstance(self._colNamesList, list):
-            return self._colNamesList
-        elif isinstance(self._colNames, dict):
-            self._colNamesList = list(self._colNames.keys())
-            return self._colNamesList
-        else:
-            self._colNamesList = self._colNames
-            return self._colNames
+        return None if self._colNames is None else self._colNames.names()
 
     def dimension_names(self):
         """Dimension names."""
@@ -193,31 +417,57 @@ class SSparseMatrix:
     # ------------------------------------------------------------------
     # Copying
     # ------------------------------------------------------------------
+    # The row- and column names are immutable NameIndex objects -- the setters always
+    # make new ones. Hence, the names are shared between derived objects instead of being copied.
+    def _derive(self, matrix, transposed=False):
+        """Make a SSparseMatrix object with the given sparse matrix that shares the names of self.
+        If transposed is True then the row names and column names are swapped.
+        """
+        obj = SSparseMatrix(dtype=self._dtype)
+        obj._sparseMatrix = _cast(matrix, self._dtype)
+        if transposed:
+            obj._rowNames, obj._colNames = self._colNames, self._rowNames
+        else:
+            obj._rowNames, obj._colNames = self._rowNames, self._colNames
+        obj._dimNames = self._dimNames
+        return obj
+
     def copy(self):
-        """Deep copy."""
-        return pickle.loads(pickle.dumps(self, -1))
+        """Copy. The sparse matrix buffers are copied, the row and column names are shared."""
+        smat = self.sparse_matrix()
+        return self._derive(smat.copy() if scipy.sparse.issparse(smat) else smat)
+
+    def lazy(self):
+        """Make a LazySSparseMatrix object -- the operations with it are deferred until evaluation."""
+        from SSparseMatrix.LazySSparseMatrix import LazySSparseMatrix
+        return LazySSparseMatrix(self)
 
     def __copy__(self):
-        """Deep copy."""
-        return pickle.loads(pickle.dumps(self, -1))
+        """Copy. (Same as copy.)"""
+        return self.copy()
 
     def __deepcopy__(self, memodict={}):
-        """Deep copy."""
-        return pickle.loads(pickle.dumps(self, -1))
+        """Copy. (Same as copy.)"""
+        return self.copy()
 
     # ------------------------------------------------------------------
     # Setters
     # ------------------------------------------------------------------
     def set_sparse_matrix(self, arg, as_is=False):
-        """Set sparse matrix object. (In place operation.)"""
+        """Set sparse matrix object. (In place operation.)
+        CSR and CSC matrices are kept as they are, other sparse matrices are converted to CSR ones
+        unless as_is is True.
+        """
+        # The data of the given matrix might have been changed in place
+        self._otherFormat = None
         if scipy.sparse.issparse(arg):
-            if as_is:
-                self._sparseMatrix = arg
+            if as_is or arg.format in {"csr", "csc"}:
+                self._sparseMatrix = _as_dtype(arg, self._dtype)
             else:
-                self._sparseMatrix = arg.tocsr()
+                self._sparseMatrix = _as_dtype(arg.tocsr(), self._dtype)
             return self
         elif isinstance(arg, list) or isinstance(arg, numpy.ndarray):
-            smat2 = scipy.sparse.csr_matrix(arg)
+            smat2 = scipy.sparse.csr_matrix(arg, dtype=self._dtype)
             if scipy.sparse.issparse(smat2):
                 self._sparseMatrix = smat2
         else:
@@ -227,15 +477,15 @@ class SSparseMatrix:
 
     def set_row_names(self, *args):
         """Set row names. (In place operation.)"""
-        self._rowNamesList = None
         if len(args) == 0:
-            return self.set_row_names([str(x) for x in range(0, self.rows_count())])
+            self._rowNames = _default_names_index("", self.rows_count())
         elif isinstance(args[0], str):
-            return self.set_row_names([args[0] + str(x) for x in range(0, self.rows_count())])
-        elif isinstance(args[0], dict) and len(args[0]) == self.rows_count():
+            self._rowNames = _default_names_index(args[0], self.rows_count())
+        elif isinstance(args[0], NameIndex) and len(args[0]) == self.rows_count():
+            # Shared, not copied
             self._rowNames = args[0]
-        elif isinstance(args[0], list) and len(args[0]) == self.rows_count():
-            self._rowNames = dict(zip(args[0], range(0, len(args[0]))))
+        elif isinstance(args[0], (collections.abc.Mapping, list, tuple, numpy.ndarray)) and len(args[0]) == self.rows_count():
+            self._rowNames = NameIndex(args[0])
         else:
             raise TypeError(
                 """The first argument is expected to be a string-to-index dictionary of length %s, 
@@ -246,15 +496,15 @@ class SSparseMatrix:
 
     def set_column_names(self, *args):
         """Set column names. (In place operation.)"""
-        self._colNamesList = None
         if len(args) == 0:
-            return self.set_column_names([str(x) for x in range(0, self.columns_count())])
+            self._colNames = _default_names_index("", self.columns_count())
         elif isinstance(args[0], str):
-            return self.set_column_names([args[0] + str(x) for x in range(0, self.columns_count())])
-        elif isinstance(args[0], dict) and len(args[0]) == self.columns_count():
+            self._colNames = _default_names_index(args[0], self.columns_count())
+        elif isinstance(args[0], NameIndex) and len(args[0]) == self.columns_count():
+            # Shared, not copied
             self._colNames = args[0]
-        elif isinstance(args[0], list) and len(args[0]) == self.columns_count():
-            self._colNames = dict(zip(args[0], range(0, len(args[0]))))
+        elif isinstance(args[0], (collections.abc.Mapping, list, tuple, numpy.ndarray)) and len(args[0]) == self.columns_count():
+            self._colNames = NameIndex(args[0])
         else:
             raise TypeError(
                 """The first argument is expected to be a string-to-index dictionary of length %s,
@@ -277,6 +527,19 @@ class SSparseMatrix:
 
         return self
 
+    def set_dtype(self, dtype):
+        """Set the data type policy and cast the sparse matrix to it. (In place operation.)
+
+        :param dtype: A NumPy data type, e.g. numpy.float32 or bool, or None.
+        If None the results of the operations have the data types given by scipy.sparse.
+        """
+        self._dtype = _check_dtype(dtype)
+        smat = _as_dtype(self._sparseMatrix, self._dtype)
+        if smat is not self._sparseMatrix:
+            self._otherFormat = None
+            self._sparseMatrix = smat
+        return self
+
     # ------------------------------------------------------------------
     # Predicates
     # ------------------------------------------------------------------
@@ -284,65 +547,113 @@ class SSparseMatrix:
         """Is x appropriate as a key into a SSparseMatrix object? Returns True
         if it can be cast safely to a key.
         """
-        return is_str_like(x) and (x in self.row_names() or x in self.column_names())
+        return is_str_like(x) and (x in self._rowNames or x in self._colNames)
 
     def is_row_key_like(self, x):
         """Is x appropriate as a row key into a SSparseMatrix object? Returns True
         if it can be cast safely to a key.
         """
-        return is_str_like(x) and x in self.row_names()
+        return is_str_like(x) and x in self._rowNames
 
     def is_column_key_like(self, x):
         """Is x appropriate as a column key into a SSparseMatrix object? Returns True
         if it can be cast safely to a column key.
         """
-        return is_str_like(x) and x in self.column_names()
+        return is_str_like(x) and x in self._colNames
 
     # ------------------------------------------------------------------
     # Access
     # ------------------------------------------------------------------
     def _get_single_element(self, row, col):
-        if is_int_like(row) and is_int_like(col):
-            return self.sparse_matrix()[row, col]
-        elif row in self.row_names() and col in self.column_names():
-            return self.sparse_matrix()[self.row_names_dict()[row], self.column_names_dict()[col]]
-
-    def _get_submatrix(self, row_slice_arg, col_slice_arg):
-        row_slice = row_slice_arg
-        col_slice = col_slice_arg
-
-        if isinstance(row_slice, list) and is_str_like(row_slice[0]):
-            row_slice = [self.row_names_dict()[x] for x in row_slice]
+        if not is_int_like(row):
+            row = self._rowNames.positions([row], what="row names")[0]
+        if not is_int_like(col):
+            col = self._colNames.positions([col], what="column names")[0]
+        return self.sparse_matrix()[row, col]
+
+    @staticmethod
+    def _key_to_positions(key, names_index, axis_name):
+        """Convert an axis key into a slice or an integer array that can be used with scipy sparse matrices.
+
+        :param key: A slice, an integer, a name, a Boolean mask, or a list or an array of integers or names.
+        :param names_index: The names index of the axis.
+        :param axis_name: The name of the axis -- used in the error messages.
+        :return: A slice or a NumPy integer array.
+        """
+        if isinstance(key, slice):
+            return key
+        elif is_int_like(key):
+            return numpy.array([key], dtype=numpy.intp)
+        elif is_str_like(key):
+            key = [key]
+        elif not isinstance(key, (list, tuple, numpy.ndarray)):
+            raise IndexError("Invalid %s index." % axis_name)
+
+        if len(key) == 0:
+            return numpy.empty(0, dtype=numpy.intp)
+
+        arr = key if isinstance(key, numpy.ndarray) else None
+        if arr is None and isinstance(key[0], (bool, numpy.bool_)):
+            arr = numpy.asarray(key, dtype=bool)
+        elif arr is None and is_int_like(key[0]):
+            arr = numpy.asarray(key)
+
+        if arr is not None and arr.dtype == bool:
+            # Boolean mask
+            if len(arr) != len(names_index):
+                raise IndexError("The Boolean %s mask is expected to have length %d." % (axis_name, len(names_index)))
+            positions = numpy.flatnonzero(arr)
+        elif arr is not None and numpy.issubdtype(arr.dtype, numpy.integer):
+            positions = arr.astype(numpy.intp, copy=False)
+        else:
+            # Names
+            positions = names_index.positions(key, what=axis_name + " names")
 
-        if isinstance(col_slice, list) and is_str_like(col_slice[0]):
-            col_slice = [self.column_names_dict()[x] for x in col_slice]
+        # Contiguous ranges are faster to slice with
+        if len(positions) > 1 and positions[-1] - positions[0] == len(positions) - 1 and \
+                positions[0] >= 0 and numpy.all(numpy.diff(positions) == 1):
+            return slice(int(positions[0]), int(positions[-1]) + 1)
 
-        res = SSparseMatrix(self.sparse_matrix()[row_slice, col_slice])
+        return positions
 
-        if isinstance(row_slice, list):
-            res.set_row_names([self.row_names()[x] for x in row_slice])
+    def _get_submatrix(self, row_slice_arg, col_slice_arg):
+        row_slice = self._key_to_positions(row_slice_arg, self._rowNames, "row")
+        col_slice = self._key_to_positions(col_slice_arg, self._colNames, "column")
+
+        # Row selection is faster with CSR matrices, column selection is faster with CSC matrices
+        all_rows = isinstance(row_slice, slice) and row_slice == slice(None)
+        all_cols = isinstance(col_slice, slice) and col_slice == slice(None)
+        if all_rows and not all_cols:
+            smat = self._as_format("csc")[:, col_slice]
+        elif all_cols and not all_rows:
+            smat = self._as_format("csr")[row_slice, :]
+        elif isinstance(row_slice, slice) or isinstance(col_slice, slice):
+            smat = self.sparse_matrix()[row_slice, col_slice]
+        elif self.sparse_matrix().format == "csc":
+            # Using both index arrays in one indexing operation is element-wise (not outer) in scipy.sparse
+            smat = self.sparse_matrix()[:, col_slice][row_slice, :]
         else:
-            res.set_row_names(self.row_names()[row_slice])
+            smat = self._as_format("csr")[row_slice, :][:, col_slice]
 
-        if isinstance(col_slice, list):
-            res.set_column_names([self.column_names()[x] for x in col_slice])
-        else:
-            res.set_column_names(self.column_names()[col_slice])
+        res = SSparseMatrix(smat, dtype=self._dtype)
+        res.set_row_names(self._rowNames.take(row_slice))
+        res.set_column_names(self._colNames.take(col_slice))
         return res
 
     def __getitem__(self, key):
         if isinstance(key, tuple):
+            if len(key) != 2:
+                raise IndexError("Invalid index: a row key and a column key are expected.")
+
             row = key[0]
             col = key[1]
 
-            if is_int_like(row) and is_int_like(col) or \
-                    is_str_like(row) and is_str_like(col):
+            if (is_int_like(row) or is_str_like(row)) and (is_int_like(col) or is_str_like(col)):
                 return self._get_single_element(row, col)
-            elif isinstance(row, slice) or isinstance(col, slice) or \
-                    isinstance(row, list) or isinstance(col, list):
+            else:
                 return self._get_submatrix(row, col)
 
-        elif is_int_like(key):
+        elif is_int_like(key) or is_str_like(key) or isinstance(key, (list, numpy.ndarray, slice)):
             return self[key, :]
         else:
             raise IndexError("invalid index")
@@ -374,8 +685,8 @@ class SSparseMatrix:
                 res = res.nnz == 0
 
             return res and \
-                   self.row_names() == other.row_names() and \
-                   self.column_names() == other.column_names()
+                   self._rowNames == other._rowNames and \
+                   self._colNames == other._colNames
         else:
             return False
 
@@ -383,29 +694,39 @@ class SSparseMatrix:
     # Transpose
     # ------------------------------------------------------------------
     def transpose(self, copy=True):
-        """Transpose."""
-        obj = self.copy() if copy else self
-        obj._sparseMatrix = obj.sparse_matrix().transpose()
-        t = obj.column_names()
-        obj.set_column_names(obj.row_names())
-        obj.set_row_names(t)
+        """Transpose.
+        If copy is True a new object is made that shares the sparse matrix buffers and the names of self.
+        """
+        smat = self.sparse_matrix().transpose()
+
+        # The transpose of the cached conversion is a conversion of the transpose (no copying is done)
+        otherFormat = None
+        if self._otherFormat is not None and self._otherFormat[0] is self._sparseMatrix:
+            otherFormat = (smat, self._otherFormat[1].transpose())
+
+        obj = self._derive(smat, transposed=True) if copy else self
+        if not copy:
+            obj._sparseMatrix = smat
+            obj._rowNames, obj._colNames = self._colNames, self._rowNames
+        obj._otherFormat = otherFormat
         return obj
 
     # ------------------------------------------------------------------
     # Conjugate transpose
     # ------------------------------------------------------------------
     def conjugate(self, copy=True):
-        """Conjugate elementwise."""
-        obj = self.copy() if copy else self
-        obj._sparseMatrix = obj.sparse_matrix().conj()
-        return obj
+        """Conjugate elementwise.
+        (For real matrices the result shares the sparse matrix buffers with self.)"""
+        smat = self.sparse_matrix().conj(copy=False)
+        if copy:
+            return self._derive(smat)
+
+        self._sparseMatrix = _cast(smat, self._dtype)
+        return self
 
     def conjugate_transpose(self, copy=True):
         """Conjugate transpose."""
-        obj = self.copy() if copy else self
-        obj.conjugate(copy=False)
-        obj.transpose(copy=False)
-        return obj
+        return self.conjugate(copy=copy).transpose(copy=False)
 
     # ------------------------------------------------------------------
     # Add
@@ -413,17 +734,21 @@ class SSparseMatrix:
     def add(self, other, copy=True):
         """Element-wise addition with another SSparseMatrix object,
          or a scipy sparse matrix, or a scalar."""
-        obj = self.copy() if copy else self
         if isinstance(other, SSparseMatrix) and \
-                obj.row_names() == other.row_names() and \
-                obj.column_names() == other.column_names():
-            obj._sparseMatrix = obj.sparse_matrix() + other.sparse_matrix()
-        elif scipy.sparse.issparse(other):
-            obj._sparseMatrix = obj.sparse_matrix() + other
-        else:
+                self._rowNames == other._rowNames and \
+                self._colNames == other._colNames:
+            other = other._as_format(self.sparse_matrix().format)
+        elif not scipy.sparse.issparse(other):
             raise TypeError("The first argument is expected to be SSparseMatrix object or sparse.csr_matrix object.")
 
-        return obj
+        smat = _as_counts(self.sparse_matrix(), other.dtype)
+        smat = smat + _as_counts(other, smat.dtype)
+
+        if copy:
+            return self._derive(smat)
+
+        self._sparseMatrix = _cast(smat, self._dtype)
+        return self
 
     # ------------------------------------------------------------------
     # Multiply
@@ -431,24 +756,50 @@ class SSparseMatrix:
     def multiply(self, other, copy=True):
         """Element-wise multiplication with another SSparseMatrix object,
          or a scipy sparse matrix, or a scalar."""
-        obj = self.copy() if copy else self
         if isinstance(other, SSparseMatrix) and \
-                obj.row_names() == other.row_names() and \
-                obj.column_names() == other.column_names():
-            obj._sparseMatrix = obj.sparse_matrix().multiply(other.sparse_matrix())
-        elif scipy.sparse.issparse(other) or _is_num_like(other):
-            obj._sparseMatrix = obj.sparse_matrix().multiply(other)
+                self._rowNames == other._rowNames and \
+                self._colNames == other._colNames:
+            other = other._as_format(self.sparse_matrix().format)
+            smat = _as_counts(self.sparse_matrix(), other.dtype)
+            smat = smat.multiply(_as_counts(other, smat.dtype))
+        elif scipy.sparse.issparse(other):
+            smat = _as_counts(self.sparse_matrix(), other.dtype)
+            smat = smat.multiply(_as_counts(other, smat.dtype))
+        elif _is_num_like(other):
+            smat = _as_counts(self.sparse_matrix(), other).multiply(other)
         else:
             raise TypeError("The first argument is expected to be SSparseMatrix object or sparse.csr_matrix object.")
 
-        return obj
+        if copy:
+            return self._derive(smat)
+
+        self._sparseMatrix = _cast(smat, self._dtype)
+        return self
 
     # ------------------------------------------------------------------
     # Unitize
     # ------------------------------------------------------------------
-    def unitize(self):
-        """Make all non-zero elements 1. (In place operation.)"""
-        self.set_sparse_matrix(self.sparse_matrix().astype(bool).astype(float))
+    def unitize(self, dtype=None):
+        """Make all non-zero elements 1. (In place operation.)
+
+        :param dtype: The data type of the result. If None the data type policy is used;
+        if there is no data type policy, floating point matrices keep their data type and
+        the other matrices are converted into float64 ones. Use bool for compact incidence matrices.
+        """
+        smat = self.sparse_matrix()
+        if dtype is None:
+            dtype = self._dtype
+        if dtype is None:
+            dtype = smat.dtype if numpy.issubdtype(smat.dtype, numpy.floating) else numpy.float64
+
+        if smat.format in {"csr", "csc", "coo"}:
+            res = smat.astype(dtype)
+            res.data[:] = smat.data != 0
+        else:
+            res = smat.astype(bool).astype(dtype)
+
+        self._otherFormat = None
+        self._sparseMatrix = res
         return self
 
     # ------------------------------------------------------------------
@@ -456,121 +807,184 @@ class SSparseMatrix:
     # ------------------------------------------------------------------
     def clip(self, v_min, v_max, copy=True):
         """Clip the values in a SSparseMatrix object."""
-        smat = self.sparse_matrix()
+        # The sparse matrix buffers might be shared with other objects, hence, they are not changed in place.
+        smat = self.sparse_matrix().copy()
 
-        smat.data *= smat.data >= v_min
-        smat.data *= smat.data <= v_max
+        smat.data *= (smat.data >= v_min) & (smat.data <= v_max)
         smat.eliminate_zeros()
 
         if copy:
-            return SSparseMatrix(smat, row_names=self.row_names(), column_names=self.column_names())
+            return self._derive(smat)
         else:
             return self.set_sparse_matrix(smat)
 
     # ------------------------------------------------------------------
     # Dot
     # ------------------------------------------------------------------
-    def dot(self, other, copy=True):
+    def _dot(self, other, backend, n_threads):
+        # The scipy backend uses the stored format, the other backends use the (cached) CSR form
+        if (get_dot_backend() if backend is None else backend) == "scipy":
+            smat = self.sparse_matrix()
+        else:
+            smat = self._as_format("csr")
+
+        if self._dtype is not None and self._dtype != bool:
+            # Otherwise scipy would convert self into the common data type
+            other = other.astype(self._dtype, copy=False)
+        else:
+            # Products with incidence matrices are counts, not Boolean values
+            smat = _as_counts(smat, other.dtype)
+
+        return _cast(sparse_dot(smat, other, backend=backend, n_threads=n_threads), self._dtype)
+
+    def dot(self, other, copy=True, backend=None, n_threads=None):
         """Dot product with another object that is a SSparseMatrix object, or scipy sparse matrix,
-        or a list, or a numpy array."""
+        or a list, or a numpy array.
+
+        :type backend: str|None
+        :param backend: One of "scipy", "threads", or "numpy". If None the default backend is used.
+        (See set_dot_backend.)
+
+        :type n_threads: int|None
+        :param n_threads: Number of threads of the "threads" backend.
+        """
         # I am not sure should we check that : self.column_names() == other.row_names()
         # It might be too restrictive.
         # obj = self.copy() if copy else self
-        obj = SSparseMatrix() if copy else self
+        from SSparseMatrix.ChunkedSSparseMatrix import ChunkedSSparseMatrix
+        if isinstance(other, ChunkedSSparseMatrix):
+            # The product is done block by block
+            return other.left_dot(self)
+
+        obj = self._derive(None) if copy else self
         if is_s_sparse_matrix(other):
-            obj._sparseMatrix = self.sparse_matrix().dot(other.sparse_matrix())
+            obj._sparseMatrix = self._dot(other.sparse_matrix(), backend, n_threads)
             obj._sparseMatrix.eliminate_zeros()
-            # We keep the row names i.e. self.rowNames = self.row_names_dict()
-            obj.set_column_names(other.column_names_dict())
-            obj.set_row_names(self.row_names_dict())
+            # We keep the row names and share the column names of other
+            obj._colNames = other._colNames
         elif scipy.sparse.issparse(other):
-            obj._sparseMatrix = self.sparse_matrix().dot(other)
+            obj._sparseMatrix = self._dot(other, backend, n_threads)
             obj._sparseMatrix.eliminate_zeros()
             obj.set_column_names()
-            obj.set_row_names(self.row_names_dict())
         elif isinstance(other, list):
-            vec = self.sparse_matrix().dot(other)
+            vec = self._dot(numpy.asarray(other), backend, n_threads)
             rowInds = [x for x in range(self.rows_count())]
             colInds = [0 for x in range(self.rows_count())]
             res = scipy.sparse.coo_matrix((vec, (rowInds, colInds)), shape=(self.rows_count(), 1))
             res.eliminate_zeros()
             obj.set_sparse_matrix(res)
             obj.set_column_names()
-            obj.set_row_names(self.row_names_dict())
         elif isinstance(other, numpy.ndarray):
             if len(other.shape) == 1:
                 vec = scipy.sparse.csr_matrix([other, ]).transpose()
             else:
                 vec = scipy.sparse.csr_matrix(other)
-            obj = self.dot(vec)
+            obj = self.dot(vec, copy=copy, backend=backend, n_threads=n_threads)
         else:
             raise TypeError("The first argument is expected to be SSparseMatrix object or sparse.csr_matrix object.")
 
         return obj
 
+    # ------------------------------------------------------------------
+    # Reductions
+    # ------------------------------------------------------------------
+    # The reductions give NumPy arrays; the "_dict" methods give dictionaries of names to values,
+    # and the "_series" methods give pandas series with the names as index. (Requires pandas.)
+    def _row_series(self, values):
+        return _require_pandas().Series(values, index=self._rowNames.array())
+
+    def _column_series(self, values):
+        return _require_pandas().Series(values, index=self._colNames.array())
+
     # ------------------------------------------------------------------
     # Maximums
     # ------------------------------------------------------------------
     def row_maximums(self):
-        """Give the row maximums"""
-        return self.sparse_matrix().max(axis=1).todense().flatten().tolist()[0]
+        """Give the row maximums. (A NumPy array.)"""
+        return self._as_format("csr").max(axis=1).toarray().ravel()
 
     def row_maximums_dict(self):
         """Give a dictionary of the row-names to row-maximums."""
-        return dict(zip(self.row_names(), self.row_maximums()))
+        return dict(zip(self.row_names(), self.row_maximums().tolist()))
+
+    def row_maximums_series(self):
+        """Give a pandas series of the row-maximums with the row-names as index."""
+        return self._row_series(self.row_maximums())
 
     def column_maximums(self):
-        """Give the column maximums."""
-        return self.sparse_matrix().max(axis=0).todense().flatten().tolist()[0]
+        """Give the column maximums. (A NumPy array.)"""
+        return self._as_format("csc").max(axis=0).toarray().ravel()
 
     def column_maximums_dict(self):
         """Give a dictionary of the column-names to column-maximums."""
-        return dict(zip(self.column_names(), self.column_maximums()))
+        return dict(zip(self.column_names(), self.column_maximums().tolist()))
+
+    def column_maximums_series(self):
+        """Give a pandas series of the column-maximums with the column-names as index."""
+        return self._column_series(self.column_maximums())
 
     # ------------------------------------------------------------------
     # Minimums
     # ------------------------------------------------------------------
     def row_minimums(self):
-        """Give the row minimums"""
-        return self.sparse_matrix().min(axis=1).todense().flatten().tolist()[0]
+        """Give the row minimums. (A NumPy array.)"""
+        return self._as_format("csr").min(axis=1).toarray().ravel()
 
     def row_minimums_dict(self):
         """Give a dictionary of the row-names to row-minimums."""
-        return dict(zip(self.row_names(), self.row_minimums()))
+        return dict(zip(self.row_names(), self.row_minimums().tolist()))
+
+    def row_minimums_series(self):
+        """Give a pandas series of the row-minimums with the row-names as index."""
+        return self._row_series(self.row_minimums())
 
     def column_minimums(self):
-        """Give the column minimums."""
-        return self.sparse_matrix().min(axis=0).todense().flatten().tolist()[0]
+        """Give the column minimums. (A NumPy array.)"""
+        return self._as_format("csc").min(axis=0).toarray().ravel()
 
     def column_minimums_dict(self):
         """Give a dictionary of the column-names to column-mins."""
-        return dict(zip(self.column_names(), self.column_minimums()))
+        return dict(zip(self.column_names(), self.column_minimums().tolist()))
+
+    def column_minimums_series(self):
+        """Give a pandas series of the column-minimums with the column-names as index."""
+        return self._column_series(self.column_minimums())
 
     # ------------------------------------------------------------------
     # Summation
     # ------------------------------------------------------------------
     def row_sums(self):
-        """Give the row sums"""
-        return self.sparse_matrix().sum(axis=1).flatten().tolist()[0]
+        """Give the row sums. (A NumPy array.)"""
+        # Sums along either axis are fast with both CSR and CSC -- a cached conversion is used if present
+        return _sums(self._as_format("csr", convert=False), 1)
 
     def row_sums_dict(self):
         """Give a dictionary of the row-names to row-sums."""
-        return dict(zip(self.row_names(), self.row_sums()))
+        return dict(zip(self.row_names(), self.row_sums().tolist()))
+
+    def row_sums_series(self):
+        """Give a pandas series of the row-sums with the row-names as index."""
+        return self._row_series(self.row_sums())
 
     def column_sums(self):
-        """Give the column sums."""
-        return self.sparse_matrix().sum(axis=0).flatten().tolist()[0]
+        """Give the column sums. (A NumPy array.)"""
+        return _sums(self._as_format("csc", convert=False), 0)
 
     def column_sums_dict(self):
         """Give a dictionary of the column-names to column-sums."""
-        return dict(zip(self.column_names(), self.column_sums()))
+        return dict(zip(self.column_names(), self.column_sums().tolist()))
+
+    def column_sums_series(self):
+        """Give a pandas series of the column-sums with the column-names as index."""
+        return self._column_series(self.column_sums())
 
     # ------------------------------------------------------------------
     # Impose row names
     # ------------------------------------------------------------------
     def impose_row_names(self, names):
         """Impose row names. (New SSparseMatrix object is created.)"""
-        obj = self.copy()
+        # No copying is needed -- both row binding and slicing make new objects.
+        obj = self
 
         if not isinstance(names, list):
             raise TypeError("The first argument is expected to be a list of strings.")
@@ -580,10 +994,12 @@ class SSparseMatrix:
 
         if nMissingRows > 0:
             # Rows are missing in the matrix
-            complMat = scipy.sparse.coo_matrix((numpy.array([0]), (numpy.array([0]), numpy.array([0]))),
+            # Of the same data type, hence, binding does not change the data type
+            complMat = scipy.sparse.coo_matrix((numpy.array([0], dtype=obj.sparse_matrix().dtype),
+                                                (numpy.array([0]), numpy.array([0]))),
                                                shape=(nMissingRows, obj.columns_count()))
 
-            complMat = SSparseMatrix(complMat)
+            complMat = SSparseMatrix(complMat, dtype=obj._dtype)
             complMat.set_row_names(missingRows)
             complMat.set_column_names(obj.column_names())
 
@@ -596,42 +1012,36 @@ class SSparseMatrix:
     # ------------------------------------------------------------------
     def impose_column_names(self, names):
         """Impose column names. (New SSparseMatrix object is created.)"""
-        if isinstance(names, list):
-            return self.transpose().impose_row_names(names).transpose(copy=False)
-        else:
-            raise TypeError("The first argument is expected to be a list of strings.")
+        # No copying is needed -- both column binding and slicing make new objects.
+        obj = self
 
-    # ------------------------------------------------------------------
-    # Row binding
-    # ------------------------------------------------------------------
-    def row_bind(self, other):
-        """Row binding with another SSparseMatrix object."""
-        if is_s_sparse_matrix(other):
+        if not isinstance(names, list):
+            raise TypeError("The first argument is expected to be a list of strings.")
 
-            if not (sorted(self.column_names()) == sorted(other.column_names())):
-                raise TypeError("The column names of the two SSparseMatrix objects are expected to be the same.")
+        missingColumns = list(set(names) - set(obj.column_names()))
+        nMissingColumns = len(missingColumns)
 
-            if self.column_names() == other.column_names():
-                res = SSparseMatrix(scipy.sparse.vstack([self.sparse_matrix(), other.sparse_matrix()]))
-            else:
-                mat = scipy.sparse.vstack([self.sparse_matrix(), other[:, self.column_names()].sparse_matrix()])
-                res = SSparseMatrix(mat)
+        if nMissingColumns > 0:
+            # Columns are missing in the matrix
+            complMat = scipy.sparse.csc_matrix((obj.rows_count(), nMissingColumns), dtype=obj.sparse_matrix().dtype)
 
-            # Set the column names
-            res.set_column_names(self.column_names())
+            complMat = SSparseMatrix(complMat, dtype=obj._dtype)
+            complMat.set_row_names(obj._rowNames)
+            complMat.set_column_names(missingColumns)
 
-            # Special handling of duplication of row names in the result.
-            # rn_dict = self.row_names_dict() | other.row_names_dict() # this is Version 3.9+ only
-            rn_dict = {**self.row_names_dict(), **other.row_names_dict()}
-            if len(rn_dict) == (self.rows_count() + other.rows_count()):
-                res.set_row_names(self.row_names() + other.row_names())
-            else:
-                res.set_row_names([x + ".1" for x in self.row_names()] + [x + ".2" for x in other.row_names()])
+            obj = obj.column_bind(complMat)
 
-            return res
+        return obj[:, names]
 
-        else:
-            raise TypeError("The first argument is expected to be a SSparseMatrix object.")
+    # ------------------------------------------------------------------
+    # Row binding
+    # ------------------------------------------------------------------
+    def row_bind(self, other):
+        """Row binding with another SSparseMatrix object or a list of SSparseMatrix objects."""
+        others = other if isinstance(other, list) else [other]
+        if not all([is_s_sparse_matrix(x) for x in others]):
+            raise TypeError("The first argument is expected to be a SSparseMatrix object or a list of SSparseMatrix objects.")
+        return _bind([self] + others, axis=0)
 
     # ------------------------------------------------------------------
     # Column binding
@@ -639,108 +1049,199 @@ class SSparseMatrix:
     # Although there is an "easy" implementation using transposed matrices
     # it is considered potentially too slow.
     def column_bind(self, other):
-        """Column binding with another SSparseMatrix object."""
-        if is_s_sparse_matrix(other):
-
-            if not (sorted(self.row_names()) == sorted(other.row_names())):
-                raise TypeError("The row names of the two SSparseMatrix objects are expected to be the same.")
-
-            if self.row_names() == other.row_names():
-                res = SSparseMatrix(scipy.sparse.hstack([self.sparse_matrix(), other.sparse_matrix()]))
-            else:
-                mat = scipy.sparse.hstack([self.sparse_matrix(), other[self.row_names(), :].sparse_matrix()])
-                res = SSparseMatrix(mat)
-
-            # Set the row names
-            res.set_row_names(self.row_names())
-
-            # Special handling of duplication of row names in the result.
-            # cn_dict = self.column_names_dict() | other.column_names_dict() # this is version 3.9+ only
-            cn_dict = {**self.column_names_dict(), **other.column_names_dict()}
-            if len(cn_dict) == (self.columns_count() + other.columns_count()):
-                res.set_column_names(self.column_names() + other.column_names())
-            else:
-                res.set_column_names([x + ".1" for x in self.column_names()] + [x + ".2" for x in other.column_names()])
-
-            return res
-
-        else:
-            raise TypeError("The first argument is expected to be a SSparseMatrix object.")
+        """Column binding with another SSparseMatrix object or a list of SSparseMatrix objects."""
+        others = other if isinstance(other, list) else [other]
+        if not all([is_s_sparse_matrix(x) for x in others]):
+            raise TypeError("The first argument is expected to be a SSparseMatrix object or a list of SSparseMatrix objects.")
+        return _bind([self] + others, axis=1)
 
     # ------------------------------------------------------------------
     # Triplets
     # ------------------------------------------------------------------
     def triplets(self):
         """Give a list of triplets (row, column, value) of the SSparseMatrix object."""
-        A = self.sparse_matrix().tocoo()
-        return list(zip([self.row_names()[i] for i in A.row],
-                        [self.column_names()[i] for i in A.col],
+        # The triplets are ordered by rows
+        A = self._as_format("csr").tocoo()
+        return list(zip(self._rowNames.array()[A.row].tolist(),
+                        self._colNames.array()[A.col].tolist(),
                         A.data))
 
     # ------------------------------------------------------------------
     # Row dictionaries
     # ------------------------------------------------------------------
-    def row_dictionaries(self, sort=False):
-        """Row dictionaries."""
-        triplets = self.triplets()
-        triplets.sort(key=lambda x: x[0])
-        rowGroups = dict([(key, dict([(col, v) for (_, col, v) in value]))
-                          for key, value in itertools.groupby(triplets, lambda x: x[0])])
-        if sort:
-            rowGroups = dict([(k, _reverse_sort_dict(v)) for (k, v) in rowGroups.items()])
-        return rowGroups
-
-    def rows_dict(self, sort=False):
+    def iter_row_dictionaries(self, sort=False, top_k=None):
+        """Iterate over the row dictionaries. Gives pairs (row name, {column name: value})
+        for the rows that have non-zero elements. (The rows are in the matrix order.)
+
+        :type sort: bool
+        :param sort: Should the dictionaries be sorted in descending order of the values or not?
+
+        :type top_k: int|None
+        :param top_k: If an integer, only the top_k largest elements of each row are given.
+
+        The dictionaries are made directly from the CSR arrays, row by row; no triplets are made.
+        """
+        if not (top_k is None or is_int_like(top_k) and top_k > 0):
+            raise TypeError("The argument top_k is expected to be a positive integer or None.")
+
+        smat = self._as_format("csr")
+        indptr, indices, data = smat.indptr, smat.indices, smat.data
+        rowNames = self._rowNames.array()
+        colNames = self._colNames.array()
+
+        for i in numpy.flatnonzero(numpy.diff(indptr)):
+            inds = indices[indptr[i]:indptr[i + 1]]
+            vals = data[indptr[i]:indptr[i + 1]]
+
+            if top_k is not None and len(vals) > top_k:
+                pos = numpy.argpartition(-vals, top_k - 1)[:top_k]
+                if not sort:
+                    # Keep the column order
+                    pos.sort()
+                inds, vals = inds[pos], vals[pos]
+
+            if sort:
+                pos = numpy.argsort(-vals, kind="stable")
+                inds, vals = inds[pos], vals[pos]
+
+            yield rowNames[i], dict(zip(colNames[inds].tolist(), vals.tolist()))
+
+    def row_dictionaries(self, sort=False, top_k=None):
+        """Row dictionaries. (See iter_row_dictionaries.)"""
+        return dict(self.iter_row_dictionaries(sort=sort, top_k=top_k))
+
+    def rows_dict(self, sort=False, top_k=None):
         """Row dictionaries. (Synonym of row_dictionaries.)"""
-        return self.row_dictionaries(sort=sort)
+        return self.row_dictionaries(sort=sort, top_k=top_k)
 
     # ------------------------------------------------------------------
     # Column dictionaries
     # ------------------------------------------------------------------
-    def column_dictionaries(self, sort=False):
-        """Column dictionaries."""
-        # Could be done directly if some performance issues come up...
-        return self.transpose().row_dictionaries(sort=sort)
+    def iter_column_dictionaries(self, sort=False, top_k=None):
+        """Iterate over the column dictionaries. Gives pairs (column name, {row name: value})
+        for the columns that have non-zero elements. (See iter_row_dictionaries.)"""
+        # The transpose of the CSC matrix is a CSR matrix with the same arrays
+        return self._derive(self._as_format("csc").transpose(), transposed=True) \
+            .iter_row_dictionaries(sort=sort, top_k=top_k)
 
-    def cols_dict(self, sort=False):
+    def column_dictionaries(self, sort=False, top_k=None):
+        """Column dictionaries. (See iter_column_dictionaries.)"""
+        return dict(self.iter_column_dictionaries(sort=sort, top_k=top_k))
+
+    def cols_dict(self, sort=False, top_k=None):
         """Column dictionaries. (Synonym of column_dictionaries.)"""
-        return self.column_dictionaries(sort=sort)
+        return self.column_dictionaries(sort=sort, top_k=top_k)
+
+    # ------------------------------------------------------------------
+    # Top-k per row
+    # ------------------------------------------------------------------
+    def row_top_k(self, k, as_arrays=False):
+        """Keep the k largest elements of each row.
+
+        :type k: int
+        :param k: Number of elements per row.
+
+        :type as_arrays: bool
+        :param as_arrays: Should the result be arrays or a SSparseMatrix object?
+
+        :return: If as_arrays is False, a new SSparseMatrix object with the same row and column names.
+        If as_arrays is True, a tuple of NumPy arrays (row names, column names, values) that is
+        ordered by rows, and within each row, by the values in descending order.
+        """
+        if not (is_int_like(k) and k > 0):
+            raise TypeError("The first argument is expected to be a positive integer.")
+
+        smat = self._as_format("csr")
+        if not smat.has_canonical_format:
+            smat = smat.copy()
+            smat.sum_duplicates()
+
+        pos = _segments_top_k(smat.indptr, smat.data, k)
+        indptr = numpy.zeros(len(smat.indptr), dtype=smat.indptr.dtype)
+        numpy.cumsum(numpy.minimum(numpy.diff(smat.indptr), k), out=indptr[1:])
+
+        if as_arrays:
+            rows = numpy.repeat(numpy.arange(smat.shape[0]), numpy.diff(indptr))
+            cols, vals = smat.indices[pos], smat.data[pos]
+            order = numpy.lexsort((-vals, rows))
+            return self._rowNames.array()[rows[order]], self._colNames.array()[cols[order]], vals[order]
+
+        res = scipy.sparse.csr_matrix((smat.data[pos], smat.indices[pos], indptr), shape=smat.shape)
+        return self._derive(res)
+
+    # ------------------------------------------------------------------
+    # Top-k per column
+    # ------------------------------------------------------------------
+    def column_top_k(self, k, as_arrays=False):
+        """Keep the k largest elements of each column.
+
+        :return: If as_arrays is False, a new SSparseMatrix object with the same row and column names.
+        If as_arrays is True, a tuple of NumPy arrays (column names, row names, values) that is
+        ordered by columns, and within each column, by the values in descending order.
+        """
+        # The transpose of the CSC matrix is a CSR matrix with the same arrays
+        res = self._derive(self._as_format("csc").transpose(), transposed=True).row_top_k(k, as_arrays=as_arrays)
+        return res if as_arrays else res.transpose(copy=False)
 
     # ------------------------------------------------------------------
     # Representation
     # ------------------------------------------------------------------
+    def _stored_elements(self, positions):
+        """Row indices, column indices, and values of the stored elements at the given positions
+        (in the storage order.) Only the given elements are touched."""
+        smat = self.sparse_matrix()
+        if smat.format in {"csr", "csc"}:
+            major = numpy.searchsorted(smat.indptr, positions, side="right") - 1
+            minor = smat.indices[positions]
+            rows, cols = (major, minor) if smat.format == "csr" else (minor, major)
+            return rows, cols, smat.data[positions]
+        A = smat.tocoo()
+        return A.row[positions], A.col[positions], A.data[positions]
+
     def __str__(self):
         """String form of SSparseMatrix object that resembles that of scipy sparse matrices."""
-        maxprint = self.sparse_matrix().getmaxprint()
+        smat = self.sparse_matrix()
+        maxprint = smat.getmaxprint()
+        nnz = smat.nnz
 
-        A = self.sparse_matrix().tocoo()
-        A2 = ([self.row_names()[i] for i in A.row],
-              [self.column_names()[i] for i in A.col],
-              A.data)
+        # Only the printed elements are taken, and only their names are looked up
+        if nnz > maxprint:
+            half = maxprint // 2
+            positions = numpy.concatenate([numpy.arange(half), numpy.arange(nnz - (maxprint - half), nnz)])
+        else:
+            positions = numpy.arange(nnz)
+
+        rows, cols, data = self._stored_elements(positions)
+        rowNames = rows.tolist() if self._rowNames is None else self._rowNames[rows].tolist()
+        colNames = cols.tolist() if self._colNames is None else self._colNames[cols].tolist()
 
         # Helper function to output "(i,j)  v"
         def to_str(row, col, data):
             triples = zip(list(zip(row, col)), data)
             return '\n'.join([('  %s\t%s' % t) for t in triples])
 
-        if self.sparse_matrix().nnz > maxprint:
+        if nnz > maxprint:
             half = maxprint // 2
-            out = to_str(A2[0][:half], A2[1][:half], A2[2][:half])
+            out = to_str(rowNames[:half], colNames[:half], data[:half])
             out += "\n  :\t:\n"
-            half = maxprint - maxprint // 2
-            out += to_str(A2[0][-half:], A2[1][-half:], A2[2][-half:])
+            out += to_str(rowNames[half:], colNames[half:], data[half:])
         else:
-            out = to_str(A2[0], A2[1], A2[2])
+            out = to_str(rowNames, colNames, data)
 
         return out
 
+    _format_names = {"bsr": "Block Sparse Row", "coo": "COOrdinate", "csc": "Compressed Sparse Column",
+                     "csr": "Compressed Sparse Row", "dia": "DIAgonal", "dok": "Dictionary Of Keys",
+                     "lil": "List of Lists"}
+
     def __repr__(self):
         """Representation of SSparseMatrix object."""
-        tsize = self.sparse_matrix().shape[0] * self.sparse_matrix().shape[1]
-        res = repr(self.sparse_matrix())
-        res = res.replace("sparse matrix", "SSparseMatrix (sparse matrix with named rows and columns)")
-        res = res.replace("format>", "format, and fill-in " + str(self.sparse_matrix().nnz / tsize) + ">")
-        return res
+        smat = self.sparse_matrix()
+        tsize = smat.shape[0] * smat.shape[1]
+        return "<%s SSparseMatrix (sparse matrix with named rows and columns) of dtype '%s'\n" \
+               "\twith %d stored elements and shape %s, and fill-in %s>" % \
+            (self._format_names.get(smat.format, smat.format), smat.dtype, smat.nnz, smat.shape,
+             smat.nnz / tsize if tsize > 0 else 0)
 
     # ------------------------------------------------------------------
     # To dictionary form
@@ -789,6 +1290,143 @@ class SSparseMatrix:
         self.set_column_names(arg["columnNames"])
         return self
 
+    # ------------------------------------------------------------------
+    # To binary file
+    # ------------------------------------------------------------------
+    def to_file(self, file_name):
+        """Write to a binary file.
+
+        The file has the CSR (or CSC) arrays indptr, indices, and data,
+        and the row and column names tables. The arrays are written raw and aligned,
+        hence, the file can be memory mapped when read with from_file.
+        """
+        smat = self.sparse_matrix()
+        if smat.format not in {"csr", "csc"}:
+            smat = smat.tocsr()
+
+        # Canonical format is required -- memory mapped matrices cannot be sorted in place
+        if not smat.has_canonical_format:
+            smat = smat.copy()
+            smat.sum_duplicates()
+
+        # Use the index type scipy would use, so no conversion is needed when reading
+        idx_dtype = numpy.int32 if max(smat.nnz, max(smat.shape)) < numpy.iinfo(numpy.int32).max else numpy.int64
+
+        arrays = {"indptr": smat.indptr.astype(idx_dtype, copy=False),
+                  "indices": smat.indices.astype(idx_dtype, copy=False),
+                  "data": smat.data,
+                  "rowNames": encode_names(self.row_names()),
+                  "columnNames": encode_names(self.column_names())}
+
+        meta = {"format": smat.format,
+                "shape": list(smat.shape),
+                "dimensionNames": None if self._dimNames is None else self.dimension_names()}
+
+        write_binary_container(file_name, arrays, meta)
+        return self
+
+    # ------------------------------------------------------------------
+    # From binary file
+    # ------------------------------------------------------------------
+    def from_file(self, file_name, mmap_mode="r"):
+        """Read from a binary file made with to_file.
+
+        :type file_name: str
+        :param file_name: File name.
+
+        :type mmap_mode: str|None
+        :param mmap_mode: Memory mapping mode of the sparse matrix arrays, one of "r", "r+", "c", or None.
+        With the default, "r", the sparse matrix arrays are mapped read only,
+        hence, several processes can share the same matrix.
+        If None the arrays are read into memory.
+        The data type policy of the object applies to the read matrix, see set_dtype.
+        """
+        meta, arrays = read_binary_container(file_name, mmap_mode=mmap_mode)
+
+        shape = tuple(meta["shape"])
+        if meta["format"] == "csc":
+            smat = scipy.sparse.csc_matrix((arrays["data"], arrays["indices"], arrays["indptr"]), shape=shape, copy=False)
+        else:
+            smat = scipy.sparse.csr_matrix((arrays["data"], arrays["indices"], arrays["indptr"]), shape=shape, copy=False)
+
+        # Canonical format was ensured when writing
+        smat.has_canonical_format = True
+
+        # The data type policy applies -- a memory mapped matrix of another data type is read into memory
+        self.set_sparse_matrix(smat, as_is=True)
+        self.set_row_names(decode_names(arrays["rowNames"], shape[0]))
+        self.set_column_names(decode_names(arrays["columnNames"], shape[1]))
+        if meta.get("dimensionNames", None) is not None:
+            self.set_dimension_names(meta["dimensionNames"])
+        return self
+
+    # ------------------------------------------------------------------
+    # To Arrow table
+    # ------------------------------------------------------------------
+    def to_arrow(self, row_column="row", column_column="column", value_column="value"):
+        """Convert to an Arrow table with the columns row, column, and value. (Requires pyarrow.)
+
+        The row and column name columns are dictionary encoded -- the dictionaries are
+        the row and column names tables, and the indices are the positions of the elements.
+        """
+        return to_arrow_table(self.sparse_matrix(), self._rowNames, self._colNames,
+                              row_column=row_column, column_column=column_column, value_column=value_column)
+
+    # ------------------------------------------------------------------
+    # From Arrow table
+    # ------------------------------------------------------------------
+    def from_arrow(self, table, row_column="row", column_column="column", value_column="value"):
+        """Make from an Arrow table with the columns row, column, and value. (Requires pyarrow.)
+
+        The row and column name columns can be dictionary encoded or plain string columns.
+        The values of duplicated (row, column) pairs are summed.
+        The data type policy of the object applies to the made matrix, see set_dtype.
+        """
+        smat, row_names, col_names = from_arrow_table(table,
+                                                      row_column=row_column,
+                                                      column_column=column_column,
+                                                      value_column=value_column)
+        self.set_sparse_matrix(smat)
+        self.set_row_names(row_names)
+        self.set_column_names(col_names)
+        return self
+
+    # ------------------------------------------------------------------
+    # To Parquet file
+    # ------------------------------------------------------------------
+    def to_parquet(self, file_name, row_column="row", column_column="column", value_column="value",
+                   row_group_size=1_000_000):
+        """Write the triplets into a Parquet file with the columns row, column, and value. (Requires pyarrow.)
+
+        The file is written in chunks of (approximately) row_group_size elements.
+        The full lists of row and column names are written into the schema metadata (the shape is kept.)
+        """
+        write_parquet(file_name, self.sparse_matrix(), self._rowNames, self._colNames,
+                      row_column=row_column, column_column=column_column, value_column=value_column,
+                      row_group_size=row_group_size)
+        return self
+
+    # ------------------------------------------------------------------
+    # From Parquet file
+    # ------------------------------------------------------------------
+    def from_parquet(self, file_name, row_column="row", column_column="column", value_column="value",
+                     batch_size=1_000_000):
+        """Read from a Parquet file with the columns row, column, and value. (Requires pyarrow.)
+
+        The file is read in batches of batch_size rows.
+        The values of duplicated (row, column) pairs are summed.
+        The data type policy of the object applies to the read matrix, see set_dtype.
+        """
+        smat, row_names, col_names = read_parquet(file_name,
+                                                  row_column=row_column,
+                                                  column_column=column_column,
+                                                  value_column=value_column,
+                                                  batch_size=batch_size)
+        self.set_sparse_matrix(smat)
+        self.set_row_names(row_names)
+        self.set_column_names(col_names)
+        return self
+
     # ------------------------------------------------------------------
     # Wolfram Language full form
     # ------------------------------------------------------------------
@@ -834,19 +1472,41 @@ class SSparseMatrix:
     # ------------------------------------------------------------------
     # Print outs
     # ------------------------------------------------------------------
-    def print_matrix(self, boundary=True, dotted_implicit=True, n_digits=-1):
-        """Pretty printing of the SSparseMatrix object."""
-        table_data = numpy.asarray(self.sparse_matrix().todense())
+    def print_matrix(self, boundary=True, dotted_implicit=True, n_digits=-1, max_rows=None, max_columns=None):
+        """Pretty printing of the SSparseMatrix object.
+
+        Only the first and the last rows and columns are shown for large matrices;
+        the shown elements are taken with a sub-matrix, hence, the whole matrix is not made dense.
 
-        invRowNames = {v: k for k, v in self.row_names_dict().items()}
-        invColumnNames = {v: k for k, v in self.column_names_dict().items()}
+        :type max_rows: int|None
+        :param max_rows: Maximum number of rows to show. If None the print option "max_rows" is used.
 
-        col_names = [invColumnNames[x] for x in sorted(invColumnNames.keys())]
-        row_names = [invRowNames[x] for x in sorted(invRowNames.keys())]
+        :type max_columns: int|None
+        :param max_columns: Maximum number of columns to show. If None the print option "max_columns" is used.
+        """
+        options = get_print_options()
+        max_rows = options["max_rows"] if max_rows is None else max_rows
+        max_columns = options["max_columns"] if max_columns is None else max_columns
 
         if not isinstance(n_digits, int):
             raise TypeError("The argument n_digits is expected to be an integer.")
 
+        if not (isinstance(max_rows, int) and max_rows > 0 and isinstance(max_columns, int) and max_columns > 0):
+            raise TypeError("The arguments max_rows and max_columns are expected to be positive integers or None.")
+
+        rowPositions, rowSkip = preview_positions(self.rows_count(), max_rows)
+        colPositions, colSkip = preview_positions(self.columns_count(), max_columns)
+
+        if len(rowPositions) * len(colPositions) > options["max_dense_size"]:
+            raise ValueError("The table to print has more than %d elements; " % options["max_dense_size"] +
+                             "use smaller max_rows and max_columns arguments.")
+
+        preview = self._get_submatrix(rowPositions, colPositions)
+        table_data = numpy.asarray(preview.sparse_matrix().todense())
+
+        col_names = [str(x) for x in preview.column_names()]
+        row_names = [str(x) for x in preview.row_names()]
+
         if n_digits < 1:
             # Not good enough for automatic determination
             # nds = math.ceil(math.log(self.sparse_matrix().max(), 10)) + 1
@@ -854,11 +1514,28 @@ class SSparseMatrix:
         else:
             nds = n_digits
 
-        nds = max(nds, max([len(cn) for cn in self.column_names()]) + 1)
+        nds = max(nds, max([len(cn) for cn in col_names], default=0) + 1)
 
-        fColSpec = "{: >" + str(max([len(x) for x in self.row_names()])) + "}"
+        rows = []
+        for i in range(len(row_names)):
+            if dotted_implicit:
+                row = ["." if x == 0 else str(x) for x in table_data[i]]
+            else:
+                row = list(table_data[i])
+            rows.append(row)
+
+        # Mark the skipped rows and columns with ellipses
+        if colSkip is not None:
+            col_names.insert(colSkip, "...")
+            for row in rows:
+                row.insert(colSkip, "...")
+        if rowSkip is not None:
+            row_names.insert(rowSkip, "...")
+            rows.insert(rowSkip, ["..."] * len(col_names))
+
+        fColSpec = "{: >" + str(max([len(x) for x in row_names], default=0)) + "}"
         fSpec = "{: >" + str(nds) + "}"
-        fStr = fColSpec + " |" + self.columns_count() * fSpec
+        fStr = fColSpec + " |" + len(col_names) * fSpec
 
         if boundary:
             print(len(fStr.format("", *col_names)) * "=")
@@ -866,17 +1543,8 @@ class SSparseMatrix:
         print(fStr.format("", *col_names))
         print(len(fStr.format("", *col_names)) * "-")
 
-        indices_set = set(zip(*self.sparse_matrix().nonzero()))
-
-        for i in range(self.rows_count()):
-            if dotted_implicit:
-                row = [str(x) for x in table_data[i]]
-                for j in range(len(row)):
-                    if not (i, j) in indices_set:
-                        row[j] = "."
-            else:
-                row = table_data[i]
-            print(fStr.format(row_names[i], *row))
+        for i in range(len(row_names)):
+            print(fStr.format(row_names[i], *rows[i]))
 
         if boundary:
             print(len(fStr.format("", *col_names)) * "=")
@@ -892,11 +1560,14 @@ class SSparseMatrix:
                           "todense", "todia", "todok", "tolil"}
 
     _delegated_mat = {"arcsin", "arcsinh", "arctan", "arctanh", "argmax", "argmin",
-                      "ceil", "deg2rad", "eliminate_zeros", "expm1", "floor",
-                      "log1p", "power", "prune", "rad2deg", "rint",
-                      "sign", "sin", "sinh", "sort_indices", "sorted_indices",
+                      "ceil", "deg2rad", "expm1", "floor",
+                      "log1p", "power", "rad2deg", "rint",
+                      "sign", "sin", "sinh", "sorted_indices",
                       "sqrt", "tan", "tanh", "trunc"}
 
+    # In place operations of the sparse matrix
+    _delegated_in_place = {"eliminate_zeros", "prune", "sort_indices", "sum_duplicates"}
+
     # ------------------------------------------------------------------
     # Delegation
     # ------------------------------------------------------------------
@@ -910,9 +1581,21 @@ class SSparseMatrix:
 
             def delegated_method(*args, **kwargs):
                 resMat = getattr(self.sparse_matrix(), method_name)(*args, **kwargs)
-                return SSparseMatrix(resMat, row_names=self.row_names(), column_names=self.column_names())
+                if scipy.sparse.issparse(resMat):
+                    return self._derive(resMat)
+                return resMat
 
             return delegated_method
 
+        elif method_name in self._delegated_in_place:
+
+            def delegated_in_place_method(*args, **kwargs):
+                # The sparse matrix buffers might be shared with other objects, hence, they are copied (copy-on-write)
+                smat = self.sparse_matrix().copy()
+                getattr(smat, method_name)(*args, **kwargs)
+                return self.set_sparse_matrix(smat, as_is=True)
+
+            return delegated_in_place_method
+
         else:
             return getattr(SSparseMatrix, method_name)
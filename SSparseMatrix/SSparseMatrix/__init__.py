@@ -3,3 +3,15 @@ from SSparseMatrix.SSparseMatrix import SSparseMatrix
 from SSparseMatrix.SSparseMatrix import make_s_sparse_matrix
 from SSparseMatrix.SSparseMatrix import is_s_sparse_matrix
 from SSparseMatrix.SSparseMatrix import column_bind
+from SSparseMatrix.SSparseMatrix import row_bind
+from SSparseMatrix.SSparseMatrix import set_default_dtype
+from SSparseMatrix.SSparseMatrix import get_default_dtype
+from SSparseMatrix.LazySSparseMatrix import LazySSparseMatrix
+from SSparseMatrix.ChunkedSSparseMatrix import ChunkedSSparseMatrix
+from SSparseMatrix.ChunkedSSparseMatrix import is_chunked_s_sparse_matrix
+from SSparseMatrix.NameIndex import NameIndex
+from SSparseMatrix.NameIndex import is_name_index
+from SSparseMatrix.ParallelDot import set_dot_backend
+from SSparseMatrix.ParallelDot import get_dot_backend
+from SSparseMatrix.PrintOptions import set_print_options
+from SSparseMatrix.PrintOptions import get_print_options
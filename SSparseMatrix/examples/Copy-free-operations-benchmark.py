@@ -0,0 +1,74 @@
+import pickle
+import sys
+import time
+
+import numpy
+import scipy
+from SSparseMatrix.SSparseMatrix import *
+
+# Benchmark of transpose/add/multiply chains with the copy-free (structural sharing) operations
+# against the previously used pickle round-trip copying.
+#
+# Usage:
+#   python Copy-free-operations-benchmark.py [n_rows] [n_columns] [density]
+
+n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+n_cols = int(sys.argv[2]) if len(sys.argv) > 2 else 50_000
+density = float(sys.argv[3]) if len(sys.argv) > 3 else 0.0002
+n_reps = 3
+
+print(160 * "=")
+print("Make random SSparseMatrix object")
+print(160 * "-")
+
+rng = numpy.random.default_rng(32)
+nnz = int(n_rows * n_cols * density)
+mat = scipy.sparse.csr_matrix((rng.random(nnz), (rng.integers(0, n_rows, nnz), rng.integers(0, n_cols, nnz))),
+                              shape=(n_rows, n_cols))
+smat = SSparseMatrix(mat, row_names="r", column_names="c")
+print(repr(smat))
+
+
+# The way the copying was done before
+def pickle_copy(obj):
+    return pickle.loads(pickle.dumps(obj, -1))
+
+
+def chain_with_pickle_copying(obj):
+    res = pickle_copy(obj)
+    res.transpose(copy=False)
+    res2 = pickle_copy(res)
+    res2.transpose(copy=False)
+    res3 = pickle_copy(res2)
+    res3.add(obj, copy=False)
+    res4 = pickle_copy(res3)
+    res4.multiply(obj, copy=False)
+    return res4
+
+
+def chain_with_sharing(obj):
+    return obj.transpose().transpose().add(obj).multiply(obj)
+
+
+def timing(func, obj):
+    tms = []
+    for i in range(n_reps):
+        start = time.perf_counter()
+        func(obj)
+        tms.append(time.perf_counter() - start)
+    return min(tms)
+
+
+print(160 * "=")
+print("Timings (best of %d)" % n_reps)
+print(160 * "-")
+
+# Verify the results are the same
+print("Same results:", chain_with_pickle_copying(smat).eq(chain_with_sharing(smat)))
+
+tm1 = timing(chain_with_pickle_copying, smat)
+tm2 = timing(chain_with_sharing, smat)
+
+print("Pickle round-trip copying : %.4f s" % tm1)
+print("Structural sharing        : %.4f s" % tm2)
+print("Speedup                   : %.1f" % (tm1 / tm2))
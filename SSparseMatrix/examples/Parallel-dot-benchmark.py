@@ -0,0 +1,61 @@
+import os
+import sys
+import time
+
+import numpy
+import scipy
+from SSparseMatrix.SSparseMatrix import *
+
+# Benchmark of the backends of SSparseMatrix.dot: "scipy" (single threaded), "threads", and "numpy".
+#
+# Usage:
+#   python Parallel-dot-benchmark.py [n_rows] [n_columns] [density] [n_threads]
+
+n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+n_cols = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+density = float(sys.argv[3]) if len(sys.argv) > 3 else 0.0002
+n_threads = int(sys.argv[4]) if len(sys.argv) > 4 else (os.cpu_count() or 1)
+n_reps = 5
+
+print(160 * "=")
+print("Make random SSparseMatrix object")
+print(160 * "-")
+
+rng = numpy.random.default_rng(32)
+nnz = int(n_rows * n_cols * density)
+mat = scipy.sparse.csr_matrix((rng.random(nnz), (rng.integers(0, n_rows, nnz), rng.integers(0, n_cols, nnz))),
+                              shape=(n_rows, n_cols))
+smat = SSparseMatrix(mat, row_names="r", column_names="c")
+print(repr(smat))
+print("Number of threads:", n_threads)
+
+# A sparse profile vector (like the ones used in the recommenders), a dense vector, and a sparse matrix
+nProf = max(n_cols // 1000, 1)
+profVec = SSparseMatrix(scipy.sparse.csr_matrix((rng.random(nProf), (rng.integers(0, n_cols, nProf), numpy.zeros(nProf))),
+                                                shape=(n_cols, 1)),
+                        row_names=smat.column_names_index(), column_names=["profile"])
+denseVec = rng.random(n_cols)
+nMat = 10 * n_cols // 100
+smat2 = SSparseMatrix(scipy.sparse.csr_matrix((rng.random(nMat), (rng.integers(0, n_cols, nMat), rng.integers(0, 10, nMat))),
+                                              shape=(n_cols, 10)),
+                      row_names=smat.column_names_index(), column_names="m")
+
+
+def timing(other, backend):
+    tms = []
+    for i in range(n_reps):
+        start = time.perf_counter()
+        smat.dot(other, backend=backend, n_threads=n_threads)
+        tms.append(time.perf_counter() - start)
+    return min(tms)
+
+
+print(160 * "=")
+print("Timings (best of %d)" % n_reps)
+print(160 * "-")
+
+for (name, other) in [("sparse profile vector", profVec), ("dense vector", denseVec), ("sparse 10 columns matrix", smat2)]:
+    tms = {backend: timing(other, backend) for backend in ["scipy", "threads", "numpy"]}
+    print("%-25s : " % name +
+          ", ".join(["%s %.4f s" % (k, v) for (k, v) in tms.items()]) +
+          ", speedup of threads %.1f" % (tms["scipy"] / tms["threads"]))
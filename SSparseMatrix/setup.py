@@ -14,6 +14,7 @@ setuptools.setup(
     url="https://github.com/antononcube/Python-packages/tree/main/SSparseMatrix",
     packages=setuptools.find_packages(),
     install_requires=['numpy', 'scipy'],
+    extras_require={'arrow': ['pyarrow']},
     classifiers=[
         "Intended Audience :: Science/Research",
         "Intended Audience :: Developers",
@@ -96,6 +96,95 @@ class BasicFunctionalities(unittest.TestCase):
             rmat2.sparse_matrix().shape[1] == self.rmat.sparse_matrix().shape[0]
         )
 
+    def test_copy_1(self):
+        self.test_rmat()
+
+        rmat2 = self.rmat.copy()
+        rmat2.sparse_matrix().data[0] = 100
+
+        self.assertTrue(
+            rmat2.row_names() == self.rmat.row_names() and
+            rmat2.column_names() == self.rmat.column_names() and
+            self.rmat.sparse_matrix().data[0] != 100
+        )
+
+    def test_transpose_2(self):
+        self.test_rmat()
+
+        rmat2 = self.rmat.transpose().transpose()
+        rmat2.set_row_names(list("WXYZ"))
+
+        self.assertTrue(
+            self.rmat.row_names() == ["A", "B", "C", "D"] and
+            rmat2.sparse_matrix().shape == self.rmat.sparse_matrix().shape and
+            (rmat2.sparse_matrix() != self.rmat.sparse_matrix()).nnz == 0
+        )
+
+    def test_transpose_3(self):
+        # The in place operations of a transpose do not change the shared buffers of the original
+        smat = SSparseMatrix(scipy.sparse.csr_matrix(([1.0, 0.0, 2.0], [0, 1, 2], [0, 2, 3]), shape=(2, 3)),
+                             list("AB"), list("abc"))
+        cscMat = smat.sparse_matrix("csc")
+        smatT = smat.transpose()
+        smatT.eliminate_zeros()
+        smatT.sort_indices()
+
+        self.assertTrue(
+            smat.sparse_matrix().nnz == 3 and
+            smat.sparse_matrix("csc") is cscMat and
+            numpy.array_equal(smat.sparse_matrix().data, [1.0, 0.0, 2.0]) and
+            smatT.sparse_matrix().nnz == 2 and
+            smatT.sparse_matrix("csr").nnz == 2 and
+            smatT.eq(SSparseMatrix(scipy.sparse.csr_matrix([[1, 0], [0, 0], [0, 2]]), list("abc"), list("AB")))
+        )
+
+    def test_formats_1(self):
+        # CSC matrices are not converted to CSR ones
+        smat = SSparseMatrix(scipy.sparse.csc_matrix(self.mat), list("ABCD"), list("abcde"))
+        smat2 = SSparseMatrix(scipy.sparse.csr_matrix(self.mat), list("ABCD"), list("abcde"))
+
+        self.assertTrue(
+            smat.sparse_matrix().format == "csc" and
+            smat.sparse_matrix("csr") is smat.sparse_matrix("csr")
+        )
+        self.assertTrue(
+            smat.eq(smat2) and
+            numpy.array_equal(smat.row_sums(), smat2.row_sums()) and
+            numpy.array_equal(smat.column_maximums(), smat2.column_maximums()) and
+            smat.column_dictionaries() == smat2.column_dictionaries() and
+            smat.triplets() == smat2.triplets() and
+            smat[:, ["e", "a"]].eq(smat2[:, ["e", "a"]]) and
+            smat2.impose_column_names(["e", "x", "a"]).eq(smat.transpose().impose_row_names(["e", "x", "a"]).transpose())
+        )
+
+    def test_formats_2(self):
+        # The cached conversion is reused and carried over by transposing
+        smat = SSparseMatrix(scipy.sparse.csr_matrix(self.mat), list("ABCD"), list("abcde"))
+        cscMat = smat.sparse_matrix("csc")
+        smatT = smat.transpose()
+
+        self.assertTrue(
+            smat.sparse_matrix("csc") is cscMat and
+            smatT.sparse_matrix().format == "csc" and
+            smatT.sparse_matrix("csr").format == "csr" and
+            numpy.shares_memory(smatT.sparse_matrix("csr").data, cscMat.data)
+        )
+
+    def test_reductions_1(self):
+        # The reductions are NumPy arrays; the dictionary and series variants are keyed by names
+        smat = SSparseMatrix(self.mat, list("ABCD"), list("abcde"))
+
+        self.assertTrue(
+            isinstance(smat.row_sums(), numpy.ndarray) and
+            smat.row_sums().shape == (4,) and
+            numpy.array_equal(smat.row_sums(), [5, 2, 2, 3]) and
+            numpy.array_equal(smat.column_maximums(), [1, 2, 3, 4, 2]) and
+            numpy.array_equal(smat.row_minimums(), [0, 0, 0, 0]) and
+            smat.column_sums_dict() == {"a": 1, "b": 2, "c": 3, "d": 4, "e": 2} and
+            smat.row_sums_series().to_dict() == smat.row_sums_dict() and
+            list(smat.column_maximums_series().index) == list("abcde")
+        )
+
 
 if __name__ == '__main__':
     unittest.main()
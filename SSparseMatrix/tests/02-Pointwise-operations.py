@@ -49,5 +49,11 @@ class PointwiseOperations(unittest.TestCase):
                         rmat2.row_names() == rmat.row_names() and
                         rmat2.column_names() == rmat.column_names())
 
+    def test_clip_2(self):
+        # Verify clipping does not change the original matrix
+        rmat1 = SSparseMatrix([[1, 0, 0, 4, 0], [0, 2, 0, 0, 0]], row_names=["A", "B"], column_names=list("abcde"))
+        rmat2 = rmat1.clip(v_min=2, v_max=3)
+        self.assertTrue(rmat1.sparse_matrix().nnz == 3 and rmat2.sparse_matrix().nnz == 1)
+
 if __name__ == '__main__':
     unittest.main()
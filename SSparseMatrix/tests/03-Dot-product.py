@@ -2,9 +2,12 @@
 #   https://github.com/antononcube/MathematicaForPrediction/blob/master/SSparseMatrix.m
 
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 
+from SSparseMatrix import ParallelDot
 from SSparseMatrix.SSparseMatrix import *
 import numpy
+import scipy
 
 mat = [[1, 0, 4, 16], [4, 0, 0, 10], [0, 9, 5, 5], [0, 0, 1, 0], [0, 0, 0, 5]]
 smat = SSparseMatrix(mat)
@@ -111,6 +114,32 @@ class DotProduct(unittest.TestCase):
         # Verify same vectors
         self.assertTrue(all(list(res3 == vec4)))
 
+    def test_dot_backends_1(self):
+        # Verify that the dot product backends give the same results
+        vec = numpy.array([1, 2, 3, 4])
+        smat2 = smat.dot(smat.transpose())
+        res = [(smat.dot(smat.transpose(), backend=b, n_threads=2).eq(smat2) and
+                smat.dot(vec, backend=b).eq(smat.dot(vec)))
+               for b in ["scipy", "threads", "numpy"]]
+        self.assertTrue(all(res))
+
+    def test_dot_backends_3(self):
+        # Verify that concurrent products with different numbers of threads share one thread pool
+        big = SSparseMatrix(scipy.sparse.random(2000, 500, density=0.4, format="csr", random_state=0))
+        vec = numpy.arange(500, dtype=float)
+        expected = big.dot(vec).sparse_matrix().toarray()
+        executor = ParallelDot._get_executor()
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            res = list(pool.map(lambda n: big.dot(vec, backend="threads", n_threads=n).sparse_matrix().toarray(),
+                                [2, 3, 4, 5] * 3))
+        self.assertTrue(all([numpy.allclose(x, expected) for x in res]) and
+                        ParallelDot._get_executor() is executor)
+
+    def test_dot_backends_2(self):
+        # Verify that unknown backends are rejected
+        with self.assertRaises(ValueError):
+            smat.dot(smat.transpose(), backend="gpu")
+
 
 if __name__ == '__main__':
     unittest.main()
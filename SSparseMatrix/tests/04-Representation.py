@@ -1,9 +1,16 @@
 # Follows the tests in
 #   https://github.com/antononcube/MathematicaForPrediction/blob/master/SSparseMatrix.m
 
+import contextlib
+import io
+import os
+import tempfile
 import unittest
 
+from SSparseMatrix.ArrowInterchange import _import_pyarrow
+from SSparseMatrix.PrintOptions import set_print_options
 from SSparseMatrix.SSparseMatrix import *
+import numpy
 
 mat = [[1, 0, 4, 16], [4, 0, 0, 10], [0, 9, 5, 5], [0, 0, 1, 0], [0, 0, 0, 5]]
 smat = SSparseMatrix(mat)
@@ -44,6 +51,142 @@ class DotProduct(unittest.TestCase):
         # Verify SSparseMatrix objects are equivalent
         self.assertTrue(smat.eq(SSparseMatrix().from_dict(smat.to_dict())))
 
+    def test_from_file_1(self):
+        # Verify to_file() and from_file() round trip with memory mapping
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_name = os.path.join(tmp_dir, "smat.bin")
+            smat.to_file(file_name)
+            smat2 = SSparseMatrix().from_file(file_name, mmap_mode="r")
+
+            self.assertTrue(smat.eq(smat2) and not smat2.sparse_matrix().data.flags.writeable)
+            del smat2
+
+    def test_from_file_2(self):
+        # Verify to_file() and from_file() round trip without memory mapping
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_name = os.path.join(tmp_dir, "smat.bin")
+            smat.transpose().to_file(file_name)
+            smat2 = SSparseMatrix().from_file(file_name, mmap_mode=None)
+
+            self.assertTrue(smat.transpose().eq(smat2))
+
+    def test_from_file_3(self):
+        # Verify names that are not strings are rejected and the data type policy is applied when reading
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_name = os.path.join(tmp_dir, "smat.bin")
+            with self.assertRaises(TypeError):
+                SSparseMatrix(mat, row_names=list(range(5)), column_names=list("abcd")).to_file(file_name)
+
+            smat.to_file(file_name)
+            smat2 = SSparseMatrix(dtype=numpy.float32).from_file(file_name)
+
+            self.assertTrue(smat2.dtype == numpy.float32 and smat2._dtype == numpy.float32 and
+                            smat2.triplets() == smat.triplets())
+            del smat2
+
+    def test_row_dictionaries_1(self):
+        # Verify row_dictionaries() and column_dictionaries()
+        self.assertTrue(smat.row_dictionaries() == {"A": {"a": 1, "c": 4, "d": 16}, "B": {"a": 4, "d": 10},
+                                                    "C": {"b": 9, "c": 5, "d": 5}, "D": {"c": 1}, "E": {"d": 5}})
+        self.assertTrue(smat.column_dictionaries() == smat.transpose().row_dictionaries())
+
+    def test_row_dictionaries_2(self):
+        # Verify sorting and top-k selection
+        rowDicts = smat.row_dictionaries(sort=True, top_k=2)
+        colDicts = dict(smat.iter_column_dictionaries(sort=True, top_k=1))
+
+        self.assertTrue(list(rowDicts["A"].items()) == [("d", 16), ("c", 4)] and
+                        list(rowDicts["C"].items()) == [("b", 9), ("c", 5)] and
+                        colDicts == {"a": {"B": 4}, "b": {"C": 9}, "c": {"C": 5}, "d": {"A": 16}})
+
+    @unittest.skipIf(_import_pyarrow() is None, "pyarrow is not installed")
+    def test_from_arrow_1(self):
+        # Verify to_arrow() and from_arrow() round trip
+        tbl = smat.to_arrow()
+        smat2 = SSparseMatrix().from_arrow(tbl)
+
+        self.assertTrue(smat.eq(smat2) and tbl.num_rows == smat.sparse_matrix().nnz)
+
+    @unittest.skipIf(_import_pyarrow() is None, "pyarrow is not installed")
+    def test_from_arrow_2(self):
+        # Verify from_arrow() with plain (not dictionary encoded) columns
+        pa = _import_pyarrow()
+        tbl = pa.table({"row": ["B", "A", "B"], "column": ["x", "y", "x"], "value": [1.0, 2.0, 3.0]})
+        smat2 = SSparseMatrix().from_arrow(tbl)
+
+        self.assertTrue(smat2.row_names() == ["B", "A"] and
+                        smat2.column_names() == ["x", "y"] and
+                        smat2.triplets() == [("B", "x", 4.0), ("A", "y", 2.0)])
+
+    @unittest.skipIf(_import_pyarrow() is None, "pyarrow is not installed")
+    def test_from_parquet_1(self):
+        # Verify to_parquet() and from_parquet() round trip with several chunks
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_name = os.path.join(tmp_dir, "smat.parquet")
+            smat.transpose().to_parquet(file_name, row_group_size=3)
+            smat2 = SSparseMatrix().from_parquet(file_name, batch_size=2)
+
+            self.assertTrue(sorted(smat.transpose().triplets()) == sorted(smat2.triplets()))
+
+    @unittest.skipIf(_import_pyarrow() is None, "pyarrow is not installed")
+    def test_from_parquet_2(self):
+        # Verify the data type policy is applied when reading
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_name = os.path.join(tmp_dir, "smat.parquet")
+            smat.to_parquet(file_name)
+            smat2 = SSparseMatrix(dtype=numpy.float32).from_parquet(file_name)
+            smat3 = SSparseMatrix(dtype=numpy.float32).from_arrow(smat.to_arrow())
+
+            self.assertTrue(smat2.dtype == numpy.float32 and smat3.dtype == numpy.float32 and
+                            sorted(smat2.triplets()) == sorted(smat.triplets()) and smat3.eq(smat))
+
+    @unittest.skipIf(_import_pyarrow() is None, "pyarrow is not installed")
+    def test_from_parquet_3(self):
+        # Verify the shape and the order of the names are kept
+        smat2 = SSparseMatrix([[0, 1, 0], [2, 0, 0], [0, 0, 0]], row_names=list("ABC"), column_names=list("xyz"))
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_name = os.path.join(tmp_dir, "smat.parquet")
+            smat2.to_parquet(file_name)
+            smat3 = SSparseMatrix().from_parquet(file_name)
+
+            self.assertTrue(smat3.shape() == (3, 3) and
+                            smat3.row_names() == list("ABC") and
+                            smat3.column_names() == list("xyz") and
+                            smat3.eq(smat2))
+
+    def test_str_1(self):
+        # Verify only maxprint elements are shown
+        smat2 = SSparseMatrix(smat.sparse_matrix().tocsc(), row_names=smat.row_names(), column_names=smat.column_names())
+        smat2.sparse_matrix().maxprint = 4
+        lines = str(smat2).split("\n")
+        self.assertTrue(lines[0] == "  ('A', 'a')\t1" and
+                        lines[2].strip() == ":\t:" and
+                        lines[-1] == "  ('E', 'd')\t5" and
+                        len(lines) == 5)
+
+    def test_repr_1(self):
+        self.assertTrue(repr(smat).endswith("with 10 stored elements and shape (5, 4), and fill-in 0.5>"))
+
+    def test_print_matrix_1(self):
+        # Verify the first and last rows and columns are shown
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            smat.print_matrix(boundary=False, max_rows=3, max_columns=2)
+        lines = out.getvalue().split("\n")
+        self.assertTrue(lines[0].split() == ["|", "a", "...", "d"] and
+                        lines[2].split() == ["A", "|", "1", "...", "16"] and
+                        lines[4].split() == ["...", "|", "...", "...", "..."] and
+                        lines[5].split() == ["E", "|", ".", "...", "5"])
+
+    def test_print_matrix_2(self):
+        # Verify the dense size guard
+        set_print_options(max_dense_size=4)
+        try:
+            with self.assertRaises(ValueError):
+                smat.print_matrix()
+        finally:
+            set_print_options(max_dense_size=1_000_000)
+
 
 if __name__ == '__main__':
     unittest.main()
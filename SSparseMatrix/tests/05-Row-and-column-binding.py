@@ -49,5 +49,28 @@ class ColumnAndRowBinding(unittest.TestCase):
         self.assertTrue(smat4.row_names() == (rows1 + rows2))
 
 
+    def test_column_bind_2(self):
+        # Verify n-ary column binding aligns the rows to the first matrix
+        smat2 = SSparseMatrix(smat.sparse_matrix(), row_names=list("ABCDE"), column_names="x")
+        smat3 = smat[["E", "D", "C", "B", "A"], :]
+        smat3.set_column_names("y")
+
+        smat4 = column_bind({"s": smat, "x": smat2, "y": smat3})
+
+        self.assertTrue(smat4.row_names() == smat.row_names() and
+                        smat4.column_names() == smat.column_names() + smat2.column_names() + smat3.column_names() and
+                        smat4[:, smat3.column_names()].sparse_matrix().todense().tolist() ==
+                        smat.sparse_matrix().todense().tolist() and
+                        smat4.eq(smat.column_bind(smat2).column_bind(smat3)))
+
+    def test_row_bind_2(self):
+        # Verify n-ary row binding with duplicated row names
+        smat2 = smat.row_bind([smat, smat])
+
+        self.assertTrue(smat2.shape() == (15, 4) and
+                        smat2.row_names() == [x + "." + str(i) for i in (1, 2, 3) for x in smat.row_names()] and
+                        row_bind([smat, smat, smat]).eq(smat2))
+
+
 if __name__ == '__main__':
     unittest.main()
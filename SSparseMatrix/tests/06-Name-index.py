@@ -0,0 +1,94 @@
+import unittest
+
+from SSparseMatrix.SSparseMatrix import *
+from SSparseMatrix.NameIndex import *
+
+mat = [[1, 0, 0, 3], [4, 0, 0, 5], [0, 3, 0, 5], [0, 0, 1, 0], [0, 0, 0, 5]]
+smat = SSparseMatrix(mat)
+smat.set_row_names(["A", "B", "C", "D", "E"])
+smat.set_column_names(["a", "b", "c", "d"])
+
+
+class NameIndexFunctionalities(unittest.TestCase):
+
+    def test_positions_1(self):
+        index = NameIndex(["A", "B", "C", "D", "E"])
+        self.assertTrue(list(index.positions(["E", "A", "C"])) == [4, 0, 2])
+
+    def test_positions_2(self):
+        # Verify unknown names are reported
+        index = NameIndex(["A", "B", "C", "D", "E"])
+        with self.assertRaises(KeyError):
+            index.positions(["E", "X", "C"])
+
+    def test_positions_3(self):
+        index = NameIndex(["A", "B", "C", "D", "E"])
+        self.assertTrue(list(index.positions(["E", "X", "C"], ignore_unknown=True)) == [4, 2])
+
+    def test_from_dict_1(self):
+        # Verify the positions in a dictionary specification are respected
+        index = NameIndex({"b": 1, "a": 0, "c": 2})
+        self.assertTrue(index.names() == ["a", "b", "c"] and index.position("b") == 1)
+
+    def test_take_1(self):
+        index = NameIndex(["A", "B", "C", "D", "E"])
+        self.assertTrue(index.take(slice(1, 3)).names() == ["B", "C"] and
+                        index.take([4, 0]).names() == ["E", "A"] and
+                        index.take([True, False, False, False, True]).names() == ["A", "E"])
+
+    def test_concatenate_1(self):
+        # The names dictionary of the concatenation is the same with and without a made dictionary
+        index = NameIndex(["A", "B", "C"])
+        index2 = NameIndex(["A", "B", "C"])
+        index2.names_dict()
+        res = index.concatenate(NameIndex(["D", "E"]), NameIndex(["F"]))
+        res2 = index2.concatenate(NameIndex(["D", "E"]), NameIndex(["F"]))
+        self.assertTrue(res.names() == list("ABCDEF") and
+                        res.names_dict() == res2.names_dict() and
+                        res2.position("F") == 5 and
+                        index2.names_dict() == {"A": 0, "B": 1, "C": 2})
+
+    def test_immutable_1(self):
+        index = NameIndex(["A", "B", "C"])
+        with self.assertRaises(ValueError):
+            index.array()[0] = "X"
+
+    def test_immutable_2(self):
+        # Verify the getters do not expose the shared caches
+        smat2 = smat.transpose().transpose()
+        smat2.row_names().append("X")
+        d = {"b": 1, "a": 0, "c": 2}
+        index = NameIndex(d)
+        d["x"] = 3
+        with self.assertRaises(TypeError):
+            smat2.row_names_dict()["X"] = 5
+        self.assertTrue(smat.row_names() == list("ABCDE") and
+                        len(smat.row_names_dict()) == 5 and
+                        "x" not in index and index.names_dict() == {"a": 0, "b": 1, "c": 2})
+
+    def test_mapping_1(self):
+        # Verify the read only dictionaries of the getters can be used to set names
+        smat2 = smat.copy().set_row_names(smat.row_names_dict())
+        smat3 = SSparseMatrix(mat, row_names=smat.row_names_dict(), column_names=smat.column_names_dict())
+        self.assertTrue(smat2.row_names() == smat.row_names() and
+                        smat3.row_names() == smat.row_names() and
+                        smat3.column_names() == smat.column_names() and
+                        NameIndex(smat.row_names_dict()) == smat.row_names_index())
+
+    def test_sharing_1(self):
+        # Verify derived matrices share the name indexes
+        smat2 = smat.transpose()
+        smat3 = smat.multiply(2)
+        self.assertTrue(smat2.column_names_index() is smat.row_names_index() and
+                        smat2.row_names_index() is smat.column_names_index() and
+                        smat3.row_names_index() is smat.row_names_index())
+
+    def test_set_row_names_1(self):
+        # Verify setting with a NameIndex object
+        smat2 = SSparseMatrix(mat, row_names=NameIndex(list("VWXYZ")), column_names=smat.column_names_index())
+        self.assertTrue(smat2.row_names() == list("VWXYZ") and
+                        smat2.column_names_index() is smat.column_names_index())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+
+from SSparseMatrix.SSparseMatrix import *
+import numpy
+
+mat = [[1, 0, 0, 3], [4, 0, 0, 5], [0, 3, 0, 5], [0, 0, 1, 0], [0, 0, 0, 5]]
+smat = SSparseMatrix(mat)
+smat.set_row_names(["A", "B", "C", "D", "E"])
+smat.set_column_names(["a", "b", "c", "d"])
+
+
+class SubMatrices(unittest.TestCase):
+
+    def test_names_1(self):
+        # Verify sub-matrix extraction with row- and column names
+        smat2 = smat[["E", "A", "C"], ["d", "a"]]
+        self.assertTrue(smat2.row_names() == ["E", "A", "C"] and
+                        smat2.column_names() == ["d", "a"] and
+                        smat2.sparse_matrix().todense().tolist() == [[5, 0], [3, 1], [5, 0]])
+
+    def test_names_2(self):
+        # Verify contiguous names give the same result as the corresponding slice
+        self.assertTrue(smat[["B", "C", "D"], :].eq(smat[1:4, :]))
+
+    def test_mask_1(self):
+        # Verify Boolean masks
+        mask = numpy.array(smat.row_sums()) > 5
+        smat2 = smat[mask, :]
+        self.assertTrue(smat2.row_names() == ["B", "C"])
+
+    def test_single_element_1(self):
+        self.assertTrue(smat["B", "d"] == smat[1, 3] == smat["B", 3] == 5)
+
+    def test_unknown_1(self):
+        # Verify unknown names are reported
+        with self.assertRaises(KeyError):
+            smat[["A", "X"], :]
+
+    def test_unknown_2(self):
+        with self.assertRaises(KeyError):
+            smat["A", "x"]
+
+
+if __name__ == '__main__':
+    unittest.main()
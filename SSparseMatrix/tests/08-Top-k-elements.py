@@ -0,0 +1,47 @@
+import unittest
+
+from SSparseMatrix.SSparseMatrix import *
+import numpy
+import scipy
+
+mat = [[1, 0, 2, 3], [4, 0, 0, 5], [0, 3, 0, 5], [0, 0, 1, 0], [0, 2, 2, 2]]
+smat = SSparseMatrix(mat)
+smat.set_row_names(["A", "B", "C", "D", "E"])
+smat.set_column_names(["a", "b", "c", "d"])
+
+
+class TopKElements(unittest.TestCase):
+
+    def test_row_top_k_1(self):
+        # Verify the largest elements of each row are kept (ties are resolved by position)
+        smat2 = smat.row_top_k(2)
+        self.assertTrue(smat2.row_names() == smat.row_names() and
+                        smat2.column_names() == smat.column_names() and
+                        smat2.sparse_matrix().todense().tolist() ==
+                        [[0, 0, 2, 3], [4, 0, 0, 5], [0, 3, 0, 5], [0, 0, 1, 0], [0, 2, 2, 0]])
+
+    def test_row_top_k_2(self):
+        # Verify the arrays result
+        rowNames, colNames, values = smat.row_top_k(1, as_arrays=True)
+        self.assertTrue(rowNames.tolist() == ["A", "B", "C", "D", "E"] and
+                        colNames.tolist() == ["d", "d", "d", "c", "b"] and
+                        values.tolist() == [3, 5, 5, 1, 2])
+
+    def test_column_top_k_1(self):
+        # Verify column_top_k is row_top_k of the transpose
+        self.assertTrue(smat.column_top_k(2).eq(smat.transpose().row_top_k(2).transpose()))
+
+    def test_row_top_k_3(self):
+        # Verify the selection against sorting for a random matrix
+        rmat = scipy.sparse.random(200, 50, density=0.3, format="csr", random_state=12)
+        rmat.data = numpy.round(rmat.data * 10) + 1
+        k = 4
+        smat2 = SSparseMatrix(rmat).row_top_k(k).sparse_matrix().toarray()
+        dense = rmat.toarray()
+        self.assertTrue(all([sorted(smat2[i][smat2[i] != 0].tolist()) ==
+                             sorted(dense[i][dense[i] != 0].tolist())[-k:]
+                             for i in range(dense.shape[0])]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+
+from SSparseMatrix.SSparseMatrix import *
+import numpy
+import scipy
+
+smat = SSparseMatrix(scipy.sparse.random(20, 10, density=0.3, format="csr", random_state=3),
+                     row_names="r", column_names="c")
+smat2 = SSparseMatrix(scipy.sparse.random(20, 10, density=0.3, format="csr", random_state=5),
+                      row_names=smat.row_names_index(), column_names=smat.column_names_index())
+
+
+def max_abs_diff(smat1, smat2):
+    return abs(smat1.sparse_matrix() - smat2.sparse_matrix()).max()
+
+
+class LazyEvaluation(unittest.TestCase):
+
+    def test_evaluate_1(self):
+        # Verify lazy evaluation gives the same result as the eager one
+        lmat = smat.lazy().add(smat2.lazy().multiply(-1))
+        lmat = lmat.multiply(lmat).sqrt()
+
+        smat3 = smat.add(smat2.multiply(-1))
+        smat3 = SSparseMatrix(smat3.multiply(smat3).sparse_matrix().sqrt(),
+                              row_names=smat.row_names(), column_names=smat.column_names())
+
+        res = lmat.evaluate()
+        self.assertTrue(max_abs_diff(res, smat3) < 1e-12 and
+                        res.row_names() == smat.row_names() and
+                        res.column_names() == smat.column_names())
+
+    def test_fusion_1(self):
+        # Verify scalar folding and flattening of linear combinations
+        lmat = smat.lazy().multiply(3).add(smat2).multiply(2).subtract(smat)
+        expr = lmat.expression()
+
+        self.assertTrue(expr[0] == "lincomb" and
+                        [c for (c, _) in expr[1]] == [6, 2, -1] and
+                        max_abs_diff(lmat.evaluate(), smat.multiply(5).add(smat2.multiply(2))) < 1e-12)
+
+    def test_fusion_2(self):
+        # Verify the product of a matrix with itself is a square and the scalar factors are pulled out
+        lmat = smat.lazy().multiply(2).multiply(smat)
+        expr = lmat.expression()
+
+        self.assertTrue(expr[0] == "lincomb" and expr[1][0][0] == 2 and expr[1][0][1][0] == "square" and
+                        max_abs_diff(lmat.evaluate(), smat.multiply(smat).multiply(2)) < 1e-12)
+
+    def test_leaves_1(self):
+        # Verify the leaf matrices are not changed and the accessors evaluate
+        data = smat.sparse_matrix().data.copy()
+        lmat = smat.lazy().power(2).sqrt()
+
+        self.assertTrue(numpy.allclose(lmat.column_sums(), smat.column_sums()) and
+                        numpy.all(smat.sparse_matrix().data == data))
+
+    def test_dtype_1(self):
+        # Verify the data type policy of the leaves survives the evaluation
+        smat3 = smat.copy().set_dtype(numpy.float32)
+        smat4 = smat2.copy().set_dtype(numpy.float32)
+        res = smat3.lazy().multiply(2).add(smat4).sqrt().evaluate()
+        res2 = smat3.lazy().dot(smat4.transpose()).evaluate()
+
+        self.assertTrue(res.sparse_matrix().dtype == numpy.float32 and res._dtype == numpy.float32 and
+                        res.multiply(2).sparse_matrix().dtype == numpy.float32 and
+                        res2.sparse_matrix().dtype == numpy.float32 and
+                        max_abs_diff(res, smat3.multiply(2).add(smat4).sqrt()) < 1e-6)
+
+    def test_names_1(self):
+        # Verify element-wise operations with matrices with different names are rejected
+        with self.assertRaises(TypeError):
+            smat.lazy().add(smat2.transpose())
+
+
+if __name__ == '__main__':
+    unittest.main()
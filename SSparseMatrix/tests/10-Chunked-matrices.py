@@ -0,0 +1,115 @@
+import os
+import tempfile
+import unittest
+
+from SSparseMatrix.SSparseMatrix import *
+from SSparseMatrix.ChunkedSSparseMatrix import ChunkedSSparseMatrix
+import numpy
+import scipy
+
+smat = SSparseMatrix(scipy.sparse.random(53, 17, density=0.2, format="csr", random_state=1),
+                     row_names="r", column_names="c")
+
+tempDir = tempfile.TemporaryDirectory()
+cmat = ChunkedSSparseMatrix().from_s_sparse_matrix(smat, os.path.join(tempDir.name, "cmat"), rows_per_block=10)
+
+
+def max_abs_diff(smat1, smat2):
+    if isinstance(smat1, ChunkedSSparseMatrix):
+        smat1 = smat1.to_s_sparse_matrix()
+    return abs(smat1.sparse_matrix() - smat2.sparse_matrix()).max()
+
+
+class ChunkedMatrices(unittest.TestCase):
+
+    def test_from_directory_1(self):
+        cmat2 = ChunkedSSparseMatrix(os.path.join(tempDir.name, "cmat"))
+        self.assertTrue(cmat2.blocks_count() == 6 and
+                        cmat2.shape() == smat.shape() and
+                        cmat2.row_names() == smat.row_names() and
+                        cmat2.column_names() == smat.column_names() and
+                        max_abs_diff(cmat2, smat) == 0)
+
+    def test_sums_1(self):
+        self.assertTrue(numpy.allclose(cmat.row_sums(), smat.row_sums()) and
+                        numpy.allclose(cmat.column_sums(), smat.column_sums()))
+
+    def test_dot_1(self):
+        vec = numpy.arange(smat.columns_count())
+        res = cmat.dot(vec)
+        self.assertTrue(isinstance(res, SSparseMatrix) and
+                        res.row_names() == smat.row_names() and
+                        max_abs_diff(res, smat.dot(vec)) < 1e-12)
+
+    def test_dot_2(self):
+        # Left multiplication is done block by block too
+        vec = SSparseMatrix(scipy.sparse.random(2, 53, density=0.3, format="csr", random_state=2),
+                            row_names="h", column_names=smat.row_names())
+        res = vec.dot(cmat)
+        self.assertTrue(res.column_names() == smat.column_names() and
+                        max_abs_diff(res, vec.dot(smat)) < 1e-12)
+
+    def test_dot_3(self):
+        # The product with a diagonal matrix is deferred
+        W = SSparseMatrix(scipy.sparse.diags(numpy.arange(17.0), format="csr"),
+                          row_names=smat.column_names(), column_names=smat.column_names())
+        res = cmat.dot(W)
+        self.assertTrue(isinstance(res, ChunkedSSparseMatrix) and
+                        res.directory() == cmat.directory() and
+                        max_abs_diff(res, smat.dot(W)) < 1e-12)
+
+    def test_dot_4(self):
+        other = scipy.sparse.random(17, 5, density=0.5, format="csr", random_state=3)
+        res = cmat.dot(other, directory=os.path.join(tempDir.name, "dot4"))
+        self.assertTrue(isinstance(res, ChunkedSSparseMatrix) and
+                        res.blocks_count() == cmat.blocks_count() and
+                        max_abs_diff(res, smat.dot(other)) < 1e-12)
+
+    def test_multiply_1(self):
+        weights = numpy.zeros(smat.columns_count())
+        weights[[3, 5]] = [3, 1]
+        res = cmat.multiply(2).multiply({"c3": 3, "c5": 1})
+        self.assertTrue(max_abs_diff(res, smat.multiply(2).dot(scipy.sparse.diags(weights, format="csr"))) < 1e-12)
+
+    def test_multiply_2(self):
+        # The element-wise multiplication with a matrix is done block by block
+        other = SSparseMatrix(scipy.sparse.random(53, 17, density=0.5, format="csr", random_state=4),
+                              row_names=smat.row_names(), column_names=smat.column_names())
+        res = cmat.multiply(other)
+        self.assertTrue(isinstance(res, SSparseMatrix) and not isinstance(res, ChunkedSSparseMatrix) and
+                        max_abs_diff(res, smat.multiply(other)) < 1e-12 and
+                        max_abs_diff(cmat.multiply(other.sparse_matrix()), smat.multiply(other)) < 1e-12)
+
+    def test_out_of_core_1(self):
+        # The chunked matrices are not loaded implicitly
+        self.assertTrue(is_s_sparse_matrix(cmat) and max_abs_diff(cmat.to_s_sparse_matrix(), smat) == 0)
+        with self.assertRaises(TypeError):
+            cmat.sparse_matrix()
+        with self.assertRaises(TypeError):
+            column_bind([cmat, smat])
+        with self.assertRaises(TypeError):
+            cmat.transpose()
+
+    def test_unitize_1(self):
+        res = cmat.copy().unitize()
+        self.assertTrue(numpy.allclose(res.row_sums(), smat.copy().unitize().row_sums()) and
+                        numpy.allclose(cmat.row_sums(), smat.row_sums()))
+
+    def test_slices_1(self):
+        rows = ["r5", "r41", "r0", "r12", "r5"]
+        self.assertTrue(max_abs_diff(cmat[rows, :], smat[rows, :]) == 0 and
+                        cmat[rows, :].row_names() == rows and
+                        max_abs_diff(cmat[rows, ["c3", "c1"]], smat[rows, ["c3", "c1"]]) == 0 and
+                        max_abs_diff(cmat[12:30], smat[12:30]) == 0 and
+                        cmat["r41", "c3"] == smat["r41", "c3"])
+
+    def test_from_blocks_1(self):
+        with self.assertRaises(ValueError):
+            ChunkedSSparseMatrix().from_blocks(smat, os.path.join(tempDir.name, "cmat"))
+
+        with self.assertRaises(TypeError):
+            ChunkedSSparseMatrix().from_blocks([smat, smat.transpose()], os.path.join(tempDir.name, "blocks1"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+
+from SSparseMatrix.SSparseMatrix import *
+import numpy
+import scipy
+
+mat = scipy.sparse.random(6, 4, density=0.5, format="csr", random_state=1)
+smat = SSparseMatrix(mat, row_names="r", column_names="c")
+smat32 = SSparseMatrix(mat, row_names="r", column_names="c", dtype=numpy.float32)
+
+
+class DataTypes(unittest.TestCase):
+
+    def test_policy_1(self):
+        # Verify the data type policy is preserved by the operations
+        self.assertTrue(smat32.dtype == numpy.float32 and
+                        smat32.dot(numpy.ones(4)).dtype == numpy.float32 and
+                        smat32.dot(smat.transpose()).dtype == numpy.float32 and
+                        smat32.multiply(smat).dtype == numpy.float32 and
+                        smat32.clip(0.1, 0.5).dtype == numpy.float32 and
+                        smat32.copy().unitize().dtype == numpy.float32 and
+                        smat32.row_bind(smat.copy().set_row_names("q")).dtype == numpy.float32 and
+                        smat32.impose_column_names(["c1", "x"]).dtype == numpy.float32)
+
+    def test_policy_2(self):
+        # Verify the values do not change, up to the precision
+        self.assertTrue(numpy.allclose(smat32.dot(numpy.arange(4)).sparse_matrix().toarray(),
+                                       smat.dot(numpy.arange(4)).sparse_matrix().toarray(), atol=1e-6))
+
+    def test_default_dtype_1(self):
+        set_default_dtype(numpy.float32)
+        try:
+            smat2 = SSparseMatrix(mat)
+            smat3 = SSparseMatrix(mat, dtype=None)
+        finally:
+            set_default_dtype(None)
+        self.assertTrue(smat2.dtype == numpy.float32 and smat3.dtype == numpy.float64 and
+                        get_default_dtype() is None)
+
+    def test_incidence_1(self):
+        # Verify boolean incidence matrices stay boolean and their products are counts
+        bmat = smat.copy().unitize(dtype=bool)
+        counts = bmat.dot(bmat.transpose())
+        self.assertTrue(bmat.dtype == bool and
+                        bmat[["r1", "r0"], :].dtype == bool and
+                        bmat.row_bind(bmat.copy().set_row_names("q")).dtype == bool and
+                        numpy.issubdtype(counts.dtype, numpy.floating) and
+                        numpy.allclose(counts.sparse_matrix().diagonal(), numpy.diff(mat.indptr)))
+
+    def test_incidence_2(self):
+        # Verify the arithmetic with boolean incidence matrices gives counts of the count data type
+        bmat = smat.copy().unitize(dtype=bool)
+        ones = smat.copy().unitize().sparse_matrix().toarray()
+        sums = bmat.add(bmat)
+        diffs = bmat.add(bmat.multiply(-1))
+        lazySums = bmat.lazy().add(bmat).subtract(bmat.lazy().multiply(3)).evaluate()
+        self.assertTrue(all([x.dtype == numpy.float32 for x in
+                             [sums, diffs, bmat.multiply(3), bmat.multiply(bmat), bmat.dot(bmat.transpose()),
+                              lazySums]]) and
+                        bmat.column_sums().dtype == numpy.float32 and bmat.row_sums().dtype == numpy.float32 and
+                        numpy.all(sums.sparse_matrix().toarray() == 2 * ones) and
+                        numpy.all(diffs.sparse_matrix().toarray() == 0) and
+                        numpy.all(lazySums.sparse_matrix().toarray() == -ones) and
+                        numpy.all(bmat.column_sums() == ones.sum(axis=0)))
+
+    def test_unitize_1(self):
+        # Verify the default unitize data types
+        self.assertTrue(smat.copy().unitize().dtype == numpy.float64 and
+                        SSparseMatrix(mat.astype(numpy.int64)).unitize().dtype == numpy.float64 and
+                        numpy.all(smat.copy().unitize().sparse_matrix().data == 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
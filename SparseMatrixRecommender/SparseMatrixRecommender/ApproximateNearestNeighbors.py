@@ -0,0 +1,286 @@
+import numpy
+import scipy
+from scipy import sparse
+from SSparseMatrix import is_s_sparse_matrix
+
+# ======================================================================
+# Hashing methods
+# ======================================================================
+# "LSH"     -- random projections (hyperplanes): the rows with a small angle between them
+#              have the same signs of projections with high probability (cosine similarity)
+# "MinHash" -- min-wise hashing of the non-zero columns: the rows with many common non-zero columns
+#              have the same minimum hash values with high probability (Jaccard similarity)
+_ANN_METHODS = {"lsh": "LSH", "minhash": "MinHash"}
+
+# The random projection codes of the hash tables are integers with that many bits at most
+_LSH_HASH_SIZE_MAX = 62
+
+# The hash values of min-wise hashing are smaller than that prime
+_MINHASH_PRIME = (1 << 61) - 1
+
+
+def is_approximate_nearest_neighbors(obj):
+    return isinstance(obj, ApproximateNearestNeighbors)
+
+
+def recall_at_k(exact, approximate, k=None):
+    """Recall at k of approximate search results with respect to exact ones.
+
+    :type exact: list
+    :param exact: A list of exact results; each result is a dictionary (or a list) of items in descending order.
+
+    :type approximate: list
+    :param approximate: A list of approximate results corresponding to the exact ones.
+
+    :type k: int|None
+    :param k: Number of top items to compare. If None all items of the results are compared.
+
+    :return: The mean over the results of the fractions of the top-k exact items found in the top-k approximate items.
+    """
+    if len(exact) != len(approximate):
+        raise ValueError("The arguments exact and approximate are expected to have the same length.")
+
+    recalls = []
+    for (e, a) in zip(exact, approximate):
+        e = list(e)[0:k]
+        a = set(list(a)[0:k])
+        recalls.append(1.0 if len(e) == 0 else len(a.intersection(e)) / len(e))
+
+    return float(numpy.mean(recalls)) if len(recalls) > 0 else 1.0
+
+
+def _query_row(query, ncols):
+    """A one-row CSR matrix from a query vector."""
+    if is_s_sparse_matrix(query):
+        query = query.sparse_matrix()
+    if scipy.sparse.issparse(query):
+        query = scipy.sparse.csr_matrix(query.reshape(1, -1))
+    else:
+        query = scipy.sparse.csr_matrix(numpy.asarray(query, dtype=numpy.float64).reshape(1, -1))
+
+    if query.shape[1] != ncols:
+        raise ValueError("The query vector is expected to have length %d." % ncols)
+
+    query.eliminate_zeros()
+    return query
+
+
+# ======================================================================
+# Class definition
+# ======================================================================
+class ApproximateNearestNeighbors:
+    """Approximate nearest neighbors index of the rows of a SSparseMatrix object.
+
+    The rows are hashed into n_tables hash tables; the codes of the tables are made of hash_size
+    random projection signs ("LSH"), or of hash_size minimum hash values ("MinHash").
+    The candidate nearest neighbors of a query vector are the rows in the same buckets as the query.
+
+    More tables give higher recall (and more candidates); larger hash sizes give smaller buckets,
+    i.e. fewer candidates and lower latency. For random projections the buckets that differ
+    from the query bucket by one of the least certain signs can be probed too (multi-probe).
+    """
+    _method = None
+    _nTables = None
+    _hashSize = None
+    _nProbes = None
+    _seed = None
+    _shape = None
+    _projections = None
+    _hashValues = None
+    _mixers = None
+    _tables = None
+
+    def __init__(self, method="LSH", n_tables=16, hash_size=12, n_probes=0, seed=None):
+        """Creation of an ApproximateNearestNeighbors object. (The index is made with create.)
+
+        :type method: str
+        :param method: Hashing method, one of "LSH" (random projections) or "MinHash" (min-wise hashing).
+
+        :type n_tables: int
+        :param n_tables: Number of hash tables.
+
+        :type hash_size: int
+        :param hash_size: Number of projections (bits) or minimum hashes per hash table.
+
+        :type n_probes: int
+        :param n_probes: Number of additional buckets probed per hash table. (Random projections only.)
+
+        :type seed: int|None
+        :param seed: Seed of the random projections or hash functions.
+        """
+        if not (isinstance(method, str) and method.lower() in _ANN_METHODS):
+            raise ValueError("The argument method is expected to be one of %s." % ", ".join(_ANN_METHODS.values()))
+
+        if not (isinstance(n_tables, int) and n_tables > 0):
+            raise TypeError("The argument n_tables is expected to be a positive integer.")
+
+        if not (isinstance(hash_size, int) and hash_size > 0):
+            raise TypeError("The argument hash_size is expected to be a positive integer.")
+
+        if method.lower() == "lsh" and hash_size > _LSH_HASH_SIZE_MAX:
+            raise ValueError("The argument hash_size is expected to be at most %d." % _LSH_HASH_SIZE_MAX)
+
+        self._method = _ANN_METHODS[method.lower()]
+        self._nTables = n_tables
+        self._hashSize = hash_size
+        self._nProbes = 0
+        self.set_number_of_probes(n_probes)
+        self._seed = seed
+
+    # ------------------------------------------------------------------
+    # Getters
+    # ------------------------------------------------------------------
+    def method(self):
+        """Hashing method."""
+        return self._method
+
+    def shape(self):
+        """Shape of the indexed matrix."""
+        return self._shape
+
+    def number_of_probes(self):
+        """Number of additional buckets probed per hash table."""
+        return self._nProbes
+
+    def bucket_sizes(self):
+        """Sizes of the buckets of all hash tables."""
+        return numpy.concatenate([numpy.unique(codes, return_counts=True)[1] for (codes, _) in self._tables])
+
+    # ------------------------------------------------------------------
+    # Setters
+    # ------------------------------------------------------------------
+    def set_number_of_probes(self, n_probes):
+        """Set the number of additional buckets probed per hash table. (A query time recall/latency trade-off.)"""
+        if not (isinstance(n_probes, int) and 0 <= n_probes <= self._hashSize):
+            raise TypeError("The number of probes is expected to be a non-negative integer not larger than hash_size.")
+        self._nProbes = n_probes
+        return self
+
+    # ------------------------------------------------------------------
+    # Hashing
+    # ------------------------------------------------------------------
+    def _signatures(self, csr):
+        """Projections (LSH) or minimum hash values (MinHash) of the rows of a CSR matrix.
+
+        :return: An array with shape (rows, n_tables * hash_size).
+        """
+        if self._method == "LSH":
+            return numpy.asarray(csr.dot(self._projections))
+
+        # Only the stored non-zero elements are hashed
+        if (csr.data == 0).any():
+            csr = csr.copy()
+            csr.eliminate_zeros()
+
+        res = numpy.full((csr.shape[0], self._nTables * self._hashSize), _MINHASH_PRIME, dtype=numpy.uint64)
+        counts = numpy.diff(csr.indptr)
+        nonEmpty = counts > 0
+        if nonEmpty.any():
+            res[nonEmpty] = numpy.minimum.reduceat(self._hashValues[csr.indices], csr.indptr[:-1][nonEmpty], axis=0)
+        return res
+
+    def _codes(self, signatures):
+        """Bucket codes of signatures. An array with shape (rows, n_tables)."""
+        sig = signatures.reshape(signatures.shape[0], self._nTables, self._hashSize)
+        if self._method == "LSH":
+            bits = numpy.left_shift(numpy.int64(1), numpy.arange(self._hashSize, dtype=numpy.int64))
+            return ((sig > 0) * bits).sum(axis=2)
+
+        # The products and the sums are modulo 2^64
+        return (sig * self._mixers).sum(axis=2, dtype=numpy.uint64)
+
+    # ------------------------------------------------------------------
+    # Creation
+    # ------------------------------------------------------------------
+    def create(self, smat, batch_size=100000):
+        """Make the hash tables of the rows of a SSparseMatrix object.
+
+        :type smat: SSparseMatrix
+        :param smat: A matrix with the rows to be indexed. (For MinHash only the non-zero pattern is used.)
+
+        :type batch_size: int
+        :param batch_size: Number of rows hashed at a time.
+
+        :rtype ApproximateNearestNeighbors
+        :return self: The object itself.
+        """
+        if not is_s_sparse_matrix(smat):
+            raise TypeError("The first argument is expected to be a SSparseMatrix object.")
+
+        if not (isinstance(batch_size, int) and batch_size > 0):
+            raise TypeError("The argument batch_size is expected to be a positive integer.")
+
+        csr = smat.sparse_matrix("csr")
+        nrows, ncols = csr.shape
+        rng = numpy.random.default_rng(self._seed)
+        nHashes = self._nTables * self._hashSize
+
+        if self._method == "LSH":
+            self._projections = rng.standard_normal((ncols, nHashes))
+        else:
+            self._hashValues = rng.integers(0, _MINHASH_PRIME, size=(ncols, nHashes), dtype=numpy.uint64)
+            self._mixers = rng.integers(1, _MINHASH_PRIME, size=self._hashSize, dtype=numpy.uint64) | numpy.uint64(1)
+
+        codes = [self._codes(self._signatures(csr[start:start + batch_size]))
+                 for start in range(0, nrows, batch_size)]
+        codes = numpy.vstack(codes) if len(codes) > 0 else numpy.empty((0, self._nTables), dtype=numpy.int64)
+
+        # Each hash table is the sorted codes and the row positions in the same order
+        self._tables = []
+        for t in range(self._nTables):
+            order = numpy.argsort(codes[:, t], kind="stable")
+            self._tables.append((codes[order, t], order))
+
+        self._shape = csr.shape
+        return self
+
+    # ------------------------------------------------------------------
+    # Query
+    # ------------------------------------------------------------------
+    def candidates(self, query, n_probes=None):
+        """Positions of the candidate nearest neighbor rows of a query vector.
+
+        :param query: A vector with length equal to the number of columns of the indexed matrix:
+        a SSparseMatrix object, a scipy sparse matrix, a list, or a NumPy array.
+
+        :type n_probes: int|None
+        :param n_probes: Number of additional buckets probed per hash table. If None the set number is used.
+
+        :return: A sorted NumPy array of row positions.
+        """
+        if self._tables is None:
+            raise ValueError("The index is not made. (Use create.)")
+
+        n_probes = self._nProbes if n_probes is None else n_probes
+        query = _query_row(query, self._shape[1])
+        if query.nnz == 0:
+            return numpy.empty(0, dtype=numpy.intp)
+
+        sig = self._signatures(query)
+        codes = self._codes(sig)[0]
+
+        if self._method == "LSH" and n_probes > 0:
+            # Flip the bits of the projections closest to the hyperplanes
+            margins = numpy.abs(sig[0].reshape(self._nTables, self._hashSize))
+            flips = numpy.argsort(margins, axis=1, kind="stable")[:, 0:n_probes]
+            probes = numpy.bitwise_xor(codes[:, None], numpy.left_shift(numpy.int64(1), flips.astype(numpy.int64)))
+            codes = numpy.column_stack([codes, probes])
+        else:
+            codes = codes[:, None]
+
+        res = []
+        for (t, (tableCodes, positions)) in enumerate(self._tables):
+            lo = numpy.searchsorted(tableCodes, codes[t], side="left")
+            hi = numpy.searchsorted(tableCodes, codes[t], side="right")
+            res.extend([positions[a:b] for (a, b) in zip(lo, hi) if b > a])
+
+        if len(res) == 0:
+            return numpy.empty(0, dtype=numpy.intp)
+        return numpy.unique(numpy.concatenate(res)).astype(numpy.intp)
+
+    # ------------------------------------------------------------------
+    # Representation
+    # ------------------------------------------------------------------
+    def __repr__(self):
+        return "<ApproximateNearestNeighbors (%s) with %d hash tables of hash size %d over shape %s>" % \
+               (self._method, self._nTables, self._hashSize, self._shape)
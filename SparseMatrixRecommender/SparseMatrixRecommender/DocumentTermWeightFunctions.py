@@ -2,91 +2,104 @@ from SSparseMatrix import SSparseMatrix
 from SSparseMatrix import is_s_sparse_matrix
 import scipy
 import numpy
-import math
 
 
 # ===========================================================
 # Utility functions
 # ===========================================================
 def _normalize_sparse_by_max(smat, abs_max=False):
-    nonzero_rows = smat.nonzero()[0]
-    for idx in numpy.unique(nonzero_rows):
-        data_idx = numpy.where(nonzero_rows == idx)[0]
-        if abs_max:
-            myMax = numpy.max(numpy.abs(smat.data[data_idx]))
-        else:
-            myMax = numpy.max(smat.data[data_idx])
-        if myMax != 0:
-            smat.data[data_idx] = 1. / myMax * smat.data[data_idx]
+    smat = scipy.sparse.csr_matrix(smat, dtype=numpy.result_type(smat.dtype, numpy.float64))
+    smat.sum_duplicates()
+    smat.eliminate_zeros()
+
+    counts = numpy.diff(smat.indptr)
+    starts = smat.indptr[:-1][counts > 0]
+    if len(starts) == 0:
+        return smat
+
+    # The maximum of each non-empty row
+    values = numpy.abs(smat.data) if abs_max else smat.data
+    rowMax = numpy.maximum.reduceat(values, starts)
+
+    scale = numpy.divide(1., rowMax, out=numpy.ones_like(rowMax), where=rowMax != 0)
+    smat.data *= scale.repeat(counts[counts > 0])
     return smat
 
 
+def _safe_reciprocal(x):
+    """Element-wise reciprocal of an array; the zeros are replaced with ones."""
+    x = numpy.asarray(x, dtype=numpy.float64)
+    return numpy.divide(1., x, out=numpy.ones_like(x), where=x != 0)
+
+
 # ===========================================================
 # Global weights
 # ===========================================================
-def global_term_function_weights(doc_term_matrix, func="None"):
-    """Find the global term function weights for a specified SSparseMatrix object and function name."""
+def global_term_statistics(doc_term_matrix):
+    """Column statistics of a SSparseMatrix object that the global term weight functions are computed with.
+
+    The statistics of a matrix with more rows are the sums of the statistics of its parts,
+    hence, they can be updated when rows are added or removed.
+
+    :return: A dictionary with the number of rows ("rows_count"), and arrays of the numbers of non-zero
+    elements ("counts"), the sums ("sums"), and the sums of squares ("squares") of the columns.
+    """
     if not isinstance(doc_term_matrix, SSparseMatrix):
         raise TypeError("The argument docTermMat is expected to be a SSparseMatrix object.")
 
+    smat = doc_term_matrix.sparse_matrix("csc")
+    if not smat.has_canonical_format:
+        smat = smat.copy()
+        smat.sum_duplicates()
+
+    ncols = smat.shape[1]
+    cols = numpy.repeat(numpy.arange(ncols), numpy.diff(smat.indptr))
+    data = smat.data.astype(numpy.float64)
+    return {"rows_count": smat.shape[0],
+            "counts": numpy.bincount(cols, weights=data != 0, minlength=ncols),
+            "sums": numpy.bincount(cols, weights=data, minlength=ncols),
+            "squares": numpy.bincount(cols, weights=data * data, minlength=ncols)}
+
+
+def global_term_function_weights_by_statistics(statistics, func="None"):
+    """Find the global term function weights for specified column statistics and function name.
+    (See global_term_statistics.)"""
+    if not (isinstance(statistics, dict) and
+            all([x in statistics for x in ["rows_count", "counts", "sums", "squares"]])):
+        raise TypeError("""The argument statistics is expected to be a dictionary with keys:
+        'rows_count', 'counts', 'sums', 'squares'.""")
+
     if not isinstance(func, str):
         raise TypeError("The argument func is expected to be a string.")
 
-    mat = doc_term_matrix.copy()
+    nrows = statistics["rows_count"]
+    counts = numpy.asarray(statistics["counts"], dtype=numpy.float64)
 
     if func.lower() == "IDF".lower():
 
-        mat.unitize()
-        globalWeights = mat.column_sums()
-        globalWeights2 = []
-        for x in globalWeights:
-            if x > 0:
-                globalWeights2.append(math.log(mat.rows_count() / x, 2))
-            else:
-                globalWeights2.append(1)
-
-        return globalWeights2
+        globalWeights = numpy.log2(nrows * _safe_reciprocal(counts),
+                                   out=numpy.ones_like(counts),
+                                   where=counts > 0)
 
     elif func.lower() == "IDF_smooth".lower():
 
-        mat.unitize()
-        globalWeights = mat.column_sums()
-        globalWeights = [math.log(mat.rows_count() / (1.0 + x), 2) + 1 for x in globalWeights]
-
-        return globalWeights
+        globalWeights = numpy.log2(nrows / (1.0 + counts)) + 1
 
     elif func.lower() == "GFIDF".lower():
 
-        freqSums = mat.column_sums()
-        mat.unitize()
-        globalWeights = mat.column_sums()
-        globalWeights = [1 if x == 0 else x for x in globalWeights]
-        globalWeights = [x[0] / x[1] for x in zip(freqSums, globalWeights)]
-
-        return globalWeights
+        globalWeights = statistics["sums"] * _safe_reciprocal(counts)
 
     elif func.lower() == "Normal".lower():
 
-        globalWeights = [math.sqrt(x) for x in mat.multiply(mat).column_sums()]
-        globalWeights = [1 if x == 0 else x for x in globalWeights]
-        globalWeights = [1 / x for x in globalWeights]
-
-        return globalWeights
+        globalWeights = _safe_reciprocal(numpy.sqrt(statistics["squares"]))
 
     elif func.lower() == "Binary".lower() or func.lower() == "None".lower():
 
-        globalWeights = [1 for x in range(mat.columns_count())]
-
-        return globalWeights
+        globalWeights = numpy.ones(len(counts))
 
     elif func.lower() == "ColumnStochastic".lower() or func.lower() == "Sum".lower():
 
-        mat.unitize()
-        globalWeights = mat.column_sums()
-        globalWeights = [1 if x == 0 else x for x in globalWeights]
-        globalWeights = [1 / x for x in globalWeights]
-
-        return globalWeights
+        globalWeights = _safe_reciprocal(counts)
 
     elif func.lower() == "Entropy".lower():
         raise TypeError("Global weight function Entropy is not implemented.")
@@ -94,10 +107,20 @@ def global_term_function_weights(doc_term_matrix, func="None"):
     else:
         raise TypeError("Unknown global weight function specification for the argument func.")
 
-    # Should not be reached
     return globalWeights
 
 
+def global_term_function_weights(doc_term_matrix, func="None"):
+    """Find the global term function weights for a specified SSparseMatrix object and function name."""
+    if not isinstance(doc_term_matrix, SSparseMatrix):
+        raise TypeError("The argument docTermMat is expected to be a SSparseMatrix object.")
+
+    if not isinstance(func, str):
+        raise TypeError("The argument func is expected to be a string.")
+
+    return global_term_function_weights_by_statistics(global_term_statistics(doc_term_matrix), func=func)
+
+
 def apply_term_weight_functions(doc_term_matrix,
                                 global_weight_func="None",
                                 local_weight_func="None",
@@ -115,8 +138,9 @@ def apply_term_weight_functions(doc_term_matrix,
     # Global weights set-up.
     if isinstance(global_weight_func, str):
         globalWeights = global_term_function_weights(doc_term_matrix=doc_term_matrix, func=global_weight_func)
-    elif isinstance(global_weight_func, list) and len(global_weight_func) == doc_term_matrix.columns_count():
-        globalWeights = global_weight_func
+    elif isinstance(global_weight_func, (list, numpy.ndarray)) and \
+            len(global_weight_func) == doc_term_matrix.columns_count():
+        globalWeights = numpy.asarray(global_weight_func)
     else:
         raise TypeError("""The argument global_weight_func is expected to be a string 
         or a numeric vector with length that equals docTermMat.columns_count()""")
@@ -128,8 +152,7 @@ def apply_term_weight_functions(doc_term_matrix,
     if local_weight_func.lower() == "Log".lower() or local_weight_func.lower() == "Logarithmic".lower():
 
         smat = mat.sparse_matrix()
-        smat.data = [x + 1 for x in smat.data]
-        smat.data = numpy.log(smat.data)
+        smat.data = numpy.log(smat.data + 1.0)
         mat.set_sparse_matrix(smat)
 
     elif not (local_weight_func.lower() == "TermFrequency".lower() or local_weight_func.lower() == "None".lower()):
@@ -139,23 +162,21 @@ def apply_term_weight_functions(doc_term_matrix,
     # Multiply with the global weights
     diagMat = scipy.sparse.diags(diagonals=[globalWeights], offsets=[0])
     mat = mat.dot(diagMat)
-    mat.set_column_names(doc_term_matrix.column_names())
+    mat.set_column_names(doc_term_matrix.column_names_index())
 
     # Normalizing.
     if normalizer_func.lower() == "Cosine".lower():
 
-        svec = numpy.sqrt(mat.multiply(mat).row_sums())
-        svec = [1 if x == 0 else 1 / x for x in svec]
+        svec = _safe_reciprocal(numpy.sqrt(mat.multiply(mat).row_sums()))
         diagMat = scipy.sparse.diags(diagonals=[svec], offsets=[0])
-        diagMat = SSparseMatrix(diagMat, row_names=mat.row_names(), column_names=mat.row_names())
+        diagMat = SSparseMatrix(diagMat, row_names=mat.row_names_index(), column_names=mat.row_names_index())
         mat = diagMat.dot(mat)
 
     elif normalizer_func.lower() == "Sum".lower() or normalizer_func.lower() == "RowStochastic".lower():
 
-        svec = mat.row_sums()
-        svec = [1 if x == 0 else 1 / x for x in svec]
+        svec = _safe_reciprocal(mat.row_sums())
         diagMat = scipy.sparse.diags(diagonals=[svec], offsets=[0])
-        diagMat = SSparseMatrix(diagMat, row_names=mat.row_names(), column_names=mat.row_names())
+        diagMat = SSparseMatrix(diagMat, row_names=mat.row_names_index(), column_names=mat.row_names_index())
         mat = diagMat.dot(mat)
 
     elif normalizer_func.lower() == "Max".lower() or normalizer_func.lower() == "Maximum".lower():
@@ -0,0 +1,222 @@
+import numpy
+import scipy
+from SSparseMatrix import is_s_sparse_matrix
+
+
+def is_posting_list_index(obj):
+    return isinstance(obj, PostingListIndex)
+
+
+def _gather_ranges(starts, ends):
+    """Concatenation of the index ranges [starts[i], ends[i]), and the offsets of the ranges in it."""
+    lengths = ends - starts
+    offsets = numpy.cumsum(lengths) - lengths
+    total = int(lengths.sum())
+    inds = numpy.arange(total, dtype=numpy.int64) + numpy.repeat(starts - offsets, lengths)
+    return inds, offsets, lengths
+
+
+def _sorted_unique(x):
+    """Unique elements of a sorted array."""
+    if len(x) == 0:
+        return x
+    return x[numpy.concatenate([[True], x[1:] != x[:-1]])]
+
+
+# ======================================================================
+# Class definition
+# ======================================================================
+class PostingListIndex:
+    """Inverted index of the columns of a SSparseMatrix object: for each column the sorted positions of
+    the rows with non-zero elements (the posting list of the column.)
+
+    The positions of each posting list are stored as differences with the previous ones (delta encoding)
+    with the smallest unsigned integer type that fits them. The posting lists are split into blocks of
+    block_size positions, and the first position of each block (the block head) is stored as it is.
+    The block heads are skip pointers: the intersections of posting lists are found with binary searches
+    over the block heads, and only the blocks that can have common positions are decoded.
+    """
+    _blockSize = None
+    _shape = None
+    _indptr = None
+    _blockIndptr = None
+    _blockStarts = None
+    _heads = None
+    _deltas = None
+
+    def __init__(self, block_size=128):
+        """Creation of a PostingListIndex object. (The index is made with create.)
+
+        :type block_size: int
+        :param block_size: Number of positions per block of the posting lists.
+        """
+        if not (isinstance(block_size, int) and block_size > 0):
+            raise TypeError("The argument block_size is expected to be a positive integer.")
+
+        self._blockSize = block_size
+
+    # ------------------------------------------------------------------
+    # Getters
+    # ------------------------------------------------------------------
+    def block_size(self):
+        """Number of positions per block of the posting lists."""
+        return self._blockSize
+
+    def shape(self):
+        """Shape of the indexed matrix."""
+        return self._shape
+
+    def lengths(self):
+        """Lengths of the posting lists of the columns."""
+        return numpy.diff(self._indptr)
+
+    def nbytes(self):
+        """Number of bytes of the arrays of the index."""
+        return sum([x.nbytes for x in [self._indptr, self._blockIndptr, self._blockStarts, self._heads, self._deltas]])
+
+    # ------------------------------------------------------------------
+    # Creation
+    # ------------------------------------------------------------------
+    def create(self, smat):
+        """Make the posting lists of the columns of a SSparseMatrix object.
+
+        :type smat: SSparseMatrix
+        :param smat: A matrix. (Only the non-zero pattern is used.)
+
+        :rtype PostingListIndex
+        :return self: The object itself.
+        """
+        if not is_s_sparse_matrix(smat):
+            raise TypeError("The first argument is expected to be a SSparseMatrix object.")
+
+        csc = smat.sparse_matrix("csc")
+        if not csc.has_canonical_format or (csc.data == 0).any():
+            csc = scipy.sparse.csc_matrix(csc, copy=True)
+            csc.sum_duplicates()
+            csc.eliminate_zeros()
+
+        nrows, ncols = csc.shape
+        indptr = csc.indptr.astype(numpy.int64)
+        indices = csc.indices.astype(numpy.int64)
+        lengths = numpy.diff(indptr)
+
+        # Blocks of each column
+        nBlocks = -(-lengths // self._blockSize)
+        blockIndptr = numpy.concatenate([[0], numpy.cumsum(nBlocks)]).astype(numpy.int64)
+        blockOffsets = numpy.arange(blockIndptr[-1], dtype=numpy.int64) - numpy.repeat(blockIndptr[:-1], nBlocks)
+        blockStarts = numpy.repeat(indptr[:-1], nBlocks) + blockOffsets * self._blockSize
+
+        # Delta encoding within the columns (the first positions are block heads)
+        deltas = numpy.diff(indices, prepend=0)
+        deltas[indptr[:-1][lengths > 0]] = 0
+        maxDelta = int(deltas.max()) if len(deltas) > 0 else 0
+
+        self._shape = csc.shape
+        self._indptr = indptr
+        self._blockIndptr = blockIndptr
+        self._blockStarts = numpy.append(blockStarts, len(indices))
+        self._heads = indices[blockStarts].astype(numpy.min_scalar_type(max(nrows - 1, 0)))
+        self._deltas = deltas.astype(numpy.min_scalar_type(maxDelta))
+        return self
+
+    # ------------------------------------------------------------------
+    # Decoding
+    # ------------------------------------------------------------------
+    def _decode_blocks(self, blocks):
+        """Positions of the given blocks. (The positions are sorted if the blocks are of the same column.)"""
+        inds, offsets, lengths = _gather_ranges(self._blockStarts[blocks], self._blockStarts[blocks + 1])
+        sums = numpy.cumsum(self._deltas[inds], dtype=numpy.int64)
+        return sums - numpy.repeat(sums[offsets] - self._heads[blocks].astype(numpy.int64), lengths)
+
+    def _column_blocks(self, column):
+        return numpy.arange(self._blockIndptr[column], self._blockIndptr[column + 1])
+
+    def _decode_column(self, column):
+        """Positions of a column. (All blocks of the column are decoded with one cumulative sum.)"""
+        if self._indptr[column] == self._indptr[column + 1]:
+            return numpy.empty(0, dtype=numpy.int64)
+        head = numpy.int64(self._heads[self._blockIndptr[column]])
+        return numpy.cumsum(self._deltas[self._indptr[column]:self._indptr[column + 1]], dtype=numpy.int64) + head
+
+    def postings(self, column):
+        """The posting list of a column: a sorted NumPy array of row positions."""
+        if self._shape is None:
+            raise ValueError("The index is not made. (Use create.)")
+
+        if not (isinstance(column, (int, numpy.integer)) and 0 <= column < self._shape[1]):
+            raise ValueError("The argument column is expected to be a column position.")
+
+        return self._decode_column(column)
+
+    # ------------------------------------------------------------------
+    # Query
+    # ------------------------------------------------------------------
+    def _intersect(self, candidates, column):
+        """The candidates that are in the posting list of a column. (The candidates are sorted.)"""
+        blocks = self._column_blocks(column)
+        if len(blocks) == 0:
+            return candidates[0:0]
+
+        if len(candidates) < len(blocks):
+            # Skip to the block of each candidate with a binary search over the block heads
+            heads = self._heads[blocks[0]:blocks[-1] + 1]
+            b = numpy.searchsorted(heads, candidates, side="right") - 1
+            candidates = candidates[b >= 0]
+            b = b[b >= 0]
+
+            # Decode the blocks with candidates only
+            values = self._decode_blocks(blocks[_sorted_unique(b)])
+        else:
+            # Most of the blocks have candidates
+            values = self._decode_column(column)
+
+        pos = numpy.minimum(numpy.searchsorted(values, candidates), len(values) - 1)
+        return candidates[values[pos] == candidates]
+
+    def _columns(self, columns):
+        if self._shape is None:
+            raise ValueError("The index is not made. (Use create.)")
+
+        columns = _sorted_unique(numpy.sort(numpy.asarray(columns, dtype=numpy.int64)))
+        if len(columns) > 0 and (columns[0] < 0 or columns[-1] >= self._shape[1]):
+            raise ValueError("The argument columns is expected to be a list of column positions.")
+        return columns
+
+    def intersection(self, columns):
+        """Positions of the rows that are in all posting lists of the given columns.
+
+        The posting lists are intersected from the shortest to the longest one.
+        (The intersection of no posting lists has all rows.)
+
+        :param columns: A list or a NumPy array of column positions.
+        :return: A sorted NumPy array of row positions.
+        """
+        columns = self._columns(columns)
+        if len(columns) == 0:
+            return numpy.arange(self._shape[0], dtype=numpy.int64)
+
+        columns = columns[numpy.argsort(numpy.diff(self._indptr)[columns], kind="stable")]
+        res = self.postings(int(columns[0]))
+        for c in columns[1:]:
+            if len(res) == 0:
+                break
+            res = self._intersect(res, c)
+        return res
+
+    def union(self, columns):
+        """Positions of the rows that are in at least one of the posting lists of the given columns.
+
+        :param columns: A list or a NumPy array of column positions.
+        :return: A sorted NumPy array of row positions.
+        """
+        columns = self._columns(columns)
+        res = numpy.zeros(self._shape[0], dtype=bool)
+        for c in columns:
+            res[self._decode_column(c)] = True
+        return numpy.flatnonzero(res)
+
+    # ------------------------------------------------------------------
+    # Representation
+    # ------------------------------------------------------------------
+    def __repr__(self):
+        return "<PostingListIndex with block size %d over shape %s>" % (self._blockSize, self._shape)
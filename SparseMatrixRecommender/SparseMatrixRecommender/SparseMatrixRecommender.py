@@ -1,8 +1,24 @@
 from SSparseMatrix import SSparseMatrix
+from SSparseMatrix import NameIndex
 from SSparseMatrix import column_bind
 from SSparseMatrix import is_s_sparse_matrix
+from SSparseMatrix import is_chunked_s_sparse_matrix
+from SSparseMatrix.BinaryContainer import decode_names
+from SSparseMatrix.BinaryContainer import encode_names
+from SSparseMatrix.BinaryContainer import read_binary_container
+from SSparseMatrix.BinaryContainer import write_binary_container
+from .ApproximateNearestNeighbors import ApproximateNearestNeighbors
+from .ApproximateNearestNeighbors import recall_at_k
+from .PostingListIndex import PostingListIndex
 from .CrossTabulate import cross_tabulate
 from .DocumentTermWeightFunctions import apply_term_weight_functions
+from .DocumentTermWeightFunctions import global_term_function_weights_by_statistics
+from .DocumentTermWeightFunctions import global_term_statistics
+import copy
+import itertools
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy
 import pandas
 import scipy
 import warnings
@@ -39,8 +55,396 @@ def _get_non_zero_rows(ssmat):
     return dict(zip(rns2, smat.data))
 
 
-def _reverse_sort_dict(x):
-    return dict([(k, v) for k, v in sorted(x.items(), key=lambda item: -item[1])])
+def _reverse_sort_positions(scores, positions):
+    """Sort positions by descending scores. (The positions with equal scores keep their order.)"""
+    return positions[numpy.argsort(-scores[positions], kind="stable")]
+
+
+def _top_k_positions(scores, positions, k=None):
+    """Positions of the k largest scores in descending order. (The positions with equal scores keep their order.)
+
+    If k is an integer smaller than the number of positions, the k largest scores are found with
+    numpy.argpartition and only they are sorted. The result is the same as the one of the full sort.
+    """
+    if k is None or k >= len(positions):
+        return _reverse_sort_positions(scores, positions)
+    if k <= 0:
+        return positions[0:0]
+
+    values = scores[positions]
+    kth = values[numpy.argpartition(-values, k - 1)[k - 1]]
+
+    # The scores larger than the k-th one, and the first of the scores equal to it
+    above = positions[values > kth]
+    ties = positions[values == kth][0:k - len(above)]
+    return _reverse_sort_positions(scores, numpy.concatenate([above, ties]))
+
+
+def _scores_dict(names_index, scores, positions):
+    """Dictionary of the names to the scores at the given positions."""
+    return dict(zip(names_index.array()[positions].tolist(), scores[positions].tolist()))
+
+
+def _split_queries(queries):
+    """Split a batch of queries into query keys (or None) and a list of queries.
+
+    :param queries: A list of queries, or a dictionary of query keys to queries.
+    """
+    if isinstance(queries, dict):
+        return list(queries.keys()), list(queries.values())
+    elif isinstance(queries, (list, tuple)):
+        return None, list(queries)
+    raise TypeError("The first argument is expected to be a list of queries, a dictionary of queries, "
+                    "or a SSparseMatrix object.")
+
+
+def _batch_top_k(smat, nrecs, normalize_by):
+    """Top-k recommendations for each column of a (items x queries) scipy sparse matrix.
+
+    :param smat: Sparse matrix of scores with the queries as columns.
+    :param nrecs: Number of recommendations per query, or None for all.
+    :param normalize_by: One of None, "top" (the maximum of the recommendations, applied
+    only if the recommendations are truncated), or an array of the column scales.
+    :return: A pair of arrays with positions and scores, and an array with the column offsets into them.
+    """
+    csc = scipy.sparse.csc_matrix(smat)
+    csc.sum_duplicates()
+
+    # Take the positive scores only
+    csc.data[csc.data < 0] = 0
+    csc.eliminate_zeros()
+
+    counts = numpy.diff(csc.indptr)
+    k = int(counts.max()) if nrecs is None and len(counts) > 0 else nrecs
+    if not k:
+        return numpy.empty(0, dtype=numpy.intp), numpy.empty(0), numpy.zeros(csc.shape[1] + 1, dtype=numpy.intp)
+
+    # The transpose of the CSC matrix is a CSR matrix with one row per query
+    top = SSparseMatrix(csc.transpose()).row_top_k(k).sparse_matrix("csr")
+    topCounts = numpy.diff(top.indptr)
+    offsets = top.indptr.astype(numpy.intp)
+
+    # Sort each query by descending scores (the equal scores keep the item order)
+    order = numpy.lexsort((-top.data, numpy.repeat(numpy.arange(len(topCounts)), topCounts)))
+    positions = top.indices[order].astype(numpy.intp)
+    vals = top.data[order].astype(numpy.float64)
+
+    if isinstance(normalize_by, str):
+        # The first score of each truncated query is its maximum
+        scale = numpy.ones(len(counts))
+        truncated = counts > topCounts
+        scale[truncated] = vals[offsets[:-1][truncated]]
+    elif normalize_by is not None:
+        scale = numpy.where(normalize_by > 0, normalize_by, 1)
+    else:
+        scale = None
+
+    if scale is not None:
+        vals = vals / scale.repeat(topCounts)
+
+    return positions, vals, offsets
+
+
+def _batch_result(keys, names_index, positions, scores, offsets):
+    """Dictionaries of scored names for each query; a list of them, or a dictionary if keys are given."""
+    names = names_index.array()[positions].tolist()
+    scores = scores.tolist()
+    res = [dict(zip(names[offsets[i]:offsets[i + 1]], scores[offsets[i]:offsets[i + 1]]))
+           for i in range(len(offsets) - 1)]
+    return res if keys is None else dict(zip(keys, res))
+
+
+# The transposed recommendation matrix used by the nearest neighbors and item similarity worker processes
+_nnsMatrixT = None
+
+
+def _nearest_neighbors_init(mat_t):
+    global _nnsMatrixT
+    _nnsMatrixT = mat_t
+
+
+def _nearest_neighbors_block(block, k, mat_t=None):
+    """Top-k nearest neighbors of the items of a block of rows of the recommendation matrix.
+
+    The neighbors are the same as the ones of recommend(item, nrecs=k, remove_history=False, normalize=True):
+    only the positive scores are taken, and they are normalized with the maximum score of the item
+    if more than k items have positive scores.
+
+    :return: A CSR matrix with the rows of the block and all items as columns.
+    """
+    scores = block.dot(_nnsMatrixT if mat_t is None else mat_t)
+    smat = scores.sparse_matrix("csr").copy()
+    smat.sum_duplicates()
+    smat.data[smat.data < 0] = 0
+    smat.eliminate_zeros()
+    scores.set_sparse_matrix(smat)
+
+    top = scores.row_top_k(k).sparse_matrix("csr")
+    counts = numpy.diff(smat.indptr)
+    topCounts = numpy.diff(top.indptr)
+
+    # The maximum score of each truncated row
+    scale = numpy.ones(len(counts))
+    truncated = counts > topCounts
+    if truncated.any():
+        rowMax = numpy.maximum.reduceat(top.data, top.indptr[:-1][topCounts > 0])
+        scale[topCounts > 0] = rowMax
+        scale[~truncated] = 1
+    top.data = top.data / scale.repeat(topCounts)
+
+    return top
+
+
+def _item_similarity_block(block, k, backend=None, n_threads=None, mat_t=None):
+    """Top-k similarities of the items of a block of rows of the recommendation matrix with all items.
+
+    :return: A CSR matrix with the rows of the block and all items as columns.
+    """
+    scores = block.dot(_nnsMatrixT if mat_t is None else mat_t, backend=backend, n_threads=n_threads)
+    return scores.row_top_k(k).sparse_matrix("csr")
+
+
+def _known_positions(arg, names_index, thing_name, ignore_unknown=False):
+    """Positions and scores of the known names of a dictionary of scored names.
+
+    :type names_index: NameIndex
+    :param names_index: The names of a matrix axis.
+    :param thing_name: Which matrix axis, one of "column" or "row".
+    :return: A pair of NumPy arrays.
+    """
+    names_dict = names_index.names_dict()
+
+    known_keys = {key: value for (key, value) in arg.items() if key in names_dict}
+    if len(known_keys) == 0:
+        raise LookupError("None of the tags is a valid recommendation matrix " + thing_name + " name.")
+    elif len(known_keys) < len(arg) and not ignore_unknown:
+        raise LookupError("Not all tags are valid recommendation matrix " + thing_name + " names.")
+
+    positions = numpy.fromiter((names_dict[k] for k in known_keys), dtype=numpy.intp, count=len(known_keys))
+    return positions, numpy.array(list(known_keys.values()))
+
+
+def _incidence_counts(inc, columns):
+    """Number of the given columns of a CSC incidence matrix in which each row has stored elements."""
+    rows = [inc.indices[inc.indptr[c]:inc.indptr[c + 1]] for c in columns]
+    rows = numpy.concatenate(rows) if len(rows) > 0 else numpy.empty(0, dtype=numpy.intp)
+    return numpy.bincount(rows, minlength=inc.shape[0])
+
+
+def _column_scores(csc, columns, weights):
+    """Row scores of a linear combination of the given columns of a CSC matrix. (A dense NumPy array.)"""
+    rows = [csc.indices[csc.indptr[c]:csc.indptr[c + 1]] for c in columns]
+    vals = [w * csc.data[csc.indptr[c]:csc.indptr[c + 1]] for (c, w) in zip(columns, weights)]
+    if len(rows) == 0:
+        return numpy.zeros(csc.shape[0])
+    return numpy.bincount(numpy.concatenate(rows), weights=numpy.concatenate(vals), minlength=csc.shape[0])
+
+
+def _chunked_incidence_counts(chunked, columns):
+    """Number of the given columns of a ChunkedSSparseMatrix object in which each row has non-zero elements.
+    (The counts are made block by block.)"""
+    counts = [(b.sparse_matrix("csr")[:, columns] != 0).getnnz(axis=1) for b in chunked.iter_blocks()]
+    return numpy.concatenate(counts) if len(counts) > 0 else numpy.zeros(chunked.rows_count(), dtype=numpy.intp)
+
+
+def _chunked_column_scores(chunked, columns, weights):
+    """Row scores of a linear combination of the given columns of a ChunkedSSparseMatrix object.
+    (A dense NumPy array; the scores are made block by block.)"""
+    scores = [numpy.asarray(b.sparse_matrix("csr")[:, columns].dot(weights)).ravel() for b in chunked.iter_blocks()]
+    return numpy.concatenate(scores) if len(scores) > 0 else numpy.zeros(chunked.rows_count())
+
+
+def _csr_with_shape(smat, shape):
+    """A CSR matrix with more rows or columns that has the elements of a scipy sparse matrix."""
+    csr = scipy.sparse.csr_matrix(smat)
+    indptr = numpy.concatenate([csr.indptr, numpy.repeat(csr.indptr[-1], shape[0] - csr.shape[0])])
+    return scipy.sparse.csr_matrix((csr.data, csr.indices, indptr), shape=shape)
+
+
+def _replace_rows(smat, positions, rows, shape):
+    """Replace the rows of a scipy sparse matrix at the given positions with the rows of another one.
+
+    :param smat: Sparse matrix; its rows and columns are the first ones of the result.
+    :param positions: Row positions in the result (of the rows of the argument rows.)
+    :param rows: Sparse matrix with the new rows; its columns are the ones of the result.
+    :param shape: Shape of the result.
+    :return: A CSR matrix.
+    """
+    coo = scipy.sparse.coo_matrix(smat)
+    replaced = numpy.zeros(shape[0], dtype=bool)
+    replaced[positions] = True
+    keep = ~replaced[coo.row]
+
+    rowsCoo = scipy.sparse.coo_matrix(rows)
+    res = scipy.sparse.csr_matrix((numpy.concatenate([coo.data[keep], rowsCoo.data]),
+                                   (numpy.concatenate([coo.row[keep], positions[rowsCoo.row]]),
+                                    numpy.concatenate([coo.col[keep], rowsCoo.col]))),
+                                  shape=shape)
+    return res
+
+
+def _update_statistics(statistics, added=None, removed=None, rows_count=None, columns_count=None):
+    """Update the column statistics of the global term weight functions with added and removed rows.
+
+    :param added: Scipy sparse matrix with the added rows, or None.
+    :param removed: Scipy sparse matrix with the removed rows, or None.
+    :param rows_count: The new number of rows.
+    :param columns_count: The new number of columns. (The statistics of the new columns are zeros.)
+    """
+    res = {"rows_count": rows_count}
+    for k in ["counts", "sums", "squares"]:
+        res[k] = numpy.concatenate([statistics[k], numpy.zeros(columns_count - len(statistics[k]))])
+
+    for (smat, sign) in [(added, 1), (removed, -1)]:
+        if smat is not None and smat.nnz > 0:
+            stats = global_term_statistics(SSparseMatrix(_csr_with_shape(smat, (smat.shape[0], columns_count))))
+            for k in ["counts", "sums", "squares"]:
+                res[k] = res[k] + sign * stats[k]
+
+    return res
+
+
+def _row_scores(smat):
+    """Row positions and scores (row sums) of the rows of a SSparseMatrix object that have stored elements.
+
+    The positions are in ascending order. For one-column matrices the stored elements are used directly,
+    hence, no dense vector with all rows is made.
+    """
+    if smat.columns_count() == 1:
+        csc = smat.sparse_matrix("csc")
+        if not csc.has_canonical_format:
+            csc = csc.copy()
+            csc.sum_duplicates()
+        return csc.indices.astype(numpy.intp), csc.data
+
+    scores = smat.row_sums()
+    positions = numpy.flatnonzero(scores)
+    return positions, scores[positions]
+
+
+def _top_k_rows(smat, positions, scores, k, factor=1):
+    """The rows of a SSparseMatrix object with the k largest scores; the rest of the rows are empty.
+
+    The positions and the scores are the ones given by _row_scores, the scores scaled with factor.
+    The selected rows are scaled with factor too. The rows without stored elements
+    have zero scores, hence, they are taken before the rows with negative scores. The result has the same
+    shape and names as the argument; it is made directly from the selected rows, without slicing by names.
+    """
+    n = smat.rows_count()
+    nEmpty = n - len(positions)
+    candidates = numpy.arange(len(positions))
+    if nEmpty > 0:
+        if nEmpty + numpy.count_nonzero(scores >= 0) >= k:
+            candidates = numpy.flatnonzero(scores >= 0)
+        else:
+            # All empty rows are taken
+            k = k - nEmpty
+    top = _top_k_positions(scores, candidates, k)
+
+    if smat.columns_count() == 1:
+        mat = scipy.sparse.csr_matrix((scores[top], (positions[top], numpy.zeros(len(top), dtype=numpy.intp))),
+                                      shape=(n, 1))
+    else:
+        # Zero the rows that are not selected, and scale the selected ones
+        factors = numpy.zeros(n)
+        factors[positions[top]] = factor
+        mat = scipy.sparse.diags(factors).tocsr().dot(smat.sparse_matrix("csr"))
+        mat.eliminate_zeros()
+
+    return SSparseMatrix(mat, row_names=smat.row_names_index(), column_names=smat.column_names_index())
+
+
+def _scale_in_place(smat, factor):
+    """Scale the stored elements of a SSparseMatrix object in place.
+    (Only for the matrices made by the caller -- the buffers are changed.)"""
+    mat = smat.sparse_matrix()
+    if numpy.result_type(mat.data, factor) == mat.data.dtype:
+        mat.data *= factor
+    else:
+        mat.data = mat.data * factor
+    # The cached conversion into the other format is reset
+    return smat.set_sparse_matrix(mat, as_is=True)
+
+
+# ======================================================================
+# Binary file format
+# ======================================================================
+# A recommender file is a binary container file (see SSparseMatrix.BinaryContainer) with the arrays:
+#
+#   rowNames, columnNames         the row and column names of the recommendation matrix (stored once)
+#   M/indptr, M/indices, M/data   the CSR (or CSC) arrays of the recommendation matrix
+#   matrices/<i>/...              the arrays of the i-th tag type sub-matrix
+#   rawMatrices/<i>/...           the arrays of the i-th sub-matrix before the term weight functions (if different)
+#   tagWeights/<i>                the tag weights of the i-th tag type (if applied)
+#
+# The metadata has the format name and version, the tag types with their column ranges in the recommendation
+# matrix, and the state of the incremental updates. The sub-matrices share the row names of the recommendation
+# matrix and take their column names from the column ranges; only the sub-matrices with other names have
+# their own "rowNames" and "columnNames" arrays.
+# The arrays are memory mapped when read, hence, only the used pages of the matrices are read from the disk.
+_FILE_FORMAT = "SparseMatrixRecommender"
+_FILE_FORMAT_VERSION = 1
+
+
+def _sparse_arrays(smat):
+    """The format and the arrays of the sparse matrix of a SSparseMatrix object. (Canonical CSR or CSC.)"""
+    if is_chunked_s_sparse_matrix(smat):
+        smat = smat.to_s_sparse_matrix()
+    mat = smat.sparse_matrix()
+    if mat.format not in {"csr", "csc"}:
+        mat = mat.tocsr()
+
+    # Memory mapped matrices cannot be sorted in place
+    if not mat.has_canonical_format:
+        mat = mat.copy()
+        mat.sum_duplicates()
+
+    idxDtype = numpy.int32 if max(mat.nnz, max(mat.shape)) < numpy.iinfo(numpy.int32).max else numpy.int64
+    return mat.format, {"indptr": mat.indptr.astype(idxDtype, copy=False),
+                        "indices": mat.indices.astype(idxDtype, copy=False),
+                        "data": mat.data}
+
+
+def _put_s_sparse_matrix(arrays, prefix, smat, row_names, column_names, columns):
+    """Put the arrays of a SSparseMatrix object into a dictionary of arrays and give its metadata.
+
+    The names are put only if they are not the row names or the range columns of the column names.
+    """
+    format, mat = _sparse_arrays(smat)
+    arrays.update({prefix + k: v for (k, v) in mat.items()})
+
+    if smat.row_names_index() != row_names:
+        arrays[prefix + "rowNames"] = encode_names(smat.row_names_index().array())
+
+    if columns is None or columns[1] > len(column_names) or \
+            smat.column_names_index() != column_names.take(slice(*columns)):
+        arrays[prefix + "columnNames"] = encode_names(smat.column_names_index().array())
+        columns = None
+
+    return {"format": format, "shape": list(smat.shape()), "columns": columns}
+
+
+def _take_s_sparse_matrix(arrays, prefix, meta, row_names, column_names):
+    """Make a SSparseMatrix object from (memory mapped) arrays put with _put_s_sparse_matrix."""
+    shape = tuple(meta["shape"])
+    if meta["format"] == "csc":
+        mat = scipy.sparse.csc_matrix((arrays[prefix + "data"], arrays[prefix + "indices"], arrays[prefix + "indptr"]),
+                                      shape=shape, copy=False)
+    else:
+        mat = scipy.sparse.csr_matrix((arrays[prefix + "data"], arrays[prefix + "indices"], arrays[prefix + "indptr"]),
+                                      shape=shape, copy=False)
+    # Canonical format was ensured when writing
+    mat.has_canonical_format = True
+
+    if prefix + "rowNames" in arrays:
+        row_names = NameIndex(decode_names(arrays[prefix + "rowNames"], shape[0]))
+
+    if prefix + "columnNames" in arrays:
+        column_names = NameIndex(decode_names(arrays[prefix + "columnNames"], shape[1]))
+    else:
+        column_names = column_names.take(slice(*meta["columns"]))
+
+    return SSparseMatrix(mat, row_names, column_names)
 
 
 # ======================================================================
@@ -54,6 +458,22 @@ class SparseMatrixRecommender:
     _tagTypeWeights = None
     _data = None
     _value = None
+    _itemSimilarity = None
+    _itemSimilarityM = None
+    _itemSimilaritySpec = None
+    _annIndex = None
+    _annIndexM = None
+    _incidence = None
+    _incidenceM = None
+    _postingLists = None
+    _postingListsM = None
+    # The sub-matrices before the term weight functions are applied, and what is needed to remake M from them
+    _rawMatrices = None
+    _tagValueSeparator = None
+    _termWeightFunctions = None
+    _termStatistics = None
+    _tagWeights = None
+    _tagTypeFactors = None
 
     # ------------------------------------------------------------------
     # Init
@@ -65,12 +485,7 @@ class SparseMatrixRecommender:
         if len(args) == 1 and isinstance(args[0], pandas.core.frame.DataFrame):
             _data = args[1]
         elif len(args) == 1 and is_smat_dict(args[0]):
-            obj = SparseMatrixRecommender().create_from_matrices(args[0])
-            self.set_matrices(obj.take_matrices())
-            self.set_M(obj.take_M())
-            self.set_tag_type_weights(obj.take_tag_type_weights())
-            self.set_data(obj.take_data())
-            self.set_value(obj.take_value())
+            self.create_from_matrices(args[0])
 
     # ------------------------------------------------------------------
     # Getters
@@ -95,6 +510,18 @@ class SparseMatrixRecommender:
         """Take the pipeline value."""
         return self._value
 
+    def take_item_similarity_index(self):
+        """Take the item-item similarity index. (None, if it is not made for the current recommendation matrix.)"""
+        return self._itemSimilarity if self._item_similarity_index_is_current() else None
+
+    def take_ann_index(self):
+        """Take the approximate nearest neighbors index. (None, if it is not made for the current recommendation matrix.)"""
+        return self._annIndex if self._ann_index_is_current() else None
+
+    def take_posting_list_index(self):
+        """Take the posting list index. (None, if it is not made; it is remade if the recommendation matrix is changed.)"""
+        return self._posting_list_index()
+
     def sub_matrix(self, tag_type):
         """Take sub-matrix corresponding to tag_type."""
         if not isinstance(tag_type, str):
@@ -175,7 +602,8 @@ class SparseMatrixRecommender:
     def create_from_matrices(self, matrices: dict,
                              add_tag_types_to_column_names=False,
                              tag_value_separator=":",
-                             numerical_columns_as_categorical=False):
+                             numerical_columns_as_categorical=False,
+                             posting_lists=False):
         """Create the recommendation matrix from tag type sub-matrices.
 
         :type matrices: dict
@@ -184,6 +612,7 @@ class SparseMatrixRecommender:
         :param tag_value_separator: String to separate tag-type prefixes from tags
                                    (in the column names of the recommendation matrix).
         :param numerical_columns_as_categorical: Should numerical columns be turned into categorical or not?
+        :param posting_lists: Should a posting list index of the tags be made or not? (See create_posting_list_index.)
         :return: self: SparseMatrixObject
         """
         if not is_smat_dict(matrices):
@@ -197,6 +626,17 @@ class SparseMatrixRecommender:
 
         self._M = column_bind(self._matrices)
 
+        # The state of the incremental updates
+        self._rawMatrices = dict(self._matrices)
+        self._tagValueSeparator = tag_value_separator if add_tag_types_to_column_names else None
+        self._termWeightFunctions = []
+        self._termStatistics = None
+        self._tagWeights = None
+        self._tagTypeFactors = {}
+
+        if posting_lists:
+            self.create_posting_list_index()
+
         return self
 
     # ------------------------------------------------------------------
@@ -206,7 +646,8 @@ class SparseMatrixRecommender:
                               columns=None,
                               add_tag_types_to_column_names=False,
                               tag_value_separator=":",
-                              numerical_columns_as_categorical=False):
+                              numerical_columns_as_categorical=False,
+                              posting_lists=False):
         """Create the recommendation matrix from wide form data frame.
 
         :param data: A data frame with wide form(at) data.
@@ -216,6 +657,7 @@ class SparseMatrixRecommender:
         :param tag_value_separator: String to separate tag-type prefixes from tags
                                    (in the column names of the recommendation matrix).
         :param numerical_columns_as_categorical: Should numerical columns be turned into categorical or not?
+        :param posting_lists: Should a posting list index of the tags be made or not?
         :return: self: SparseMatrixObject
         """
         if not isinstance(data, pandas.core.frame.DataFrame):
@@ -247,7 +689,8 @@ class SparseMatrixRecommender:
         return self.create_from_matrices(matrices=aSMats,
                                          add_tag_types_to_column_names=add_tag_types_to_column_names,
                                          tag_value_separator=tag_value_separator,
-                                         numerical_columns_as_categorical=numerical_columns_as_categorical)
+                                         numerical_columns_as_categorical=numerical_columns_as_categorical,
+                                         posting_lists=posting_lists)
 
     # ------------------------------------------------------------------
     # Create form long form
@@ -259,7 +702,8 @@ class SparseMatrixRecommender:
                               weight_column_name="Weight",
                               add_tag_types_to_column_names=False,
                               tag_value_separator=":",
-                              numerical_columns_as_categorical=False):
+                              numerical_columns_as_categorical=False,
+                              posting_lists=False):
         """Create the recommendation matrix from long form data frame.
 
         :param data: A data frame with long form(at) data.
@@ -271,6 +715,7 @@ class SparseMatrixRecommender:
         :param tag_value_separator: String to separate tag-type prefixes from tags
                                    (in the column names of the recommendation matrix).
         :param numerical_columns_as_categorical: Should numerical columns be turned into categorical or not?
+        :param posting_lists: Should a posting list index of the tags be made or not?
         :return: self: SparseMatrixObject
         """
         if not isinstance(data, pandas.core.frame.DataFrame):
@@ -301,7 +746,8 @@ class SparseMatrixRecommender:
         return self.create_from_matrices(matrices=aSMats,
                                          add_tag_types_to_column_names=add_tag_types_to_column_names,
                                          tag_value_separator=tag_value_separator,
-                                         numerical_columns_as_categorical=numerical_columns_as_categorical)
+                                         numerical_columns_as_categorical=numerical_columns_as_categorical,
+                                         posting_lists=posting_lists)
 
     # ------------------------------------------------------------------
     # Apply LSI functions
@@ -322,6 +768,17 @@ class SparseMatrixRecommender:
 
         self._M = column_bind(self._matrices)
 
+        # The incremental updates remake M from the sub-matrices with the term weight functions applied once
+        if self._rawMatrices is not None and len(self._termWeightFunctions) == 0 and isinstance(global_weight_func, str):
+            self._termWeightFunctions = [{"global_weight_func": global_weight_func,
+                                          "local_weight_func": local_weight_func,
+                                          "normalizer_func": normalizer_func}]
+            # The tag weights are not in the new recommendation matrix
+            self._tagWeights = None
+            self._tagTypeFactors = {}
+        else:
+            self._rawMatrices = None
+
         return self
 
     # ------------------------------------------------------------------
@@ -343,9 +800,20 @@ class SparseMatrixRecommender:
         W = scipy.sparse.diags(weights)
         matRes = self.take_M().copy().dot(W)
 
+        # Record the weights of the tags of each tag type (for the incremental updates)
+        if self._rawMatrices is not None:
+            ends = numpy.cumsum([x.columns_count() for x in self._matrices.values()])
+            if len(ends) > 0 and ends[-1] == len(weights):
+                tagWeights = dict(zip(self._matrices.keys(), numpy.split(numpy.asarray(weights, dtype=float), ends[:-1])))
+                if self._tagWeights is not None:
+                    tagWeights = {k: v * self._tagWeights[k] for (k, v) in tagWeights.items()}
+                self._tagWeights = tagWeights
+            else:
+                self._rawMatrices = None
+
         # Make sure we have the required row- and column names
-        matRes.set_row_names(self.take_M().row_names())
-        matRes.set_column_names(self.take_M().column_names())
+        matRes.set_row_names(self.take_M().row_names_index())
+        matRes.set_column_names(self.take_M().column_names_index())
 
         # Result
         self.set_M(matRes)
@@ -387,7 +855,256 @@ class SparseMatrixRecommender:
         else:
             raise TypeError("The first, weights argument must be a list or a dictionary.")
 
-        return self.apply_tag_weights(weights_list)
+        self.apply_tag_weights(weights_list)
+
+        # The new tags of the incremental updates get the tag type weights
+        if self._rawMatrices is not None:
+            typeWeights = weights if isinstance(weights, dict) else dict(zip(keys, weights))
+            for (key, w) in typeWeights.items():
+                self._tagTypeFactors[key] = self._tagTypeFactors.get(key, 1) * w
+
+        return self
+
+    # ------------------------------------------------------------------
+    # Incremental updates
+    # ------------------------------------------------------------------
+    def _check_incremental_updates(self):
+        if self._rawMatrices is None:
+            raise ValueError("The recommendation matrix cannot be remade from the tag type sub-matrices. "
+                             "The incremental updates need a recommender made with create_from_matrices, "
+                             "create_from_wide_form, or create_from_long_form, with the term weight functions "
+                             "applied at most once.")
+
+    def _prefixed_tags(self, tag_type, tags):
+        if self._tagValueSeparator is None:
+            return list(tags)
+        return [tag_type + self._tagValueSeparator + x for x in tags]
+
+    def _raw_matrix(self, tag_type, items_index):
+        """The raw sub-matrix of a tag type with the rows of the items index. (An empty one for new tag types.)"""
+        if tag_type not in self._rawMatrices:
+            res = SSparseMatrix(scipy.sparse.csr_matrix((len(items_index), 0)))
+            res.set_row_names(items_index)
+            res.set_column_names([])
+            return res
+
+        res = self._rawMatrices[tag_type]
+        if res.row_names_index() != items_index:
+            res = res[items_index.array(), :]
+        return res
+
+    def _term_statistics(self):
+        """The column statistics of the raw sub-matrices. (Made at the first update, and updated after that.)"""
+        if self._termStatistics is None:
+            self._termStatistics = {k: global_term_statistics(v) for (k, v) in self._rawMatrices.items()}
+        return self._termStatistics
+
+    def _remake_M(self, raw_matrices, statistics):
+        """Apply the term weight functions and the tag weights to raw sub-matrices and remake the recommendation matrix.
+
+        The global term weights are found with the column statistics, hence, they are the same as the ones
+        found with the raw sub-matrices.
+        """
+        oldM = self._M
+        updateIndex = self._item_similarity_index_is_current()
+
+        if len(self._termWeightFunctions) == 0:
+            matrices = dict(raw_matrices)
+        else:
+            spec = self._termWeightFunctions[0]
+            matrices = {k: apply_term_weight_functions(v,
+                                                       global_weight_func=global_term_function_weights_by_statistics(
+                                                           statistics[k], spec["global_weight_func"]),
+                                                       local_weight_func=spec["local_weight_func"],
+                                                       normalizer_func=spec["normalizer_func"])
+                        for (k, v) in raw_matrices.items()}
+
+        M = column_bind(matrices)
+
+        if self._tagWeights is not None:
+            # The new tags get the tag type weights
+            for (k, v) in matrices.items():
+                tw = self._tagWeights.get(k, numpy.empty(0))
+                self._tagWeights[k] = numpy.concatenate(
+                    [tw, numpy.full(v.columns_count() - len(tw), float(self._tagTypeFactors.get(k, 1)))])
+
+            W = scipy.sparse.diags(numpy.concatenate([self._tagWeights[k] for k in matrices.keys()]))
+            rowNames, columnNames = M.row_names_index(), M.column_names_index()
+            M = M.dot(W)
+            M.set_row_names(rowNames)
+            M.set_column_names(columnNames)
+
+        self._rawMatrices = raw_matrices
+        self._termStatistics = statistics
+        self._matrices = matrices
+        self._M = M
+
+        if updateIndex:
+            self._update_item_similarity_index(oldM)
+        return self
+
+    def upsert_items(self, matrices: dict):
+        """Add new items, or replace the tags of known items, without remaking the recommender from the data.
+
+        For each tag type in the argument the rows of the given items are replaced (or added);
+        the rows of the items in the other tag types are not changed. The new tags and tag types are added.
+        The global term weights are updated from the maintained column statistics (counts, sums, sums of squares)
+        and the term weight functions and tag weights are applied again. The new items and tags are
+        placed after the known ones.
+
+        :type matrices: dict
+        :param matrices: Tag type sub-matrices with the new or changed items as rows.
+        (Prefixes are added to the tags as in the creation of the recommender.)
+
+        :rtype SparseMatrixRecommender
+        :return self: The object itself.
+        """
+        self._check_incremental_updates()
+
+        if not is_smat_dict(matrices):
+            raise TypeError("The first argument is expected to be a dictionary of SSparseMatrix objects.")
+
+        # Items
+        itemsIndex = self._M.row_names_index()
+        items = list(dict.fromkeys(itertools.chain.from_iterable([x.row_names() for x in matrices.values()])))
+        newItems = [x for x in items if x not in itemsIndex]
+        newItemsIndex = itemsIndex.concatenate(NameIndex(newItems)) if len(newItems) > 0 else itemsIndex
+        nItems = len(newItemsIndex)
+
+        statistics = self._term_statistics() if len(self._termWeightFunctions) > 0 else None
+
+        rawMatrices = {}
+        newStatistics = {}
+        for tagType in list(self._rawMatrices.keys()) + [k for k in matrices.keys() if k not in self._rawMatrices]:
+            raw = self._raw_matrix(tagType, itemsIndex)
+            tagsIndex = raw.column_names_index()
+
+            if tagType in matrices:
+                # New tags
+                upd = matrices[tagType]
+                updTags = self._prefixed_tags(tagType, upd.column_names())
+                newTags = [x for x in dict.fromkeys(updTags) if x not in tagsIndex]
+                if len(newTags) > 0:
+                    tagsIndex = tagsIndex.concatenate(NameIndex(newTags))
+
+                # Replace the rows
+                positions = newItemsIndex.positions(upd.row_names_index().array())
+                cols = tagsIndex.positions(updTags)
+                rows = scipy.sparse.coo_matrix(upd.sparse_matrix())
+                rows = scipy.sparse.csr_matrix((rows.data, (rows.row, cols[rows.col])),
+                                               shape=(rows.shape[0], len(tagsIndex)))
+                smat = _replace_rows(raw.sparse_matrix(), positions, rows, (nItems, len(tagsIndex)))
+
+                removed = raw.sparse_matrix("csr")[positions[positions < len(itemsIndex)], :]
+            else:
+                rows, removed = None, None
+                smat = _csr_with_shape(raw.sparse_matrix(), (nItems, len(tagsIndex)))
+
+            rawMatrices[tagType] = SSparseMatrix(smat, row_names=newItemsIndex, column_names=tagsIndex)
+
+            if statistics is not None:
+                stats = statistics[tagType] if tagType in statistics else global_term_statistics(raw)
+                newStatistics[tagType] = _update_statistics(stats, added=rows, removed=removed,
+                                                            rows_count=nItems, columns_count=len(tagsIndex))
+
+        return self._remake_M(rawMatrices, newStatistics if statistics is not None else None)
+
+    def upsert_items_from_wide_form(self, data, item_column_name, columns=None):
+        """Add new items, or replace the tags of known items, with a wide form data frame. (See upsert_items.)
+
+        :param data: A data frame with wide form(at) data.
+        :param item_column_name: Name of the column with the items.
+        :param columns: Which columns (tag types) to use. If None, all columns except the item column are used.
+        :return: self: SparseMatrixObject
+        """
+        if not isinstance(data, pandas.core.frame.DataFrame):
+            raise TypeError("The first argument is expected to be data frame.")
+
+        if item_column_name not in set(data.keys()):
+            raise TypeError("Unknown item column name: " + repr(item_column_name) + ".")
+
+        if isinstance(columns, type(None)):
+            columns = [k for k in data.keys() if k != item_column_name]
+
+        if not is_str_list(columns):
+            raise TypeError("""The argument columns is expected to be a list of strings.""")
+
+        for cn in columns:
+            if cn not in set(data.keys()):
+                raise TypeError("Unknown column name: " + repr(cn) + ".")
+
+        return self.upsert_items(cross_tabulate(data=data, index=item_column_name, columns=columns))
+
+    def remove_items(self, items, ignore_unknown=False):
+        """Remove items without remaking the recommender from the data. (See upsert_items.)
+
+        :type items: str|list
+        :param items: An item or a list of items.
+
+        :type ignore_unknown: bool
+        :param ignore_unknown: Should the unknown items be ignored or not?
+
+        :rtype SparseMatrixRecommender
+        :return self: The object itself.
+        """
+        self._check_incremental_updates()
+
+        if isinstance(items, str):
+            items = [items]
+
+        if not is_str_list(items):
+            raise TypeError("The first argument is expected to be a string or a list of strings.")
+
+        itemsIndex = self._M.row_names_index()
+        positions = itemsIndex.positions(items, ignore_unknown=ignore_unknown, what="items")
+
+        keep = numpy.ones(len(itemsIndex), dtype=bool)
+        keep[positions] = False
+        newItemsIndex = itemsIndex.take(keep)
+
+        statistics = self._term_statistics() if len(self._termWeightFunctions) > 0 else None
+
+        rawMatrices = {}
+        newStatistics = {}
+        for tagType in self._rawMatrices.keys():
+            raw = self._raw_matrix(tagType, itemsIndex)
+            csr = raw.sparse_matrix("csr")
+            rawMatrices[tagType] = SSparseMatrix(csr[keep, :],
+                                                 row_names=newItemsIndex,
+                                                 column_names=raw.column_names_index())
+
+            if statistics is not None:
+                newStatistics[tagType] = _update_statistics(statistics[tagType], removed=csr[positions, :],
+                                                            rows_count=len(newItemsIndex),
+                                                            columns_count=raw.columns_count())
+
+        return self._remake_M(rawMatrices, newStatistics if statistics is not None else None)
+
+    def add_tags(self, tag_type, tags):
+        """Add tags (with no items) to a tag type, or add a new tag type. (See upsert_items.)
+
+        :type tag_type: str
+        :param tag_type: Tag type.
+
+        :type tags: str|list
+        :param tags: A tag or a list of tags. The known tags are ignored.
+
+        :rtype SparseMatrixRecommender
+        :return self: The object itself.
+        """
+        self._check_incremental_updates()
+
+        if not isinstance(tag_type, str):
+            raise TypeError("The first argument is expected to be a string.")
+
+        if isinstance(tags, str):
+            tags = [tags]
+
+        if not is_str_list(tags):
+            raise TypeError("The second argument is expected to be a string or a list of strings.")
+
+        smat = SSparseMatrix(scipy.sparse.csr_matrix((0, len(tags))), row_names=[], column_names=tags)
+        return self.upsert_items({tag_type: smat})
 
     # ------------------------------------------------------------------
     # To smr vector
@@ -398,6 +1115,7 @@ class SparseMatrixRecommender:
         :type arg: str|dict
         :param arg: A list of items or tags, or a dictionary of scored items or tags.
 
+        :type things_dict: NameIndex|dict
         :param things_dict: Set items or tags.
 
         :param thing_name: Which matrix axis, one of "column" or "row"
@@ -418,18 +1136,14 @@ class SparseMatrixRecommender:
             dvec = dict.fromkeys(arg, 1)
             return self._to_smr_vector(dvec, things_dict, thing_name, ref_name, ignore_unknown=ignore_unknown)
         elif is_scored_tags_dict(arg):
-            known_keys = {key: value for (key, value) in arg.items() if key in things_dict}
-            if len(known_keys) == 0:
-                raise LookupError("None of the tags is a valid recommendation matrix " + thing_name + " name.")
-            elif len(known_keys) < len(arg) and not ignore_unknown:
-                raise LookupError("Not all tags are valid recommendation matrix " + thing_name + " names.")
-
-            res_row_inds = [things_dict[k] for (k, v) in known_keys.items()]
-            res_col_inds = [0 for x in range(len(res_row_inds))]
-            res_vals = list(known_keys.values())
-            smat = scipy.sparse.csr_matrix((res_vals, (res_row_inds, res_col_inds)), shape=(len(things_dict), 1))
+            # The names index is shared by the result vector, hence, no names dictionary is rebuilt
+            things_index = things_dict if isinstance(things_dict, NameIndex) else NameIndex(things_dict)
+
+            res_row_inds, res_vals = _known_positions(arg, things_index, thing_name, ignore_unknown)
+            res_col_inds = numpy.zeros(len(res_row_inds), dtype=numpy.intp)
+            smat = scipy.sparse.csr_matrix((res_vals, (res_row_inds, res_col_inds)), shape=(len(things_index), 1))
             res = SSparseMatrix(smat)
-            res.set_row_names(list(things_dict.keys()))
+            res.set_row_names(things_index)
             res.set_column_names()
             self.set_value(res)
             return self
@@ -457,7 +1171,7 @@ class SparseMatrixRecommender:
             raise TypeError("Cannot find recommendation matrix.")
 
         return self._to_smr_vector(arg,
-                                   things_dict=self._M.column_names_dict(),
+                                   things_dict=self._M.column_names_index(),
                                    thing_name="column",
                                    ref_name="tags",
                                    ignore_unknown=ignore_unknown)
@@ -481,7 +1195,7 @@ class SparseMatrixRecommender:
             raise TypeError("Cannot find recommendation matrix.")
 
         return self._to_smr_vector(arg,
-                                   things_dict=self._M.row_names_dict(),
+                                   things_dict=self._M.row_names_index(),
                                    thing_name="row",
                                    ref_name="items",
                                    ignore_unknown=ignore_unknown)
@@ -490,7 +1204,7 @@ class SparseMatrixRecommender:
     # Recommend by profile
     # ------------------------------------------------------------------
     def recommend_by_profile(self, profile, nrecs=10, normalize=True, ignore_unknown=False,
-                             vector_result: bool = False):
+                             vector_result: bool = False, method="exact"):
         """Recommend by profile.
 
         :type profile: str|list|dict
@@ -508,9 +1222,18 @@ class SparseMatrixRecommender:
         :type vector_result: bool
         :param vector_result: Should the result be a (SSparseMatrix) vector or a dictionary.
 
+        :type method: str|None
+        :param method: One of "exact" (all items are scored) or "ann" (only the candidates of the
+        approximate nearest neighbors index are scored). None is the same as "exact". (See create_ann_index.)
+
         :rtype SparseMatrixRecommender
         :return self: The object itself or None. The result is stored in self._value.
         """
+        method = self._scoring_method(method, ["ann"])
+
+        if not (nrecs is None or isinstance(nrecs, int) and nrecs > 0):
+            raise TypeError("The second argument, 'nrecs', is expected to be a positive integer or None.")
+
         # Make scored tags vector
         if isinstance(profile, str):
             vec = self.to_profile_vector([profile], ignore_unknown=ignore_unknown).take_value()
@@ -523,50 +1246,333 @@ class SparseMatrixRecommender:
 
         # Ignore unknown tags
         # Compute the recommendations
-        recs = self.take_M().dot(vec)
+        if method == "ann":
+            recs = self._ann_scores(vec)
+        else:
+            recs = self.take_M().dot(vec)
+        positions, scores = _row_scores(recs)
 
         # Normalize
-        recs_max = max(map(abs, recs.row_sums()))
-        if normalize and recs_max > 0:
-            recs = recs.multiply(1 / recs_max)
+        # (Only the scores are scaled; the vector result is scaled after the top-k selection.)
+        recs_max = numpy.abs(scores).max() if len(scores) > 0 else 0
+        normalize = normalize and recs_max > 0
+        if normalize:
+            scores = scores / recs_max
 
         if vector_result:
             # Vector result
 
-            # Change the matrix to have nrecs columns
-            # according to scores
+            # Keep the rows of the top nrecs scores only
             if isinstance(nrecs, int) and nrecs < recs.rows_count():
-                recs2 = recs.row_sums_dict()
-                recs2 = _reverse_sort_dict(recs2)
-
-                recs2 = dict(list(recs2.items())[0:nrecs])
-                rowNames = recs.row_names()
-                recs = recs[list(recs2.keys()), :]
-                recs = recs.impose_row_names(rowNames)
+                recs = _top_k_rows(recs, positions, scores, nrecs, 1 / recs_max if normalize else 1)
+            elif normalize:
+                recs = _scale_in_place(recs, 1 / recs_max)
 
         else:
             # Dictionary result
             # Take non-zero score recommendations
-            recs = {key: value for (key, value) in recs.row_sums_dict().items() if value > 0}
+            positive = numpy.flatnonzero(scores > 0)
 
-            # Reverse sort
-            recs = dict(sorted(recs.items(), key=lambda item: -item[1]))
+            # Give top-n recs (reverse sorted)
+            top = _top_k_positions(scores, positive, nrecs)
 
-            # Give top-n recs
-            if isinstance(nrecs, int) and nrecs < len(recs):
-                recs = dict(list(recs.items())[0:nrecs])
-            elif not (isinstance(None, type(None)) or isinstance(nrecs, int) and nrecs > 0):
-                raise TypeError("The second argument, 'nrecs', is expected to be a positive integer or None.")
+            recs = dict(zip(recs.row_names_index().array()[positions[top]].tolist(), scores[top].tolist()))
 
         # Assign obtained recommendations to the pipeline value
         self.set_value(recs)
 
         return self
 
+    # ------------------------------------------------------------------
+    # Item similarity index
+    # ------------------------------------------------------------------
+    def _item_similarity_index_is_current(self):
+        return self._itemSimilarity is not None and self._itemSimilarityM is self._M
+
+    def create_item_similarity_index(self, k=100, batch_size=10000, backend=None, n_threads=None, n_jobs=None):
+        """Create an item-item similarity index: the matrix M . M^T with the top-k elements of each row.
+
+        The index is computed in blocks of rows, hence, only one block of the full similarity matrix
+        is in memory at a time. The index is used by recommend with method="index" until the recommendation
+        matrix is changed; by default the recommendations are exact.
+
+        The index is updated by upsert_items, remove_items, and add_tags: only the rows of the items with changed
+        rows in the recommendation matrix, and the rows of the items with changed or removed items in their top-k,
+        are computed again; the other rows are merged with their similarities with the changed items.
+        (The global term weights, like IDF, can change the rows of many items; then more of the index is computed again.)
+
+        :type k: int
+        :param k: Number of the most similar items kept for each item (the item itself included).
+        The recommendations by single items are exact when nrecs is smaller than k - 1 (the item itself
+        takes one of the k places.) With larger nrecs the candidates are truncated, hence, the recommendations
+        (and their normalization) can differ from the exact ones.
+
+        :type batch_size: int
+        :param batch_size: Number of items per block.
+
+        :type backend: str|None
+        :param backend: Dot product backend of the blocks. (See SSparseMatrix.dot.)
+
+        :type n_threads: int|None
+        :param n_threads: Number of threads of the dot product backend.
+
+        :type n_jobs: int|None
+        :param n_jobs: Number of worker processes the blocks are spread over. If None or 1, no processes are used.
+
+        :rtype SparseMatrixRecommender
+        :return self: The object itself.
+        """
+        if not isinstance(self._M, SSparseMatrix):
+            raise TypeError("Cannot find recommendation matrix.")
+
+        if not (isinstance(k, int) and k > 0):
+            raise TypeError("The first argument, k, is expected to be a positive integer.")
+
+        if not (isinstance(batch_size, int) and batch_size > 0):
+            raise TypeError("The argument batch_size is expected to be a positive integer.")
+
+        if not (n_jobs is None or isinstance(n_jobs, int) and n_jobs > 0):
+            raise ValueError("The argument n_jobs is expected to be a positive integer or None.")
+
+        self._itemSimilaritySpec = {"k": k, "batch_size": batch_size, "backend": backend, "n_threads": n_threads,
+                                    "n_jobs": n_jobs}
+
+        M = self.take_M()
+        return self._set_item_similarity_index(self._item_similarity_rows(M), M)
+
+    def _set_item_similarity_index(self, smat, M):
+        res = SSparseMatrix(smat)
+        res.set_row_names(M.row_names_index())
+        res.set_column_names(M.row_names_index())
+
+        self._itemSimilarity = res
+        self._itemSimilarityM = M
+        return self
+
+    def _item_similarity_rows(self, M, positions=None):
+        """Top-k similarities of rows of the recommendation matrix with all items, computed by blocks of rows.
+
+        :param M: The recommendation matrix.
+        :param positions: Row positions. If None, all rows are used.
+        :return: A CSR matrix with the rows of the positions and all items as columns.
+        """
+        spec = self._itemSimilaritySpec
+        batchSize = spec["batch_size"]
+
+        if positions is None:
+            blocks = [M[start:start + batchSize, :] for start in range(0, M.rows_count(), batchSize)]
+        else:
+            blocks = [M[positions[start:start + batchSize], :] for start in range(0, len(positions), batchSize)]
+
+        if len(blocks) == 0:
+            return scipy.sparse.csr_matrix((0, M.rows_count()))
+
+        Mt = M.transpose()
+        if spec["n_jobs"] is None or spec["n_jobs"] == 1 or len(blocks) == 1:
+            simBlocks = [_item_similarity_block(b, spec["k"], spec["backend"], spec["n_threads"], Mt) for b in blocks]
+        else:
+            with ProcessPoolExecutor(max_workers=spec["n_jobs"],
+                                     initializer=_nearest_neighbors_init,
+                                     initargs=(Mt,)) as executor:
+                simBlocks = list(executor.map(_item_similarity_block,
+                                              blocks,
+                                              itertools.repeat(spec["k"]),
+                                              itertools.repeat(spec["backend"]),
+                                              itertools.repeat(spec["n_threads"])))
+
+        return scipy.sparse.vstack(simBlocks, format="csr")
+
+    def _update_item_similarity_index(self, old_M):
+        """Update the item similarity index of a former recommendation matrix to the current one.
+
+        The similarities of the items with unchanged rows are the same, hence, only the rows of the changed
+        (and new) items, and the rows with changed or removed items in their top-k, are computed again.
+        The top-k elements of the other rows are merged with their similarities with the changed items.
+        """
+        M = self._M
+        nItems = M.rows_count()
+        spec = self._itemSimilaritySpec
+
+        # Positions of the former items in the current matrix (-1 for the removed items)
+        itemPositions = M.row_names_index().names_dict()
+        oldPositions = numpy.fromiter(map(itemPositions.get, old_M.row_names_index().array(), itertools.repeat(-1)),
+                                      dtype=numpy.intp, count=old_M.rows_count())
+        kept = oldPositions >= 0
+
+        # The changed rows: the new items and the items with different rows
+        # (The incremental updates do not remove tags.)
+        cols = M.column_names_index().positions(old_M.column_names_index().array())
+        old = old_M.sparse_matrix("csr")[kept, :].tocoo()
+        old = scipy.sparse.csr_matrix((old.data, (oldPositions[kept][old.row], cols[old.col])),
+                                      shape=(nItems, M.columns_count()))
+        diff = M.sparse_matrix("csr") - old
+        diff.eliminate_zeros()
+        changed = numpy.diff(diff.indptr) > 0
+        changed[numpy.setdiff1d(numpy.arange(nItems), oldPositions[kept], assume_unique=True)] = True
+
+        # The rows with changed or removed items in their top-k are computed again
+        sim = self._itemSimilarity.sparse_matrix("csr").tocoo()
+        rows, cols = oldPositions[sim.row], oldPositions[sim.col]
+        stale = cols < 0
+        stale[~stale] = changed[cols[~stale]]
+        recompute = changed.copy()
+        recompute[rows[stale & (rows >= 0)]] = True
+
+        if recompute.all():
+            return self._set_item_similarity_index(self._item_similarity_rows(M), M)
+
+        recomputePositions = numpy.flatnonzero(recompute)
+        keepPositions = numpy.flatnonzero(~recompute)
+        changedPositions = numpy.flatnonzero(changed)
+
+        # The top-k elements of the other rows
+        keepRows = numpy.full(nItems, -1, dtype=numpy.intp)
+        keepRows[keepPositions] = numpy.arange(len(keepPositions))
+        mask = rows >= 0
+        mask[mask] = ~recompute[rows[mask]]
+        top = scipy.sparse.csr_matrix((sim.data[mask], (keepRows[rows[mask]], cols[mask])),
+                                      shape=(len(keepPositions), nItems))
+
+        # Merged with the similarities with the changed items
+        if len(changedPositions) > 0:
+            scores = M[keepPositions, :].dot(M[changedPositions, :].transpose(),
+                                              backend=spec["backend"], n_threads=spec["n_threads"])
+            scores = scores.sparse_matrix("csr").tocoo()
+            top = top + scipy.sparse.csr_matrix((scores.data, (scores.row, changedPositions[scores.col])),
+                                                shape=(len(keepPositions), nItems))
+        top = SSparseMatrix(top).row_top_k(spec["k"]).sparse_matrix("csr")
+
+        smat = scipy.sparse.vstack([self._item_similarity_rows(M, recomputePositions), top], format="csr")
+        smat = smat[numpy.argsort(numpy.concatenate([recomputePositions, keepPositions]))]
+        return self._set_item_similarity_index(smat, M)
+
+    # ------------------------------------------------------------------
+    # Approximate nearest neighbors index
+    # ------------------------------------------------------------------
+    def _ann_index_is_current(self):
+        return self._annIndex is not None and self._annIndexM is self._M
+
+    def _scoring_method(self, method, index_methods):
+        """Verify a scoring method. (None is the same as "exact" -- the indexes are used only if they are requested.)"""
+        if method is None:
+            return "exact"
+
+        if method != "exact" and method not in index_methods:
+            raise ValueError("The argument method is expected to be one of " +
+                             ", ".join(repr(m) for m in ["exact"] + index_methods) + ", or None.")
+
+        if method == "index" and not self._item_similarity_index_is_current():
+            raise ValueError("There is no item similarity index for the current recommendation matrix. " +
+                             "(Use create_item_similarity_index.)")
+
+        if method == "ann" and not self._ann_index_is_current():
+            raise ValueError("There is no approximate nearest neighbors index for the current recommendation matrix. " +
+                             "(Use create_ann_index.)")
+
+        return method
+
+    def create_ann_index(self, method="LSH", n_tables=16, hash_size=12, n_probes=0, seed=None, batch_size=100000):
+        """Create an approximate nearest neighbors index of the items (the rows of the recommendation matrix).
+
+        The recommendations with the index score only the candidate items found with the index,
+        hence, they are approximate. More tables and probes give higher recall; larger hash sizes
+        give fewer candidates, i.e. lower latency. The index is used by recommend, recommend_by_profile,
+        and classify_by_profile with method="ann" until the recommendation matrix is changed.
+        (The recall of the index is found with evaluate_ann_index.)
+
+        :type method: str
+        :param method: One of "LSH" (random projections, for cosine similarity) or
+        "MinHash" (min-wise hashing, for unitized matrices, i.e. Jaccard similarity).
+
+        :type n_tables: int
+        :param n_tables: Number of hash tables.
+
+        :type hash_size: int
+        :param hash_size: Number of projections or minimum hashes per hash table.
+
+        :type n_probes: int
+        :param n_probes: Number of additional buckets probed per hash table. (LSH only.)
+
+        :type seed: int|None
+        :param seed: Random seed.
+
+        :type batch_size: int
+        :param batch_size: Number of items hashed at a time.
+
+        :rtype SparseMatrixRecommender
+        :return self: The object itself.
+        """
+        if not isinstance(self._M, SSparseMatrix):
+            raise TypeError("Cannot find recommendation matrix.")
+
+        self._annIndex = (ApproximateNearestNeighbors(method=method,
+                                                      n_tables=n_tables,
+                                                      hash_size=hash_size,
+                                                      n_probes=n_probes,
+                                                      seed=seed)
+                          .create(self._M, batch_size=batch_size))
+        self._annIndexM = self._M
+        return self
+
+    def _ann_scores(self, vec):
+        """Scores of the candidate items of a profile vector (tags x 1) found with the approximate nearest neighbors
+        index. Gives a SSparseMatrix object with the items as rows; the items that are not candidates have no scores."""
+        M = self.take_M()
+        query = numpy.asarray(vec.sparse_matrix().sum(axis=1), dtype=numpy.float64).ravel()
+
+        positions = self._annIndex.candidates(query)
+        scores = M[positions, :].sparse_matrix().dot(query)
+
+        smat = scipy.sparse.csc_matrix((scores, positions, [0, len(positions)]), shape=(M.rows_count(), 1))
+        smat.eliminate_zeros()
+        res = SSparseMatrix(smat)
+        res.set_row_names(M.row_names_index())
+        res.set_column_names()
+        return res
+
+    def evaluate_ann_index(self, queries, nrecs=10, query_type="history"):
+        """Evaluate the approximate nearest neighbors index: the recall at nrecs of the approximate recommendations
+        with respect to the exact ones, and the mean times per query.
+
+        :type queries: list
+        :param queries: A list of histories or profiles.
+
+        :type nrecs: int
+        :param nrecs: Number of recommendations per query.
+
+        :type query_type: str
+        :param query_type: One of "history" (recommend is used) or "profile" (recommend_by_profile is used).
+
+        :rtype SparseMatrixRecommender
+        :return self: The object itself. The result is stored in self._value: a dictionary with the keys
+        "recall", "exactTime", and "approximateTime".
+        """
+        if not self._ann_index_is_current():
+            raise ValueError("There is no approximate nearest neighbors index for the current recommendation matrix. " +
+                             "(Use create_ann_index.)")
+
+        if query_type == "history":
+            func = self.recommend
+        elif query_type == "profile":
+            func = self.recommend_by_profile
+        else:
+            raise ValueError("The argument query_type is expected to be one of 'history' or 'profile'.")
+
+        res = {}
+        for method in ["exact", "ann"]:
+            start = time.perf_counter()
+            res[method] = [func(q, nrecs=nrecs, method=method).take_value() for q in queries]
+            res[method + "Time"] = (time.perf_counter() - start) / max(len(queries), 1)
+
+        self.set_value({"recall": recall_at_k(res["exact"], res["ann"], nrecs),
+                        "exactTime": res["exactTime"],
+                        "approximateTime": res["annTime"]})
+        return self
+
     # ------------------------------------------------------------------
     # Recommend by history
     # ------------------------------------------------------------------
-    def recommend(self, history, nrecs=10, normalize=True, remove_history=True):
+    def recommend(self, history, nrecs=10, normalize=True, remove_history=True, method="exact"):
         """Recommend by history.
 
         :type history: str|list|dict
@@ -581,53 +1587,241 @@ class SparseMatrixRecommender:
         :type remove_history: bool
         :param remove_history: Should the history be removed from the result recommendations or not?
 
+        :type method: str|None
+        :param method: One of "exact" (the scores are computed with the recommendation matrix),
+        "index" (the scores are taken from the item similarity index), or "ann" (only the candidates
+        of the approximate nearest neighbors index are scored). None is the same as "exact".
+        (See create_item_similarity_index and create_ann_index.)
+
         :rtype SparseMatrixRecommender
         :return self: The object itself or None. The result is stored in self._value.
         """
-        # Make scored items vector
-        if isinstance(history, str):
-            vec = self.to_history_vector([history]).take_value().transpose()
-        elif isinstance(history, dict) or isinstance(history, list):
-            vec = self.to_history_vector(history).take_value().transpose()
-        elif is_s_sparse_matrix(history):
-            vec = history
+        method = self._scoring_method(method, ["index", "ann"])
+
+        if not (nrecs is None or isinstance(nrecs, int) and nrecs > 0):
+            raise TypeError("The second argument, nrecs, is expected to be a positive integer or None.")
+
+        if method == "index" and isinstance(history, str):
+            # The scores of a single item history are a row of the index
+            itemNames = self._itemSimilarity.row_names_index()
+            itemPosition = itemNames.names_dict().get(history, -1)
+            if itemPosition < 0:
+                raise LookupError("None of the tags is a valid recommendation matrix row name.")
+
+            sim = self._itemSimilarity.sparse_matrix("csr")
+            rowRange = slice(sim.indptr[itemPosition], sim.indptr[itemPosition + 1])
+            positions, scores = sim.indices[rowRange].astype(numpy.intp), sim.data[rowRange]
+            histPositions = numpy.array([itemPosition])
+
         else:
-            raise TypeError("The first argument is expected to be a list of items, a dictionary of scored items" +
-                            " or a SSparseMatrix object with " + self._M.rows_count() + " columns.")
+            # Make scored items vector
+            if isinstance(history, str):
+                vec = self.to_history_vector([history]).take_value().transpose()
+            elif isinstance(history, dict) or isinstance(history, list):
+                vec = self.to_history_vector(history).take_value().transpose()
+            elif is_s_sparse_matrix(history):
+                vec = history
+            else:
+                raise TypeError("The first argument is expected to be a list of items, a dictionary of scored items" +
+                                " or a SSparseMatrix object with " + self._M.rows_count() + " columns.")
+
+            # Compute the recommendations
+            if method == "index":
+                recs = vec.dot(self._itemSimilarity).transpose(copy=False)
+            elif method == "ann":
+                recs = self._ann_scores(vec.dot(self.take_M()).transpose(copy=False))
+            else:
+                recs = self.take_M().dot(vec.dot(self.take_M()).transpose(copy=False))
 
-        # Compute the recommendations
-        recs = self.take_M().dot(vec.dot(self.take_M()).transpose(copy=False))
+            itemNames = recs.row_names_index()
+            positions, scores = _row_scores(recs)
+
+            if remove_history:
+                histScores = vec.column_sums()
+                histNames = vec.column_names_index().array()[histScores > 0]
+                histPositions = itemNames.positions(histNames, ignore_unknown=True)
 
         # Take non-zero scores recommendations
-        recs = {key: value for (key, value) in recs.row_sums_dict().items() if value > 0}
+        candidates = numpy.flatnonzero(scores > 0)
 
         # Remove history
         if remove_history:
-            hist_set = vec.column_sums_dict()
-            hist_set = set({key for (key, value) in hist_set.items() if value > 0})
+            candidates = candidates[~numpy.isin(positions[candidates], histPositions)]
 
-            recs = {key: value for (key, value) in recs.items() if key not in hist_set}
+        # Give top-n recs (reverse sorted)
+        top = _top_k_positions(scores, candidates, nrecs)
 
-        # Reverse sort
-        recs = _reverse_sort_dict(recs)
-
-        # Give top-n recs
-        if isinstance(nrecs, int) and nrecs < len(recs):
-            recs = dict(list(recs.items())[0:nrecs])
-
-            # Normalize
-            recs_max = max(map(abs, recs.values()))
+        # Normalize
+        if isinstance(nrecs, int) and nrecs < len(candidates):
+            recs_max = numpy.abs(scores[top]).max() if len(top) > 0 else 0
             if normalize and recs_max > 0:
-                recs = {k: v / recs_max for (k, v) in recs.items()}
+                scores = scores / recs_max
 
-        elif not (isinstance(None, type(None)) or isinstance(nrecs, int) and nrecs > 0):
-            raise TypeError("The second argument, nrecs, is expected to be a positive integer or None.")
+        recs = dict(zip(itemNames.array()[positions[top]].tolist(), scores[top].tolist()))
 
         # Assign obtained recommendations to the pipeline value
         self.set_value(recs)
 
         return self
 
+    # ------------------------------------------------------------------
+    # Batch recommendations
+    # ------------------------------------------------------------------
+    def _to_smr_matrix(self, args, things_index, thing_name, ref_name, ignore_unknown=False):
+        """To SMR matrix with one row per query.
+
+        :type args: list
+        :param args: A list of queries; each query is an item or a tag, a list of them, or a dictionary of them scored.
+
+        :type things_index: NameIndex
+        :param things_index: Items or tags.
+
+        :param thing_name: Which matrix axis, one of "column" or "row"
+
+        :param ref_name: Reference name, one of "items" or "tags"
+
+        :type ignore_unknown: bool
+        :param ignore_unknown: Should unknown items or tags be ignored or not?
+
+        :rtype SSparseMatrix
+        :return: A SSparseMatrix object with a row for each query and the things as columns.
+        """
+        names = []
+        values = []
+        counts = []
+        for arg in args:
+            if isinstance(arg, str):
+                arg = [arg]
+            if is_str_list(arg):
+                arg = dict.fromkeys(arg, 1)
+            elif not is_scored_tags_dict(arg):
+                raise TypeError(
+                    "Each query is expected to be a list of " + ref_name + " or a dictionary of scored "
+                    + ref_name + ".")
+            names.extend(arg.keys())
+            values.extend(arg.values())
+            counts.append(len(arg))
+
+        # The positions of the unknown things are -1
+        things_dict = things_index.names_dict()
+        positions = numpy.fromiter(map(things_dict.get, names, itertools.repeat(-1)),
+                                   dtype=numpy.intp, count=len(names))
+        rows = numpy.repeat(numpy.arange(len(counts)), counts)
+        known = positions >= 0
+
+        if (numpy.bincount(rows[known], minlength=len(counts)) == 0).any():
+            raise LookupError("None of the tags of a query is a valid recommendation matrix " + thing_name + " name.")
+        elif not (ignore_unknown or known.all()):
+            raise LookupError("Not all tags of the queries are valid recommendation matrix " + thing_name + " names.")
+
+        smat = scipy.sparse.csr_matrix((numpy.asarray(values)[known], (rows[known], positions[known])),
+                                       shape=(len(counts), len(things_index)))
+        res = SSparseMatrix(smat)
+        res.set_row_names()
+        res.set_column_names(things_index)
+        return res
+
+    def recommend_by_profile_batch(self, profiles, nrecs=10, normalize=True, ignore_unknown=False):
+        """Recommend by many profiles at once.
+
+        The profiles are stacked into one sparse matrix and the scores of all profiles
+        are computed with one sparse matrix product.
+
+        :type profiles: list|dict|SSparseMatrix
+        :param profiles: A list of profiles, a dictionary of keys to profiles, or a SSparseMatrix object
+        with a row for each profile. Each profile is a tag, a list of tags, or a dictionary of scored tags.
+
+        :type nrecs: int|None
+        :param nrecs: A positive integer or None. If it is None, then all items with non-zero scores are returned.
+
+        :type normalize: bool
+        :param normalize: Should the results be normalized or not.
+
+        :type ignore_unknown: bool
+        :param ignore_unknown: Should the unknown tags be ignored or not?
+
+        :rtype SparseMatrixRecommender
+        :return self: The object itself. The result is stored in self._value: a list of dictionaries
+        of scored items, or, if profiles is a dictionary or a SSparseMatrix object, a dictionary of
+        keys (or row names) to dictionaries of scored items.
+        """
+        if not (nrecs is None or isinstance(nrecs, int) and nrecs > 0):
+            raise TypeError("The second argument, 'nrecs', is expected to be a positive integer or None.")
+
+        if is_s_sparse_matrix(profiles):
+            keys, mat = profiles.row_names(), profiles
+        else:
+            keys, profiles = _split_queries(profiles)
+            mat = self._to_smr_matrix(profiles,
+                                      things_index=self._M.column_names_index(),
+                                      thing_name="column",
+                                      ref_name="tags",
+                                      ignore_unknown=ignore_unknown)
+
+        # Compute the recommendations: items x profiles
+        recs = self.take_M().dot(mat.transpose()).sparse_matrix("csc")
+
+        # Normalize with the maximum absolute score of each profile
+        scale = None
+        if normalize:
+            scale = abs(recs).max(axis=0).toarray().ravel().astype(numpy.float64)
+
+        positions, scores, offsets = _batch_top_k(recs, nrecs, scale)
+
+        self.set_value(_batch_result(keys, self._M.row_names_index(), positions, scores, offsets))
+
+        return self
+
+    def recommend_batch(self, histories, nrecs=10, normalize=True, remove_history=True):
+        """Recommend by many histories at once.
+
+        The histories are stacked into one sparse matrix Q and the scores of all histories
+        are computed with one sparse matrix product, M . (Q . M)^T.
+
+        :type histories: list|dict|SSparseMatrix
+        :param histories: A list of histories, a dictionary of keys to histories, or a SSparseMatrix object
+        with a row for each history. Each history is an item, a list of items, or a dictionary of scored items.
+
+        :type nrecs: int|None
+        :param nrecs: A positive integer or None. If it is None, then all items with non-zero scores are returned.
+
+        :type normalize: bool
+        :param normalize: Should the results be normalized or not.
+
+        :type remove_history: bool
+        :param remove_history: Should the histories be removed from the result recommendations or not?
+
+        :rtype SparseMatrixRecommender
+        :return self: The object itself. The result is stored in self._value: a list of dictionaries
+        of scored items, or, if histories is a dictionary or a SSparseMatrix object, a dictionary of
+        keys (or row names) to dictionaries of scored items.
+        """
+        if not (nrecs is None or isinstance(nrecs, int) and nrecs > 0):
+            raise TypeError("The second argument, 'nrecs', is expected to be a positive integer or None.")
+
+        if is_s_sparse_matrix(histories):
+            keys, mat = histories.row_names(), histories
+        else:
+            keys, histories = _split_queries(histories)
+            mat = self._to_smr_matrix(histories,
+                                      things_index=self._M.row_names_index(),
+                                      thing_name="row",
+                                      ref_name="items")
+
+        # Compute the recommendations: items x histories
+        recs = self.take_M().dot(mat.dot(self.take_M()).transpose(copy=False)).sparse_matrix("csc")
+
+        # Remove the history items: the positive ones of each history
+        if remove_history:
+            hist = mat.sparse_matrix("csr").transpose().tocsc() > 0
+            recs = recs - recs.multiply(hist)
+
+        positions, scores, offsets = _batch_top_k(recs, nrecs, "top" if normalize else None)
+
+        self.set_value(_batch_result(keys, self._M.row_names_index(), positions, scores, offsets))
+
+        return self
+
     # ------------------------------------------------------------------
     # Profile
     # ------------------------------------------------------------------
@@ -654,20 +1848,113 @@ class SparseMatrixRecommender:
         # Compute the profile
         prof = vec.dot(self.take_M())
 
-        # Take non-zero scores tags
-        prof = {key: value for (key, value) in prof.column_sums_dict().items() if value > 0}
-
-        # Reverse sort
-        prof = _reverse_sort_dict(prof)
+        # Take non-zero scores tags and reverse sort them
+        scores = prof.column_sums()
+        positions = _reverse_sort_positions(scores, numpy.flatnonzero(scores > 0))
+        prof = _scores_dict(prof.column_names_index(), scores, positions)
 
         # Assign obtained prof to the pipeline value
         self.set_value(prof)
 
         return self
 
+    # ------------------------------------------------------------------
+    # Posting list index
+    # ------------------------------------------------------------------
+    def create_posting_list_index(self, block_size=128):
+        """Create a posting list index of the tags (the columns of the recommendation matrix):
+        for each tag the sorted positions of the items that have it, delta encoded in blocks.
+
+        The index is used by filter_by_profile and retrieve_by_query_elements. After it is made,
+        it is remade (with the same block size) when it is used with a changed recommendation matrix.
+
+        :type block_size: int
+        :param block_size: Number of item positions per block of the posting lists.
+
+        :rtype SparseMatrixRecommender
+        :return self: The object itself.
+        """
+        if not isinstance(self._M, SSparseMatrix):
+            raise TypeError("Cannot find recommendation matrix.")
+
+        self._postingLists = PostingListIndex(block_size=block_size).create(self._M)
+        self._postingListsM = self._M
+        return self
+
+    def _posting_list_index(self):
+        """The posting list index of the current recommendation matrix, or None if no index is made."""
+        if self._postingLists is not None and self._postingListsM is not self._M:
+            self.create_posting_list_index(block_size=self._postingLists.block_size())
+        return self._postingLists
+
     # ------------------------------------------------------------------
     # Filter by profile
     # ------------------------------------------------------------------
+    def _incidence_matrix(self):
+        """The incidence matrix of the recommendation matrix: a CSC matrix with True for the non-zero elements.
+
+        The matrix is made once and reused until the recommendation matrix is changed.
+        (It is not made for chunked recommendation matrices -- their incidence counts are made block by block.)
+        """
+        if self._incidence is None or self._incidenceM is not self._M:
+            inc = scipy.sparse.csc_matrix(self._M.sparse_matrix("csc") != 0)
+            inc.sort_indices()
+            self._incidence = inc
+            self._incidenceM = self._M
+        return self._incidence
+
+    def _profile_columns(self, profile, ignore_unknown=False):
+        """Column positions and scores of the non-zero tags of a profile. (Profile vectors are not changed.)"""
+        if isinstance(profile, str):
+            profile = [profile]
+
+        if is_str_list(profile):
+            profile = dict.fromkeys(profile, 1)
+
+        if is_scored_tags_dict(profile):
+            positions, scores = _known_positions(profile, self._M.column_names_index(), "column", ignore_unknown)
+        elif is_s_sparse_matrix(profile):
+            positions, scores = _row_scores(profile)
+        else:
+            raise TypeError("The first argument is expected to be a list of tags or a dictionary of scored tags.")
+
+        return positions[scores != 0], scores[scores != 0]
+
+    def _filter_mask(self, profile, filter_type="intersection", ignore_unknown=False):
+        """Boolean array over the items of the recommendation matrix that have the tags of a profile.
+
+        :param profile: A profile specification used to filter with.
+        :param filter_type: The type of filtering one of "union" or "intersection".
+        :param ignore_unknown: Should the unknown tags be ignored or not?
+        :return: A boolean NumPy array with length equal to the number of items.
+        """
+        if not isinstance(self._M, SSparseMatrix):
+            raise TypeError("Cannot find recommendation matrix.")
+
+        columns = numpy.unique(self._profile_columns(profile, ignore_unknown=ignore_unknown)[0])
+
+        if not (isinstance(filter_type, str) and filter_type.lower() in ["union", "intersection"]):
+            raise TypeError("The argument filter_type is expected to be one of \"union\" or \"intersection\".")
+
+        index = self._posting_list_index()
+        if index is None:
+            if is_chunked_s_sparse_matrix(self._M):
+                counts = _chunked_incidence_counts(self._M, columns)
+            else:
+                counts = _incidence_counts(self._incidence_matrix(), columns)
+            if filter_type.lower() == "union":
+                return counts > 0
+            return counts >= len(columns)
+
+        if filter_type.lower() == "union":
+            positions = index.union(columns)
+        else:
+            positions = index.intersection(columns)
+
+        res = numpy.zeros(self._M.rows_count(), dtype=bool)
+        res[positions] = True
+        return res
+
     def filter_by_profile(self,
                           profile,
                           filter_type="intersection",
@@ -675,7 +1962,7 @@ class SparseMatrixRecommender:
         """
         Filter by profile
         -----------------
-        The result is a vector of scored items that is assigned to \code{smrObj$Value}.
+        The result is a list of the items that have the tags of the profile (in the order of the rows of M.)
         If filter_type is "union" each item that has at least one of the tags in profile is in the result.
         (Essentially, that is the same as taking all non-zero score recommendations by profile.)
         If filter_type is "intersection" each item in the result has all tags in profile.
@@ -685,37 +1972,10 @@ class SparseMatrixRecommender:
         :param ignore_unknown:
         :return self: The object itself or None. The result is stored in self._value.
         """
-
-        # Make scored tags vector
-        if isinstance(profile, str):
-            vec = self.to_profile_vector([profile], ignore_unknown=ignore_unknown).take_value()
-        elif isinstance(profile, dict) or isinstance(profile, list):
-            vec = self.to_profile_vector(profile, ignore_unknown=ignore_unknown).take_value()
-        elif is_s_sparse_matrix(profile):
-            vec = profile
-        else:
-            raise TypeError("The first argument is expected to be a list of tags or a dictionary of scored tags.")
-
-        # Unitize
-        profileVec = vec.unitize()
-
-        # Find the items corresponding to the profile and type spec
-        if isinstance(filter_type, str) and filter_type.lower() == "union":
-
-            sVec = self.recommend_by_profile(profileVec, nrecs=None).take_value()
-            sVec = sVec.keys()
-
-        elif isinstance(filter_type, str) and filter_type.lower() == "intersection":
-
-            sVec = self.take_M().unitize().dot(profileVec).row_sums_dict()
-
-            n = profileVec.column_sums()[0]
-            sVec = [k for (k, v) in sVec.items() if v >= n]
-        else:
-            raise TypeError("The argument filter_type is expected to be one of \"union\" or \"intersection\".")
+        mask = self._filter_mask(profile, filter_type=filter_type, ignore_unknown=ignore_unknown)
 
         # Result
-        self.set_value(sVec)
+        self.set_value(self.take_M().row_names_index().array()[mask].tolist())
         return self
 
     # ------------------------------------------------------------------
@@ -732,7 +1992,9 @@ class SparseMatrixRecommender:
         Retrieve by query elements
         --------------------------
         Applies a profile filter to the rows of the recommendation matrix.
- 
+        The query elements are evaluated with boolean arrays over the items and the
+        (cached) incidence matrix of the recommendation matrix, or the posting list index, if it is made.
+
         :param should: A profile specification used to recommend with.
         :param must: A profile specification used to filter with. The items in the result must have the tags in the given list.
         :param must_not: A profile specification used to filter with. The items in the result must not have the tags in given list
@@ -755,15 +2017,22 @@ class SparseMatrixRecommender:
             warnings.warn("All query elements are empty.")
             return self
 
+        nItems = self.take_M().rows_count()
+
         # Should
+        scores = None
         if len(should) > 0 and len(must) > 0:
             # Both should and must are present
-            pVecShould = self.to_profile_vector(should, ignore_unknown=ignore_unknown).take_value()
-            pVecMust = self.to_profile_vector(must, ignore_unknown=ignore_unknown).take_value()
+            columns, weights = self._profile_columns(should, ignore_unknown=ignore_unknown)
+            columns2, weights2 = self._profile_columns(must, ignore_unknown=ignore_unknown)
 
-            shouldItems = self.recommend_by_profile(pVecShould.add(pVecMust),
-                                                    nrecs=None,
-                                                    ignore_unknown=ignore_unknown).take_value()
+            columns = numpy.concatenate([columns, columns2])
+            weights = numpy.concatenate([weights, weights2])
+            if is_chunked_s_sparse_matrix(self._M):
+                scores = _chunked_column_scores(self._M, columns, weights)
+            else:
+                scores = _column_scores(self._M.sparse_matrix("csc"), columns, weights)
+            res = scores > 0
 
         elif len(should) > 0 and len(must) == 0 and len(must_not) == 0:
             # Only should is not empty
@@ -771,47 +2040,37 @@ class SparseMatrixRecommender:
             pVecShould = self.to_profile_vector(should, ignore_unknown=ignore_unknown).take_value()
             self.recommend_by_profile(pVecShould,
                                       nrecs=None,
-                                      ignore_unknown=ignore_unknown)
+                                      ignore_unknown=ignore_unknown,
+                                      method="exact")
 
             return self
 
         else:
-            shouldItems = dict.fromkeys(self.take_M().row_names(), 1)
-
-        res = shouldItems
+            res = numpy.ones(nItems, dtype=bool)
 
         # Must
         if len(must) > 0:
-            mustItems = self.filter_by_profile(must,
-                                               filter_type=must_type,
-                                               ignore_unknown=ignore_unknown).take_value()
+            mustMask = self._filter_mask(must, filter_type=must_type, ignore_unknown=ignore_unknown)
 
-            if len(mustItems) == 0:
+            if mustMask.any():
+                res &= mustMask
+            else:
                 warnings.warn("No items were obtained by querying with the must tags.")
 
-        else:
-            mustItems = []
-
-        if len(mustItems) > 0:
-            res = set.intersection(set(res), set(mustItems))
-
         # Must not
         if len(must_not) > 0:
-            mustNotItems = self.filter_by_profile(must_not,
-                                                  filter_type=must_not_type,
-                                                  ignore_unknown=ignore_unknown).take_value()
+            mustNotMask = self._filter_mask(must_not, filter_type=must_not_type, ignore_unknown=ignore_unknown)
 
-            if len(mustNotItems) == 0:
+            if mustNotMask.any():
+                res &= ~mustNotMask
+            else:
                 warnings.warn("No items were obtained by querying with the must not tags.")
 
-        else:
-            mustNotItems = []
-
-        if len(mustNotItems) > 0:
-            res = set.difference(set(res), set(mustNotItems))
-
-        # Result
-        self.set_value(dict.fromkeys(res, 1))
+        # Result (in the order of the should scores, if any)
+        positions = numpy.flatnonzero(res)
+        if scores is not None:
+            positions = _reverse_sort_positions(scores, positions)
+        self.set_value(dict.fromkeys(self.take_M().row_names_index().array()[positions].tolist(), 1))
         return self
 
     # ------------------------------------------------------------------
@@ -912,7 +2171,8 @@ class SparseMatrixRecommender:
                             drop_zero_scored_labels=True,
                             max_number_of_labels=None,
                             normalize: bool = True,
-                            ignore_unknown: bool = False):
+                            ignore_unknown: bool = False,
+                            method="exact"):
         """Classify by profile vector.
 
         :type tag_type: str
@@ -938,6 +2198,9 @@ class SparseMatrixRecommender:
         :type ignore_unknown: bool
         :param ignore_unknown: Should the unknown tags be ignored or not?
 
+        :type method: str|None
+        :param method: Scoring method of the nearest neighbors, "exact" or "ann". (See recommend_by_profile.)
+
         :rtype SparseMatrixRecommender
         :return self: The object itself or None. The result is stored in self._value.
         """
@@ -949,7 +2212,8 @@ class SparseMatrixRecommender:
         recs = self.recommend_by_profile(profile=profile,
                                          nrecs=n_top_nearest_neighbors,
                                          vector_result=True,
-                                         ignore_unknown=ignore_unknown).take_value()
+                                         ignore_unknown=ignore_unknown,
+                                         method=method).take_value()
 
         # "Nothing" result
         if recs.column_sums()[0] == 0:
@@ -968,26 +2232,29 @@ class SparseMatrixRecommender:
 
         # Get scores
         clRes = recs.dot(matTagType)
-
-        # Convert to dictionary
-        clRes = clRes.column_sums_dict()
+        scores = clRes.column_sums()
 
         # Drop zero scored labels
         if drop_zero_scored_labels:
-            clRes = {k: v for (k, v) in clRes.items() if v > 0}
+            positions = numpy.flatnonzero(scores > 0)
+        else:
+            positions = numpy.arange(len(scores))
 
         # Normalize
-        if normalize:
-            cl_max = max(list(clRes.values()))
+        if normalize and len(positions) > 0:
+            cl_max = scores[positions].max()
             if cl_max > 0:
-                clRes = {k: v / cl_max for (k, v) in clRes.items()}
+                scores = scores / cl_max
 
         # Reverse sort
-        clRes = _reverse_sort_dict(clRes)
+        positions = _reverse_sort_positions(scores, positions)
 
         # Pick max-top labels
-        if max_number_of_labels and max_number_of_labels > len(clRes):
-            clRes = dict(list(recs.items())[0:max_number_of_labels])
+        if max_number_of_labels and max_number_of_labels < len(positions):
+            positions = positions[0:max_number_of_labels]
+
+        # Convert to dictionary
+        clRes = _scores_dict(clRes.column_names_index(), scores, positions)
 
         # Result
         self.set_value(clRes)
@@ -1062,7 +2329,7 @@ class SparseMatrixRecommender:
         if tag_type_matrix is None:
             my_tag_type_matrix = self.sub_matrix(tag_type_to)
 
-        if not my_tag_type_matrix.row_names() == self.take_M().row_names():
+        if not my_tag_type_matrix.row_names_index() == self.take_M().row_names_index():
             raise ValueError(
                 "The argument tag_type_matrix has row names that are different than the row names of recommender matrix.")
 
@@ -1167,9 +2434,13 @@ class SparseMatrixRecommender:
                                        tag_types=None,
                                        number_of_nearest_neighbors=20,
                                        nearest_neighbors_tag_type="neighbor",
-                                       batch_size=None):
+                                       batch_size=None,
+                                       n_jobs=None):
         """Enhance recommender matrix with nearest neighbors sub-matrix.
 
+        The similarities are computed with sparse matrix products of blocks of rows of the recommendation matrix
+        with its transpose; only the top nearest neighbors of each block are kept.
+
         :tupe tag_types: str|list|None
         :param tag_types: Tag types to use make compute the similarities.
 
@@ -1180,7 +2451,10 @@ class SparseMatrixRecommender:
         :param nearest_neighbors_tag_type: Tag type of the nearest neighbor sub-matrix.
 
         :type batch_size: int|None
-        :param batch_size: Number of nearest neighbors per item.
+        :param batch_size: Number of items per block. If None, 1000 is used.
+
+        :type n_jobs: int|None
+        :param n_jobs: Number of worker processes the blocks are spread over. If None or 1, no processes are used.
 
         :rtype: SparseMatrixRecommender
         :return A sparse matrix recommender
@@ -1204,32 +2478,64 @@ class SparseMatrixRecommender:
         else:
             smrRes = self
 
-        # Similarities computations
-        # This implementation is far from optimal.
-        dfNNs = None
-        for itemID in smrRes.take_M().row_names():
+        if batch_size is None:
+            batch_size = 1000
+        elif not (isinstance(batch_size, int) and batch_size > 0):
+            raise ValueError("The argument batch_size is expected to be a positive integer or None.")
 
-            aRecs = smrRes.recommend(history=itemID,
-                                     nrecs=number_of_nearest_neighbors,
-                                     remove_history=False,
-                                     normalize=True).take_value()
+        if not (n_jobs is None or isinstance(n_jobs, int) and n_jobs > 0):
+            raise ValueError("The argument n_jobs is expected to be a positive integer or None.")
 
-            dfRecs = pandas.DataFrame(
-                {"SearchID": itemID, "NearestNeighborID": list(aRecs.keys()), "Score": list(aRecs.values())})
+        # Similarities computations by blocks of items
+        M = smrRes.take_M()
+        Mt = M.transpose()
+        blocks = [M[start:start + batch_size, :] for start in range(0, M.rows_count(), batch_size)]
 
-            if dfNNs is None:
-                dfNNs = dfRecs
-            else:
-                dfNNs = pandas.concat([dfNNs, dfRecs], ignore_index=True)
+        if n_jobs is None or n_jobs == 1:
+            nnBlocks = [_nearest_neighbors_block(b, number_of_nearest_neighbors, Mt) for b in blocks]
+        else:
+            with ProcessPoolExecutor(max_workers=n_jobs,
+                                     initializer=_nearest_neighbors_init,
+                                     initargs=(Mt,)) as executor:
+                nnBlocks = list(executor.map(_nearest_neighbors_block,
+                                             blocks,
+                                             itertools.repeat(number_of_nearest_neighbors)))
+
+        if len(nnBlocks) == 0:
+            smat = scipy.sparse.csr_matrix((0, 0))
+        else:
+            smat = scipy.sparse.vstack(nnBlocks, format="csc")
+
+        # The nearest neighbors are the columns, ordered by name
+        neighbors = numpy.flatnonzero(numpy.diff(smat.indptr))
+        neighborNames = M.row_names_index().array()[neighbors]
+        order = numpy.argsort(neighborNames, kind="stable")
 
         # Annex sub-matrix
-        smatNNs = cross_tabulate(dfNNs, "SearchID", "NearestNeighborID", "Score")
+        smatNNs = SSparseMatrix(smat[:, neighbors[order]].tocsr())
+        smatNNs.set_row_names(M.row_names_index())
+        smatNNs.set_column_names(neighborNames[order].tolist())
 
         smrRes = self.annex_sub_matrices(mats={nearest_neighbors_tag_type: smatNNs})
 
         # Result
         return smrRes
 
+    # ------------------------------------------------------------------
+    # Stateless queries
+    # ------------------------------------------------------------------
+    def query(self):
+        """Make a stateless query object of the recommender.
+
+        The query functions of the made object return their results directly (instead of storing them
+        in self._value), hence the query object can be used by several threads at the same time.
+        (See SparseMatrixRecommenderQuery.)
+
+        :rtype SparseMatrixRecommenderQuery
+        :return: A query object with a snapshot of the recommender.
+        """
+        return SparseMatrixRecommenderQuery(self)
+
     # ------------------------------------------------------------------
     # To dictionary form
     # ------------------------------------------------------------------
@@ -1242,6 +2548,7 @@ class SparseMatrixRecommender:
         The value of the keys 'matrices' is a dictionary of dictionaries.
 
         (Ideally) this function facilitates rapid conversion and serialization.
+        For large recommenders use to_file -- the binary file can be memory mapped when read.
         """
         res = {"matrices": {k: v.to_dict() for (k, v) in self.take_matrices().items()},
                "tagTypeWeights": self.take_tag_type_weights(),
@@ -1261,6 +2568,7 @@ class SparseMatrixRecommender:
         The value of the keys 'matrices' is expected to be a dictionary of dictionaries.
 
         (Ideally) this function facilitates rapid conversion and serialization.
+        For large recommenders use from_file -- the sub-matrices are not bound again.
         """
         if not (isinstance(arg, dict) and
                 all([x in {'matrices', 'tagTypeWeights', 'data', 'value'} for x in list(arg.keys())])):
@@ -1277,6 +2585,153 @@ class SparseMatrixRecommender:
         self.set_value(arg["value"])
         return self
 
+    # ------------------------------------------------------------------
+    # To binary file
+    # ------------------------------------------------------------------
+    def to_file(self, file_name, incremental_updates=True):
+        """Write to a binary file.
+
+        The file has the CSR (or CSC) arrays of the recommendation matrix and of the tag type sub-matrices,
+        the row names (stored once), the column ranges of the tag types, the tag weights, and the tag type weights.
+        The arrays are written raw and aligned, hence, the file can be memory mapped when read with from_file.
+        (The data and the pipeline value are not written; the indexes are made again after reading.)
+
+        :type file_name: str
+        :param file_name: File name.
+
+        :type incremental_updates: bool
+        :param incremental_updates: Should the sub-matrices before the term weight functions and the rest of
+        the state of the incremental updates be written or not?
+
+        :rtype SparseMatrixRecommender
+        :return self: The object itself.
+        """
+        if not isinstance(self._M, SSparseMatrix):
+            raise TypeError("Cannot find recommendation matrix.")
+
+        rowNames = self._M.row_names_index()
+        columnNames = self._M.column_names_index()
+
+        arrays = {"rowNames": encode_names(rowNames.array()), "columnNames": encode_names(columnNames.array())}
+        meta = {"format": _FILE_FORMAT,
+                "formatVersion": _FILE_FORMAT_VERSION,
+                "M": _put_s_sparse_matrix(arrays, "M/", self._M, rowNames, columnNames, [0, len(columnNames)]),
+                "matrices": None,
+                "tagTypeWeights": self._tagTypeWeights,
+                "incrementalUpdates": None}
+
+        # The tag types and their column ranges
+        columnRanges = {}
+        if self._matrices is not None:
+            meta["matrices"] = []
+            start = 0
+            for (i, (k, v)) in enumerate(self._matrices.items()):
+                columnRanges[k] = [start, start + v.columns_count()]
+                spec = _put_s_sparse_matrix(arrays, "matrices/%d/" % i, v, rowNames, columnNames, columnRanges[k])
+                meta["matrices"].append(dict(tagType=k, **spec))
+                start += v.columns_count()
+
+        if incremental_updates and self._rawMatrices is not None:
+            rawMatrices = []
+            for (i, (k, v)) in enumerate(self._rawMatrices.items()):
+                if self._matrices is not None and v is self._matrices.get(k, None):
+                    rawMatrices.append({"tagType": k, "sameAsMatrix": True})
+                else:
+                    spec = _put_s_sparse_matrix(arrays, "rawMatrices/%d/" % i, v, rowNames, columnNames,
+                                                columnRanges.get(k, None))
+                    rawMatrices.append(dict(tagType=k, sameAsMatrix=False, **spec))
+
+            tagWeights = None
+            if self._tagWeights is not None:
+                tagWeights = list(self._tagWeights.keys())
+                for (i, v) in enumerate(self._tagWeights.values()):
+                    arrays["tagWeights/%d" % i] = numpy.asarray(v, dtype=float)
+
+            meta["incrementalUpdates"] = {
+                "rawMatrices": rawMatrices,
+                "tagValueSeparator": self._tagValueSeparator,
+                "termWeightFunctions": self._termWeightFunctions,
+                "tagWeights": tagWeights,
+                "tagTypeFactors": {k: float(v) for (k, v) in self._tagTypeFactors.items()}
+            }
+
+        write_binary_container(file_name, arrays, meta)
+        return self
+
+    # ------------------------------------------------------------------
+    # From binary file
+    # ------------------------------------------------------------------
+    def from_file(self, file_name, mmap_mode="r", posting_lists=False):
+        """Read from a binary file made with to_file.
+
+        :type file_name: str
+        :param file_name: File name.
+
+        :type mmap_mode: str|None
+        :param mmap_mode: Memory mapping mode of the matrix arrays, one of "r", "c", or None.
+        With the default, "r", the arrays are mapped read only, hence, the reading time does not depend on
+        the sizes of the matrices, and several processes can share the same recommender.
+        If None the arrays are read into memory.
+
+        :type posting_lists: bool
+        :param posting_lists: Should a posting list index of the tags be made or not?
+
+        :rtype SparseMatrixRecommender
+        :return self: The object itself.
+        """
+        if mmap_mode not in {"r", "c", None}:
+            raise ValueError("The argument mmap_mode is expected to be one of \"r\", \"c\", or None.")
+
+        meta, arrays = read_binary_container(file_name, mmap_mode=mmap_mode)
+
+        if meta.get("format", None) != _FILE_FORMAT:
+            raise ValueError("The file " + repr(file_name) + " is not a recommender file.")
+
+        if meta.get("formatVersion", None) != _FILE_FORMAT_VERSION:
+            raise ValueError("Unsupported recommender file format version: " +
+                             repr(meta.get("formatVersion", None)) + ".")
+
+        shape = meta["M"]["shape"]
+        rowNames = NameIndex(decode_names(arrays["rowNames"], shape[0]))
+        columnNames = NameIndex(decode_names(arrays["columnNames"], shape[1]))
+
+        self._M = _take_s_sparse_matrix(arrays, "M/", meta["M"], rowNames, columnNames)
+
+        self._matrices = None
+        if meta["matrices"] is not None:
+            self._matrices = {spec["tagType"]: _take_s_sparse_matrix(arrays, "matrices/%d/" % i, spec,
+                                                                      rowNames, columnNames)
+                              for (i, spec) in enumerate(meta["matrices"])}
+
+        self._tagTypeWeights = meta["tagTypeWeights"]
+
+        state = meta["incrementalUpdates"]
+        if state is None:
+            self._rawMatrices = None
+        else:
+            self._rawMatrices = {}
+            for (i, spec) in enumerate(state["rawMatrices"]):
+                if spec["sameAsMatrix"]:
+                    self._rawMatrices[spec["tagType"]] = self._matrices[spec["tagType"]]
+                else:
+                    self._rawMatrices[spec["tagType"]] = _take_s_sparse_matrix(arrays, "rawMatrices/%d/" % i, spec,
+                                                                               rowNames, columnNames)
+            self._tagValueSeparator = state["tagValueSeparator"]
+            self._termWeightFunctions = state["termWeightFunctions"]
+            self._termStatistics = None
+            self._tagWeights = None
+            if state["tagWeights"] is not None:
+                self._tagWeights = {k: numpy.array(arrays["tagWeights/%d" % i])
+                                    for (i, k) in enumerate(state["tagWeights"])}
+            self._tagTypeFactors = dict(state["tagTypeFactors"])
+
+        self._value = None
+
+        if posting_lists:
+            self.create_posting_list_index()
+
+        return self
+
     # ------------------------------------------------------------------
     # Representation
     # ------------------------------------------------------------------
@@ -1293,4 +2748,158 @@ class SparseMatrixRecommender:
         """Representation of SparseMatrixRecommender object."""
         return "<Sparse matrix recommender object with matrix dimensions %dx%d\n" \
                "\tand with %d tag types>" % \
-               (self._M.sparse_matrix().shape + (len(self._matrices),))
+               (self._M.shape() + (len(self._matrices),))
+
+
+# ======================================================================
+# Stateless queries
+# ======================================================================
+class SparseMatrixRecommenderQuery:
+    """Stateless queries of a SparseMatrixRecommender object.
+
+    The query functions return their results directly -- no pipeline value is set -- hence one query object
+    can serve concurrent requests (e.g. from a thread pool) without locking.
+
+    The query object has a snapshot of the recommender made at its creation. The matrices and the indexes
+    of the snapshot are shared with the recommender and are only read; the lazily made matrix conversions
+    and indexes are made in advance. Changes of the recommender made after the creation of the query object
+    (e.g. incremental updates) are not seen by it -- make a new query object after them.
+    """
+    _smr = None
+
+    def __init__(self, smr):
+        """Creation of a SparseMatrixRecommenderQuery object.
+
+        :type smr: SparseMatrixRecommender
+        :param smr: A recommender object.
+        """
+        if not isinstance(smr, SparseMatrixRecommender):
+            raise TypeError("The first argument is expected to be a SparseMatrixRecommender object.")
+
+        if not isinstance(smr.take_M(), SSparseMatrix):
+            raise TypeError("Cannot find recommendation matrix.")
+
+        snapshot = copy.copy(smr)
+        snapshot.set_value(None)
+
+        # Make the lazily made conversions and indexes in advance (out-of-core matrices are not loaded)
+        M = snapshot.take_M()
+        M.row_names_index().names_dict()
+        M.column_names_index().names_dict()
+        if not is_chunked_s_sparse_matrix(M):
+            M.sparse_matrix("csr")
+            M.sparse_matrix("csc")
+            if snapshot._posting_list_index() is None:
+                snapshot._incidence_matrix()
+
+        self._smr = snapshot
+
+    def _view(self):
+        """A shallow copy of the snapshot; the pipeline value of each query is set in its own copy."""
+        return copy.copy(self._smr)
+
+    # ------------------------------------------------------------------
+    # Getters
+    # ------------------------------------------------------------------
+    def take_M(self):
+        """Take the recommendation matrix of the snapshot."""
+        return self._smr.take_M()
+
+    def take_matrices(self):
+        """Take the tag type matrices of the snapshot."""
+        return self._smr.take_matrices()
+
+    # ------------------------------------------------------------------
+    # Vectors
+    # ------------------------------------------------------------------
+    def to_profile_vector(self, arg, ignore_unknown=False):
+        """Profile SSparseMatrix (with one column) of a tag, a list of tags, or a dictionary of scored tags.
+        (See SparseMatrixRecommender.to_profile_vector.)"""
+        return self._view().to_profile_vector(arg, ignore_unknown=ignore_unknown).take_value()
+
+    def to_history_vector(self, arg, ignore_unknown=False):
+        """History SSparseMatrix (with one column) of an item, a list of items, or a dictionary of scored items.
+        (See SparseMatrixRecommender.to_history_vector.)"""
+        return self._view().to_history_vector(arg, ignore_unknown=ignore_unknown).take_value()
+
+    # ------------------------------------------------------------------
+    # Recommendations
+    # ------------------------------------------------------------------
+    def recommend(self, history, nrecs=10, normalize=True, remove_history=True, method="exact"):
+        """Recommend by history. (See SparseMatrixRecommender.recommend.)
+
+        :return: A dictionary of scored items.
+        """
+        return self._view().recommend(history, nrecs=nrecs, normalize=normalize,
+                                      remove_history=remove_history, method=method).take_value()
+
+    def recommend_by_profile(self, profile, nrecs=10, normalize=True, ignore_unknown=False,
+                             vector_result: bool = False, method="exact"):
+        """Recommend by profile. (See SparseMatrixRecommender.recommend_by_profile.)
+
+        :return: A dictionary of scored items, or a SSparseMatrix object if vector_result is True.
+        """
+        return self._view().recommend_by_profile(profile, nrecs=nrecs, normalize=normalize,
+                                                 ignore_unknown=ignore_unknown,
+                                                 vector_result=vector_result, method=method).take_value()
+
+    def recommend_batch(self, histories, nrecs=10, normalize=True, remove_history=True):
+        """Recommend by many histories at once. (See SparseMatrixRecommender.recommend_batch.)"""
+        return self._view().recommend_batch(histories, nrecs=nrecs, normalize=normalize,
+                                            remove_history=remove_history).take_value()
+
+    def recommend_by_profile_batch(self, profiles, nrecs=10, normalize=True, ignore_unknown=False):
+        """Recommend by many profiles at once. (See SparseMatrixRecommender.recommend_by_profile_batch.)"""
+        return self._view().recommend_by_profile_batch(profiles, nrecs=nrecs, normalize=normalize,
+                                                       ignore_unknown=ignore_unknown).take_value()
+
+    def profile(self, history):
+        """Profile of a history. (See SparseMatrixRecommender.profile.)
+
+        :return: A dictionary of scored tags.
+        """
+        return self._view().profile(history).take_value()
+
+    # ------------------------------------------------------------------
+    # Retrieval
+    # ------------------------------------------------------------------
+    def filter_by_profile(self, profile, filter_type="intersection", ignore_unknown=False):
+        """Filter the items by profile. (See SparseMatrixRecommender.filter_by_profile.)
+
+        :return: A list of items.
+        """
+        return self._view().filter_by_profile(profile, filter_type=filter_type,
+                                              ignore_unknown=ignore_unknown).take_value()
+
+    def retrieve_by_query_elements(self, should=[], must=[], must_not=[],
+                                   must_type="intersection", must_not_type="union", ignore_unknown=False):
+        """Retrieve items by query elements. (See SparseMatrixRecommender.retrieve_by_query_elements.)"""
+        return self._view().retrieve_by_query_elements(should=should, must=must, must_not=must_not,
+                                                       must_type=must_type, must_not_type=must_not_type,
+                                                       ignore_unknown=ignore_unknown).take_value()
+
+    # ------------------------------------------------------------------
+    # Classification
+    # ------------------------------------------------------------------
+    def classify_by_profile(self, tag_type, profile, n_top_nearest_neighbors=100, voting=False,
+                            drop_zero_scored_labels=True, max_number_of_labels=None,
+                            normalize: bool = True, ignore_unknown: bool = False, method="exact"):
+        """Classify by profile vector. (See SparseMatrixRecommender.classify_by_profile.)
+
+        :return: A dictionary of scored labels.
+        """
+        return self._view().classify_by_profile(tag_type, profile,
+                                                n_top_nearest_neighbors=n_top_nearest_neighbors,
+                                                voting=voting,
+                                                drop_zero_scored_labels=drop_zero_scored_labels,
+                                                max_number_of_labels=max_number_of_labels,
+                                                normalize=normalize,
+                                                ignore_unknown=ignore_unknown,
+                                                method=method).take_value()
+
+    # ------------------------------------------------------------------
+    # Representation
+    # ------------------------------------------------------------------
+    def __repr__(self):
+        return "<Stateless queries of a sparse matrix recommender with matrix dimensions %dx%d>" % \
+               self._smr.take_M().shape()
@@ -1,6 +1,12 @@
 """Sparse Matrix Recommender (SMR) package for creating SMR objects and computing recommendations with them."""
 from SparseMatrixRecommender.CrossTabulate import cross_tabulate
 from SparseMatrixRecommender.DocumentTermWeightFunctions import global_term_function_weights
+from SparseMatrixRecommender.DocumentTermWeightFunctions import global_term_function_weights_by_statistics
+from SparseMatrixRecommender.DocumentTermWeightFunctions import global_term_statistics
 from SparseMatrixRecommender.DocumentTermWeightFunctions import apply_term_weight_functions
 from SparseMatrixRecommender.DataFrameCategorizer import DataFrameCategorizer, data_frame_columns_alignment
 from SparseMatrixRecommender.SparseMatrixRecommender import SparseMatrixRecommender
+from SparseMatrixRecommender.SparseMatrixRecommender import SparseMatrixRecommenderQuery
+from SparseMatrixRecommender.ApproximateNearestNeighbors import ApproximateNearestNeighbors
+from SparseMatrixRecommender.ApproximateNearestNeighbors import recall_at_k
+from SparseMatrixRecommender.PostingListIndex import PostingListIndex
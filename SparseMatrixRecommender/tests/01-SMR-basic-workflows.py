@@ -1,9 +1,12 @@
 # Follows the tests in
 #   https://github.com/antononcube/R-packages/tree/master/SparseMatrixRecommender
 
+import tempfile
 import unittest
 
+import numpy
 import pandas.core.frame
+from SSparseMatrix import ChunkedSSparseMatrix
 from SparseMatrixRecommender.DataLoaders import *
 from SparseMatrixRecommender.SparseMatrixRecommender import *
 
@@ -64,6 +67,163 @@ class SMRRecommendations(unittest.TestCase):
                 .take_value())
         self.assertTrue(isinstance(recs, pandas.core.frame.DataFrame))
 
+    def test_top_k_1(self):
+        # The top-k recommendations are the first ones of all sorted recommendations (ties included)
+        history = {"id.1": 1, "id.14": 2, "id.33": 1}
+        profile = ["cap-Shape:convex", "edibility:poisonous"]
+        recsAll = self.smr.recommend(history, nrecs=None, normalize=False).take_value()
+        recs = self.smr.recommend(history, nrecs=12, normalize=False).take_value()
+        profRecsAll = self.smr.recommend_by_profile(profile, nrecs=None, normalize=False).take_value()
+        profRecs = self.smr.recommend_by_profile(profile, nrecs=12, normalize=False).take_value()
+        self.assertTrue(
+            list(recs.items()) == list(recsAll.items())[0:12] and
+            list(profRecs.items()) == list(profRecsAll.items())[0:12]
+        )
+
+    def test_normalize_1(self):
+        # The normalized vector results have the scores of the dictionary results, and the matrix M is not changed
+        profile = ["cap-Shape:convex", "edibility:poisonous"]
+        data = self.smr.take_M().sparse_matrix().data.copy()
+        recs = self.smr.recommend_by_profile(profile, nrecs=None).take_value()
+        vecAll = self.smr.recommend_by_profile(profile, nrecs=None, vector_result=True).take_value()
+        vec = self.smr.recommend_by_profile(profile, nrecs=12, vector_result=True).take_value()
+        vecAll = {k: v for (k, v) in vecAll.column_dictionaries()["0"].items() if v != 0}
+        vec = {k: v for (k, v) in vec.column_dictionaries()["0"].items() if v != 0}
+        self.assertTrue(
+            max(recs.values()) == 1 and
+            vecAll.keys() == recs.keys() and all([abs(v - recs[k]) < 1e-12 for (k, v) in vecAll.items()]) and
+            len(vec) == 12 and all([v == vecAll[k] for (k, v) in vec.items()]) and
+            numpy.all(self.smr.take_M().sparse_matrix().data == data)
+        )
+
+    def test_vector_result_1(self):
+        # The vector result has the scaled rows of the top scores, with all item names
+        profile = {"cap-Shape:convex": 1, "odor:none": -1}
+        recs = self.smr.recommend_by_profile(profile, nrecs=12).take_value()
+        vec = self.smr.recommend_by_profile(profile, nrecs=12, vector_result=True).take_value()
+        profVec = self.smr.to_profile_vector(profile).take_value()
+        allRecs = self.smr.take_M().dot(profVec).sparse_matrix().toarray()
+
+        self.assertTrue(
+            vec.row_names_index() is self.smr.take_M().row_names_index() and
+            vec.column_dictionaries()["0"] == recs and
+            numpy.allclose(vec.sparse_matrix().toarray()[vec.row_sums() != 0],
+                           allRecs[vec.row_sums() != 0] / numpy.abs(allRecs).max())
+        )
+
+    def test_nrecs_1(self):
+        # Verify invalid numbers of recommendations are rejected
+        for nrecs in [0, -3, "10", 2.5]:
+            with self.assertRaises(TypeError):
+                self.smr.recommend("id.1", nrecs=nrecs)
+            with self.assertRaises(TypeError):
+                self.smr.recommend_by_profile(["cap-Shape:convex"], nrecs=nrecs)
+            with self.assertRaises(TypeError):
+                self.smr.recommend_by_profile(["cap-Shape:convex"], nrecs=nrecs, vector_result=True)
+
+    def test_recommend_batch_1(self):
+        # The batch recommendations are the same as the recommendations for each history
+        histories = {"h1": ["id.1", "id.14", "id.33"], "h2": {"id.1": 1, "id.14": 2, "id.33": 1}, "h3": "id.100"}
+        recs = self.smr.recommend_batch(histories, nrecs=12).take_value()
+        self.assertTrue(
+            recs.keys() == histories.keys() and
+            all([recs[k] == self.smr.recommend(h, nrecs=12).take_value() for (k, h) in histories.items()])
+        )
+
+    def test_recommend_by_profile_batch_1(self):
+        # The batch recommendations are the same as the recommendations for each profile
+        profiles = [["cap-Shape:convex", "edibility:poisonous"], {"cap-Shape:convex": 1.2, "edibility:poisonous": 1.4}]
+        recs = self.smr.recommend_by_profile_batch(profiles, nrecs=None).take_value()
+        self.assertTrue(
+            isinstance(recs, list) and
+            all([r == self.smr.recommend_by_profile(p, nrecs=None).take_value() for (r, p) in zip(recs, profiles)])
+        )
+
+    def test_chunked_matrix_1(self):
+        # The same recommendations with an out-of-core recommendation matrix
+        with tempfile.TemporaryDirectory() as directory:
+            cmat = ChunkedSSparseMatrix().from_s_sparse_matrix(self.smr.take_M(), directory, rows_per_block=1000)
+            smr2 = SparseMatrixRecommender().set_M(cmat)
+            history = {"id.1": 1, "id.14": 2, "id.33": 1}
+            profile = ["cap-Shape:convex", "edibility:poisonous"]
+            self.assertTrue(
+                smr2.recommend(history, nrecs=12).take_value() == self.smr.recommend(history, nrecs=12).take_value() and
+                smr2.recommend_by_profile(profile).take_value().keys() ==
+                self.smr.recommend_by_profile(profile).take_value().keys())
+
+    def test_chunked_matrix_2(self):
+        # The same filtering and retrieval results with an out-of-core recommendation matrix
+        with tempfile.TemporaryDirectory() as directory:
+            cmat = ChunkedSSparseMatrix().from_s_sparse_matrix(self.smr.take_M(), directory, rows_per_block=1000)
+            smr2 = SparseMatrixRecommender().set_M(cmat)
+            profile = ["cap-Shape:convex", "edibility:poisonous"]
+            query = {"should": ["cap-Color:red", "odor:none"], "must": ["cap-Shape:convex"],
+                     "must_not": ["edibility:poisonous"]}
+            res = smr2.retrieve_by_query_elements(**query).take_value()
+            self.assertTrue(
+                smr2.filter_by_profile(profile).take_value() == self.smr.filter_by_profile(profile).take_value() and
+                smr2.filter_by_profile(profile, filter_type="union").take_value() ==
+                self.smr.filter_by_profile(profile, filter_type="union").take_value() and
+                len(res) > 0 and
+                list(res.keys()) == list(self.smr.retrieve_by_query_elements(**query).take_value().keys()))
+
+
+class SMRItemSimilarityIndex(unittest.TestCase):
+    dfTitanic = load_titanic_data_frame()
+    smr = (SparseMatrixRecommender()
+           .create_from_wide_form(data=dfTitanic,
+                                  columns=None,
+                                  item_column_name="id",
+                                  add_tag_types_to_column_names=True,
+                                  tag_value_separator=":")
+           .apply_term_weight_functions(global_weight_func="IDF",
+                                        local_weight_func="None",
+                                        normalizer_func="Cosine"))
+
+    def test_single_item_1(self):
+        # With nrecs smaller than k - 1 the recommendations by single items are the exact ones
+        self.smr.create_item_similarity_index(k=22, batch_size=500)
+        res = []
+        for item in ["id.1", "id.14", "id.33", "id.600"]:
+            recs = self.smr.recommend(item, nrecs=20, method="index").take_value()
+            recs2 = self.smr.recommend(item, nrecs=20, method="exact").take_value()
+            res.append(recs.keys() == recs2.keys() and numpy.allclose(list(recs.values()), list(recs2.values())))
+        self.assertTrue(all(res))
+
+    def test_default_method_1(self):
+        # The index is used only if it is requested
+        smr2 = SparseMatrixRecommender().set_M(self.smr.take_M()).create_item_similarity_index(k=3)
+        self.assertTrue(
+            smr2.recommend("id.1", nrecs=20).take_value() == self.smr.recommend("id.1", nrecs=20, method="exact").take_value() and
+            len(smr2.recommend("id.1", nrecs=20, method="index").take_value()) <= 2
+        )
+
+    def test_history_1(self):
+        # Without pruning the recommendations by histories are the exact ones
+        self.smr.create_item_similarity_index(k=self.smr.take_M().rows_count())
+        history = {"id.1": 1, "id.14": 2, "id.33": 1}
+        recs = self.smr.recommend(history, nrecs=20, method="index").take_value()
+        recs2 = self.smr.recommend(history, nrecs=20, method="exact").take_value()
+        self.assertTrue(recs.keys() == recs2.keys() and
+                        numpy.allclose(list(recs.values()), list(recs2.values())))
+
+    def test_n_jobs_1(self):
+        # The blocks computed by worker processes give the same index
+        smr2 = SparseMatrixRecommender().set_M(self.smr.take_M())
+        index = smr2.create_item_similarity_index(k=10, batch_size=500).take_item_similarity_index()
+        index2 = smr2.create_item_similarity_index(k=10, batch_size=500, n_jobs=2).take_item_similarity_index()
+        self.assertTrue(index.eq(index2))
+        with self.assertRaises(ValueError):
+            smr2.create_item_similarity_index(k=10, n_jobs=0)
+
+    def test_stale_index_1(self):
+        # The index is not used after the recommendation matrix is changed
+        smr2 = SparseMatrixRecommender().set_M(self.smr.take_M()).create_item_similarity_index(k=10)
+        smr2.set_M(self.smr.take_M().copy())
+        self.assertTrue(smr2.take_item_similarity_index() is None)
+        with self.assertRaises(ValueError):
+            smr2.recommend("id.1", method="index")
+
 
 if __name__ == '__main__':
     unittest.main()
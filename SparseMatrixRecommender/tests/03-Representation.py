@@ -1,6 +1,8 @@
 # Follows the tests in
 #   https://github.com/antononcube/R-packages/tree/master/SparseMatrixRecommender
 
+import os
+import tempfile
 import unittest
 
 import pandas.core.frame
@@ -48,6 +50,53 @@ class SMRRepresentation(unittest.TestCase):
         # Verify is a dictionary representing SSparseMatrix object
         self.assertTrue(recs1 == recs2)
 
+    def test_from_file_1(self):
+        # Verify to_file() and from_file() round trip with memory mapping
+        smr = SparseMatrixRecommender().create_from_matrices(self.smr.take_matrices()).apply_tag_type_weights([2, 1, 1, 0.5])
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_name = os.path.join(tmp_dir, "smr.bin")
+            smr.to_file(file_name)
+            smr2 = SparseMatrixRecommender().from_file(file_name, mmap_mode="r")
+
+            prof = {"male": 1.2, "1st": 0.5, "died": 0.4}
+            self.assertTrue(
+                smr2.take_M().eq(smr.take_M()) and
+                not smr2.take_M().sparse_matrix().data.flags.writeable and
+                smr2.take_matrices().keys() == smr.take_matrices().keys() and
+                all([smr2.take_matrices()[k].eq(v) for (k, v) in smr.take_matrices().items()]) and
+                smr2.recommend_by_profile(profile=prof, nrecs=12).take_value() ==
+                smr.recommend_by_profile(profile=prof, nrecs=12).take_value()
+            )
+            del smr2
+
+    def test_from_file_2(self):
+        # Verify the incremental updates of a read recommender are the same as the ones of the original
+        smr = (SparseMatrixRecommender()
+               .create_from_wide_form(data=self.dfData, item_column_name="id")
+               .apply_term_weight_functions(global_weight_func="IDF",
+                                            local_weight_func="None",
+                                            normalizer_func="Cosine"))
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_name = os.path.join(tmp_dir, "smr.bin")
+            smr.to_file(file_name)
+            smr2 = SparseMatrixRecommender().from_file(file_name).remove_items(["id.1", "id.14"])
+
+            self.assertTrue(smr2.take_M().eq(smr.remove_items(["id.1", "id.14"]).take_M()))
+
+            smr.to_file(file_name, incremental_updates=False)
+            smr3 = SparseMatrixRecommender().from_file(file_name, mmap_mode=None)
+            with self.assertRaises(ValueError):
+                smr3.remove_items(["id.33"])
+            del smr2
+
+    def test_from_file_3(self):
+        # Verify files that are not recommender files are not read
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_name = os.path.join(tmp_dir, "smat.bin")
+            self.smr.take_M().to_file(file_name)
+            with self.assertRaises(ValueError):
+                SparseMatrixRecommender().from_file(file_name)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -135,6 +135,28 @@ class SMRRepresentation(unittest.TestCase):
         self.assertTrue(len(set.difference(firstSMRIDs,
                                            set(smrObj4.take_M().row_names()))) == 0)
 
+    def test_enhance_with_nearest_neighbors_1(self):
+        # The nearest neighbors of each item are its recommendations (the item included)
+        smrObj4 = self.smrTitanic.enhance_with_nearest_neighbors(number_of_nearest_neighbors=5, batch_size=100)
+        smatNNs = smrObj4.take_matrices()["neighbor"]
+
+        self.assertTrue(smatNNs.rows_count() == self.smrTitanic.take_M().rows_count())
+        self.assertTrue(all([
+            smatNNs.row_dictionaries()[item] ==
+            self.smrTitanic.recommend(item, nrecs=5, remove_history=False).take_value()
+            for item in ["id.1", "id.33", "id.1000"]
+        ]))
+
+    def test_enhance_with_nearest_neighbors_2(self):
+        # The same nearest neighbors with worker processes
+        smatNNs = (self.smrTitanic
+                   .enhance_with_nearest_neighbors(number_of_nearest_neighbors=5, batch_size=300)
+                   .take_matrices()["neighbor"])
+        smatNNs2 = (self.smrTitanic
+                    .enhance_with_nearest_neighbors(number_of_nearest_neighbors=5, batch_size=300, n_jobs=2)
+                    .take_matrices()["neighbor"])
+        self.assertTrue(smatNNs.eq(smatNNs2))
+
 
 if __name__ == '__main__':
     unittest.main()
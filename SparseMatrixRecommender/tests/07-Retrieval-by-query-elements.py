@@ -3,6 +3,7 @@
 
 import unittest
 
+import numpy
 import pandas.core.frame
 from SparseMatrixRecommender.SparseMatrixRecommender import *
 from SparseMatrixRecommender.DataLoaders import *
@@ -109,6 +110,94 @@ class SMRRepresentation(unittest.TestCase):
 
         self.assertEqual(len(res), len(res2))
 
+    def test_filter_by_profile_1(self):
+        # Verify we get same IDs using pandas for union and intersection filtering.
+
+        obj = self.dfTitanic.copy()
+        objUnion = obj[((obj["passengerSex"] == "female") | (obj["passengerClass"] == "2nd"))]
+        objIntersection = obj[((obj["passengerSex"] == "female") & (obj["passengerClass"] == "2nd"))]
+
+        res = self.smrTitanic.filter_by_profile(["female", "2nd"], filter_type="union").take_value()
+        res2 = self.smrTitanic.filter_by_profile(["female", "2nd"], filter_type="intersection").take_value()
+
+        self.assertEqual(sorted(res), sorted(objUnion.id))
+        self.assertEqual(sorted(res2), sorted(objIntersection.id))
+
+    def test_filter_by_profile_2(self):
+        # Verify the recommendation matrix and the profile vector are not changed by filtering.
+
+        smr = (SparseMatrixRecommender()
+               .create_from_wide_form(data=self.dfTitanic,
+                                      columns=None,
+                                      item_column_name="id",
+                                      add_tag_types_to_column_names=False,
+                                      tag_value_separator=":")
+               .apply_term_weight_functions(global_weight_func="IDF",
+                                            local_weight_func="None",
+                                            normalizer_func="Cosine"))
+        M = smr.take_M().copy()
+        vec = smr.to_profile_vector({"male": 3, "1st": 2}).take_value()
+        vec2 = vec.copy()
+
+        res = smr.filter_by_profile(vec, filter_type="intersection").take_value()
+        res2 = smr.retrieve_by_query_elements(should=["30"], must=["male", "1st"], must_not=["survived"]).take_value()
+
+        self.assertTrue(smr.take_M().eq(M) and vec.eq(vec2))
+        self.assertTrue(len(res) > len(res2) > 0 and set(res2).issubset(res))
+
+
+class SMRPostingListIndex(unittest.TestCase):
+    # Titanic data and recommenders with and without posting list index
+    dfTitanic = load_titanic_data_frame()
+    smrTitanic = (SparseMatrixRecommender()
+                  .create_from_wide_form(data=dfTitanic,
+                                         columns=None,
+                                         item_column_name="id",
+                                         add_tag_types_to_column_names=False,
+                                         tag_value_separator=":")
+                  .apply_term_weight_functions(global_weight_func="IDF",
+                                               local_weight_func="None",
+                                               normalizer_func="Cosine"))
+    smrTitanic2 = (SparseMatrixRecommender()
+                   .create_from_wide_form(data=dfTitanic,
+                                          columns=None,
+                                          item_column_name="id",
+                                          add_tag_types_to_column_names=False,
+                                          tag_value_separator=":",
+                                          posting_lists=True)
+                   .apply_term_weight_functions(global_weight_func="IDF",
+                                                local_weight_func="None",
+                                                normalizer_func="Cosine"))
+
+    def test_postings_1(self):
+        # Verify the posting lists are the non-zero rows of the columns of the recommendation matrix.
+
+        index = PostingListIndex(block_size=16).create(self.smrTitanic.take_M())
+        csc = self.smrTitanic.take_M().sparse_matrix("csc")
+        self.assertTrue(all([numpy.array_equal(index.postings(c), numpy.flatnonzero(csc[:, c].toarray()))
+                             for c in range(csc.shape[1])]))
+        self.assertTrue(numpy.array_equal(index.intersection([0, 3, 5]),
+                                          numpy.flatnonzero((csc[:, [0, 3, 5]] != 0).sum(axis=1) == 3)))
+
+    def test_filter_by_profile_1(self):
+        # Verify we get same IDs with and without posting list index.
+
+        for filterType in ["union", "intersection"]:
+            res = self.smrTitanic.filter_by_profile(["female", "2nd", "died"], filter_type=filterType).take_value()
+            res2 = self.smrTitanic2.filter_by_profile(["female", "2nd", "died"], filter_type=filterType).take_value()
+            self.assertEqual(res, res2)
+
+    def test_retrieve_1(self):
+        # Verify we get same IDs with and without posting list index; the index is remade for changed matrices.
+
+        query = {"should": ["30"], "must": ["male", "1st"], "must_not": ["survived"]}
+        res = self.smrTitanic.retrieve_by_query_elements(**query).take_value()
+        res2 = self.smrTitanic2.retrieve_by_query_elements(**query).take_value()
+
+        self.assertEqual(list(res.keys()), list(res2.keys()))
+        self.assertTrue(self.smrTitanic2.take_posting_list_index().shape() == self.smrTitanic2.take_M().shape() and
+                        self.smrTitanic.take_posting_list_index() is None)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+
+import numpy
+from SparseMatrixRecommender.ApproximateNearestNeighbors import *
+from SparseMatrixRecommender.SparseMatrixRecommender import *
+from SparseMatrixRecommender.DataLoaders import *
+
+
+class SMRApproximateNearestNeighbors(unittest.TestCase):
+    # Mushroom data and recommender
+    dfMushroom = load_mushroom_data_frame()
+    smr = (SparseMatrixRecommender()
+           .create_from_wide_form(data=dfMushroom,
+                                  columns=None,
+                                  item_column_name="id",
+                                  add_tag_types_to_column_names=True,
+                                  tag_value_separator=":")
+           .apply_term_weight_functions(global_weight_func="IDF",
+                                        local_weight_func="None",
+                                        normalizer_func="Cosine"))
+
+    histories = ["id.1", "id.14", "id.33", "id.1000", "id.4025", ["id.7", "id.8"]]
+
+    def test_recall_at_k_1(self):
+        self.assertEqual(recall_at_k([{"a": 1, "b": 0.5}, ["x", "y"]], [{"b": 1, "c": 0.2}, ["y", "x"]], k=2), 0.75)
+
+    def test_lsh_1(self):
+        # Random projections recall the exact recommendations by history
+        self.smr.create_ann_index(method="LSH", n_tables=16, hash_size=12, seed=0)
+        res = self.smr.evaluate_ann_index(self.histories, nrecs=10).take_value()
+        self.assertTrue(res["recall"] >= 0.9)
+
+    def test_lsh_2(self):
+        # With more probes the candidates of the queries are supersets
+        index = ApproximateNearestNeighbors(method="LSH", n_tables=4, hash_size=16, seed=1).create(self.smr.take_M())
+        query = self.smr.take_M()[["id.1"], :]
+        cands = index.candidates(query)
+        cands2 = index.candidates(query, n_probes=3)
+        self.assertTrue(len(cands) > 0 and numpy.all(numpy.isin(cands, cands2)) and len(cands2) >= len(cands))
+
+    def test_minhash_1(self):
+        # The items with the same tags are in the same buckets
+        index = ApproximateNearestNeighbors(method="MinHash", n_tables=8, hash_size=2, seed=0).create(self.smr.take_M())
+        M = self.smr.take_M().sparse_matrix("csr")
+        self.assertTrue(all([i in index.candidates(M[i, :]) for i in [0, 13, 512, 4000]]))
+
+    def test_methods_2(self):
+        # The index is used only if it is requested
+        smr2 = SparseMatrixRecommender().set_M(self.smr.take_M()).create_ann_index(n_tables=1, hash_size=30, seed=0)
+        profile = ["cap-Shape:convex", "edibility:poisonous"]
+        self.assertTrue(
+            smr2.recommend("id.1", nrecs=20).take_value() ==
+            smr2.recommend("id.1", nrecs=20, method="exact").take_value() and
+            smr2.recommend_by_profile(profile, nrecs=None).take_value() ==
+            smr2.recommend_by_profile(profile, nrecs=None, method="exact").take_value() and
+            len(smr2.recommend_by_profile(profile, nrecs=None, method="ann").take_value()) <
+            len(smr2.recommend_by_profile(profile, nrecs=None).take_value())
+        )
+
+    def test_methods_1(self):
+        # The index is used by the recommendation functions; it is stale after the matrix is changed
+        smr2 = SparseMatrixRecommender().set_M(self.smr.take_M()).create_ann_index(n_tables=16, seed=0)
+        profile = ["cap-Shape:convex", "edibility:poisonous"]
+        self.assertTrue(
+            isinstance(smr2.recommend("id.1", method="ann").take_value(), dict) and
+            isinstance(smr2.recommend_by_profile(profile, method="ann").take_value(), dict)
+        )
+
+        smr2.set_M(self.smr.take_M().copy())
+        self.assertTrue(smr2.take_ann_index() is None)
+        with self.assertRaises(ValueError):
+            smr2.recommend("id.1", method="ann")
+
+
+if __name__ == '__main__':
+    unittest.main()
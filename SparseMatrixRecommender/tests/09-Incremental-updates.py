@@ -0,0 +1,115 @@
+import unittest
+
+import numpy
+from SparseMatrixRecommender.SparseMatrixRecommender import *
+from SparseMatrixRecommender.DataLoaders import *
+
+
+def make_smr(data, global_weight_func="IDF", **kwargs):
+    return (SparseMatrixRecommender()
+            .create_from_wide_form(data=data,
+                                   columns=None,
+                                   item_column_name="id",
+                                   add_tag_types_to_column_names=True,
+                                   tag_value_separator=":",
+                                   **kwargs)
+            .apply_term_weight_functions(global_weight_func=global_weight_func,
+                                         local_weight_func="None",
+                                         normalizer_func="Cosine"))
+
+
+def same_matrices(smat1, smat2):
+    # The same matrices up to the order of the rows and the columns
+    if sorted(smat1.row_names()) != sorted(smat2.row_names()) or \
+            sorted(smat1.column_names()) != sorted(smat2.column_names()):
+        return False
+    smat2 = smat2[smat1.row_names(), smat1.column_names()]
+    return numpy.allclose(smat1.sparse_matrix().toarray(), smat2.sparse_matrix().toarray())
+
+
+def same_top_k(smat1, smat2):
+    # The same top-k values of each row (the ties can be broken differently)
+    smat1 = smat1.sparse_matrix("csr")
+    smat2 = smat2.sparse_matrix("csr")
+    return all([numpy.allclose(numpy.sort(smat1[i, :].data), numpy.sort(smat2[i, :].data))
+                for i in range(smat1.shape[0])])
+
+
+class SMRIncrementalUpdates(unittest.TestCase):
+    # Titanic data and recommender
+    dfTitanic = load_titanic_data_frame()
+    smr = make_smr(dfTitanic)
+
+    def test_upsert_1(self):
+        # Adding items gives the same recommendation matrix as the creation with all items
+        smr2 = make_smr(self.dfTitanic.iloc[0:1000]).upsert_items_from_wide_form(self.dfTitanic.iloc[1000:], "id")
+        self.assertTrue(same_matrices(self.smr.take_M(), smr2.take_M()))
+        self.assertEqual(smr2.recommend("id.1", nrecs=20).take_value().keys(),
+                         self.smr.recommend("id.1", nrecs=20).take_value().keys())
+
+    def test_upsert_2(self):
+        # Changing items gives the same recommendation matrix as the creation with the changed data
+        dfTitanic2 = self.dfTitanic.copy()
+        dfTitanic2.loc[0:9, "passengerClass"] = "4th"
+        smr2 = make_smr(self.dfTitanic).upsert_items_from_wide_form(dfTitanic2.iloc[0:10], "id",
+                                                                    columns=["passengerClass"])
+        self.assertTrue(same_matrices(make_smr(dfTitanic2).take_M(), smr2.take_M()))
+        self.assertTrue(same_matrices(make_smr(dfTitanic2).take_matrices()["passengerClass"],
+                                      smr2.take_matrices()["passengerClass"]))
+
+    def test_remove_1(self):
+        # Removing items gives the same recommendation matrix as the creation without them
+        items = self.dfTitanic["id"].iloc[100:300].tolist()
+        smr2 = make_smr(self.dfTitanic).remove_items(items)
+        self.assertTrue(same_matrices(make_smr(self.dfTitanic[~self.dfTitanic["id"].isin(items)]).take_M(),
+                                      smr2.take_M()))
+        with self.assertRaises(KeyError):
+            smr2.remove_items(items[0])
+
+    def test_tags_1(self):
+        # The tag type weights are applied to the new tags and tag types
+        smr2 = make_smr(self.dfTitanic).apply_tag_type_weights({"passengerSex": 2})
+        smr2.add_tags("passengerSex", ["other"]).add_tags("deck", ["A", "B"])
+        smr2.upsert_items({"passengerSex": SSparseMatrix([[1]], row_names=["id.1"], column_names=["other"])})
+        M = smr2.take_M()
+        self.assertTrue(
+            M.columns_count() == self.smr.take_M().columns_count() + 3 and
+            M["id.1", "passengerSex:other"] == 2 and
+            M["id.1", "passengerSex:male"] == 0 and
+            M[:, ["deck:A", "deck:B"]].sparse_matrix().nnz == 0
+        )
+
+    def test_item_similarity_index_1(self):
+        # The item similarity index is updated with the recommendation matrix
+        for globalWeightFunc in ["None", "IDF"]:
+            smr2 = make_smr(self.dfTitanic.iloc[0:1000], global_weight_func=globalWeightFunc)
+            smr2.create_item_similarity_index(k=20, batch_size=300)
+
+            dfTitanic2 = self.dfTitanic.copy()
+            dfTitanic2.loc[0:4, "passengerClass"] = "4th"
+            smr2.upsert_items_from_wide_form(self.dfTitanic.iloc[1000:1010], "id")
+            smr2.upsert_items_from_wide_form(dfTitanic2.iloc[0:5], "id", columns=["passengerClass"])
+            smr2.remove_items(["id.33", "id.600"])
+            smr2.add_tags("passengerSex", ["other"])
+
+            index = smr2.take_item_similarity_index()
+            index2 = (SparseMatrixRecommender()
+                      .set_M(smr2.take_M())
+                      .create_item_similarity_index(k=20)
+                      .take_item_similarity_index())
+            recs = smr2.recommend("id.1", nrecs=10, method="index").take_value()
+            recs2 = smr2.recommend("id.1", nrecs=10, method="exact").take_value()
+            self.assertTrue(index is not None and
+                            index.row_names() == smr2.take_M().row_names() and
+                            same_top_k(index, index2) and
+                            numpy.allclose(sorted(recs.values()), sorted(recs2.values())))
+
+    def test_unsupported_1(self):
+        # The recommendation matrix cannot be remade after repeated applications of term weight functions
+        smr2 = make_smr(self.dfTitanic).apply_term_weight_functions("IDF", "None", "Cosine")
+        with self.assertRaises(ValueError):
+            smr2.remove_items("id.1")
+
+
+if __name__ == '__main__':
+    unittest.main()
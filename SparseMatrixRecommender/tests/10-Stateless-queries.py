@@ -0,0 +1,64 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from SparseMatrixRecommender.SparseMatrixRecommender import *
+from SparseMatrixRecommender.DataLoaders import *
+
+
+class SMRStatelessQueries(unittest.TestCase):
+    dfMushroom = load_mushroom_data_frame()
+    smr = (SparseMatrixRecommender()
+           .create_from_wide_form(data=dfMushroom,
+                                  columns=None,
+                                  item_column_name="id",
+                                  add_tag_types_to_column_names=True,
+                                  tag_value_separator=":")
+           .apply_term_weight_functions(global_weight_func="IDF",
+                                        local_weight_func="None",
+                                        normalizer_func="Cosine"))
+
+    history = {"id.1": 1, "id.14": 2, "id.33": 1}
+    profile = ["cap-Shape:convex", "edibility:poisonous"]
+
+    def test_results_1(self):
+        # The query results are the pipeline results; the pipeline value of the recommender is not changed
+        self.smr.set_value("value")
+        q = self.smr.query()
+        self.assertTrue(
+            q.recommend(self.history, nrecs=12) == self.smr.recommend(self.history, nrecs=12).take_value() and
+            q.recommend_by_profile(self.profile) == self.smr.recommend_by_profile(self.profile).take_value() and
+            q.profile(self.history) == self.smr.profile(self.history).take_value() and
+            q.filter_by_profile(self.profile) == self.smr.filter_by_profile(self.profile).take_value() and
+            q.retrieve_by_query_elements(should=["cap-Color:red"], must=self.profile) ==
+            self.smr.retrieve_by_query_elements(should=["cap-Color:red"], must=self.profile).take_value() and
+            q.classify_by_profile("edibility", ["cap-Shape:convex"]) ==
+            self.smr.classify_by_profile("edibility", ["cap-Shape:convex"]).take_value()
+        )
+
+        self.smr.set_value("value")
+        q.recommend_batch([self.history, "id.100"])
+        self.assertEqual(self.smr.take_value(), "value")
+
+    def test_threads_1(self):
+        # Concurrent queries give the same results as sequential ones
+        q = self.smr.query()
+        histories = ["id.%d" % i for i in range(1, 200, 7)]
+        expected = [q.recommend(h, nrecs=10) for h in histories]
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            res = list(executor.map(lambda h: q.recommend(h, nrecs=10), histories * 4))
+        self.assertEqual(res, expected * 4)
+
+    def test_snapshot_1(self):
+        # The query object does not see later changes of the recommender
+        smr2 = SparseMatrixRecommender().set_M(self.smr.take_M())
+        q = smr2.query()
+        recs = q.recommend("id.1")
+        smr2.set_M(self.smr.take_M()[self.smr.take_M().row_names()[0:100], :])
+        self.assertTrue(q.recommend("id.1") == recs and q.take_M().rows_count() > 100)
+
+        with self.assertRaises(TypeError):
+            SparseMatrixRecommender().query()
+
+
+if __name__ == '__main__':
+    unittest.main()